@@ -28,6 +28,8 @@ History:
                     Sets time error using RO.Astro.Tm.setClockError(0) based on TAI reported by the TCC.
                     If the clock appears to be keeping UTC or TAI then the clock is assumed to be keeping that time perfectly.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Record the values shown by the standard strip charts from startup
+                    (see TUI.Base.TimeSeriesStore).
 """
 import time
 import opscore.utility.timer
@@ -36,6 +38,7 @@ import RO.Astro.Tm
 import RO.CnvUtil
 import RO.Constants
 import RO.PhysConst
+import TUI.Base.TimeSeriesStore
 import TUI.Models
 import TUI.PlaySound
 
@@ -70,6 +73,9 @@ class BackgroundKwds(object):
         self.clockType = None # set to "UTC" or "TAI" if keeping that time system
 
         self.tccModel.utc_TAI.addCallback(self._utcMinusTAICallback, callNow=False)
+
+        # record strip chart data from startup, so it is available when a strip chart window is first opened
+        TUI.Base.TimeSeriesStore.getStore().recordKeys(TUI.Base.TimeSeriesStore.StdKeyList)
     
         self.connection.addStateCallback(self.connCallback, callNow=True)
 
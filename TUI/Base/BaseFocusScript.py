@@ -119,6 +119,10 @@ History:
 2009-03-02 ROwen    Added a brief header for PR 777 diagnostic output.
 2010-03-12 ROwen    Changed to use Models.getModel.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          waitFindStarInList ranks candidate stars by amplitude and runs up to
+                    MaxConcurrentCentroids centroid commands at once, instead of one at a time.
+                    It picks the first candidate whose centroid succeeds, rather than the first usable star
+                    in the order reported by the guider, and waits for the other centroid commands to finish.
 """
 import inspect
 import math
@@ -255,6 +259,8 @@ class BaseFocusScript(object):
     FocGraphMargin = 5 # margin on graph for x axis limits, in um
     MaxFocSigmaFac = 0.5 # maximum allowed sigma of best fit focus as a multiple of focus range
     MinFocusIncr = 50 # minimum focus increment, in um
+    MaxConcurrentCentroids = 3 # maximum number of centroid commands to run at once when finding a star
+    CentroidPollMS = 100 # interval at which to check for finished centroid commands when finding a star (ms)
     def __init__(self,
         sr,
         gcamActor,
@@ -1082,7 +1088,12 @@ class BaseFocusScript(object):
         yield self.waitFindStarInList(filePath, starDataList)
 
     def waitFindStarInList(self, filePath, starDataList):
-        """Find best centroidable star in starDataList.
+        """Find a centroidable star in starDataList.
+
+        Candidates are the stars no brighter than maxFindAmpl, brightest first.
+        Up to MaxConcurrentCentroids centroid commands run at once, and the first one to finish
+        with a star wins, so the chosen star need not be the brightest usable candidate.
+        Centroid commands still running when a star is found are waited for before returning.
 
         If a suitable star is found: set starXYPos to position
         and sr.value to the star FWHM.
@@ -1098,29 +1109,53 @@ class BaseFocusScript(object):
         if self.maxFindAmpl is None:
             raise RuntimeError("Find disabled; maxFindAmpl=None")
         
-        for starData in starDataList:
-            starXYPos = starData[2:4]
-            starAmpl = starData[14]
-            if (starAmpl is None) or (starAmpl > self.maxFindAmpl):
+        # rank candidates locally: brightest unsaturated star first
+        # (sort is stable, so stars of equal amplitude keep the guider's order)
+        candXYPosList = [starData[2:4] for starData in sorted(
+            [starData for starData in starDataList if (starData[14] is not None) and (starData[14] <= self.maxFindAmpl)],
+            key = lambda starData: starData[14],
+            reverse = True,
+        )]
+
+        # keep up to MaxConcurrentCentroids centroid commands running at once
+        # and accept the first command that finishes with a star
+        # (commands that finish together are examined in rank order)
+        pendingList = [] # list of (star position, centroid cmdVar), in rank order
+        nextCandInd = 0
+        while pendingList or nextCandInd < len(candXYPosList):
+            while nextCandInd < len(candXYPosList) and len(pendingList) < self.MaxConcurrentCentroids:
+                starXYPos = candXYPosList[nextCandInd]
+                nextCandInd += 1
+                sr.showMsg("Centroiding star at %0.1f, %0.1f" % tuple(starXYPos))
+                centroidCmdStr = "centroid file=%s on=%0.1f,%0.1f cradius=%0.1f" % \
+                    (filePath, starXYPos[0], starXYPos[1], self.centroidRadPix)
+                cmdVar = sr.startCmd(
+                   actor = self.gcamActor,
+                   cmdStr = centroidCmdStr,
+                   keyVars = (self.guideModel.star,),
+                   checkFail = False,
+                )
+                pendingList.append((starXYPos, cmdVar))
+
+            doneList = [(starXYPos, cmdVar) for starXYPos, cmdVar in pendingList if cmdVar.isDone]
+            if not doneList:
+                yield sr.waitMS(self.CentroidPollMS)
                 continue
-                
-            sr.showMsg("Centroiding star at %0.1f, %0.1f" % tuple(starXYPos))
-            centroidCmdStr = "centroid file=%s on=%0.1f,%0.1f cradius=%0.1f" % \
-                (filePath, starXYPos[0], starXYPos[1], self.centroidRadPix)
-            yield sr.waitCmd(
-               actor = self.gcamActor,
-               cmdStr = centroidCmdStr,
-               keyVars = (self.guideModel.star,),
-               checkFail = False,
-            )
-            cmdVar = sr.value
-            if sr.debug:
-                starData = makeStarData("f", starXYPos)
-            else:
-                starData = cmdVar.getKeyVarData(self.guideModel.star)
-            if starData:
-                sr.value = StarMeas.fromStarKey(starData[0])
-                return
+
+            for starXYPos, cmdVar in doneList:
+                pendingList.remove((starXYPos, cmdVar))
+                if sr.debug:
+                    starData = makeStarData("f", starXYPos)
+                else:
+                    starData = cmdVar.getKeyVarData(self.guideModel.star)
+                if starData:
+                    # gcam cannot abort a centroid command, so wait for the remaining commands to finish
+                    # (else they would still be running when the next exposure or centroid is requested)
+                    if pendingList:
+                        sr.showMsg("Waiting for %s remaining centroid command(s)" % (len(pendingList),))
+                        yield sr.waitCmdVars([pendCmdVar for pendXYPos, pendCmdVar in pendingList], checkFail=False)
+                    sr.value = StarMeas.fromStarKey(starData[0])
+                    return
 
         sr.showMsg("No usable star fainter than %s ADUs found" % self.maxFindAmpl,
             severity=RO.Constants.sevWarning)
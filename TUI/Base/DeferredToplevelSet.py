@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""A set of Toplevel windows whose window modules may be loaded on demand.
+
+Importing a window module and building its widget can be expensive (e.g. matplotlib figures)
+and the widget usually registers keyVar callbacks that cost CPU time all night.
+Windows that are registered with addDeferredWindow are listed by getNames (and thus appear
+in the menus), but the window module is not imported and its addWindow function is not called
+until the window is first needed (e.g. shown), unless the geometry file says it was visible.
+
+History:
+2026-10-18          Initial version.
+                    Record window creation time when profiling startup (see TUI.StartupProfiler).
+2026-10-18          Added NullToplevelSet, for running without Tk (see TUI.Headless).
+"""
+import json
+import sys
+import traceback
+
+import RO.Constants
+import RO.StringUtil
+import RO.Wdg
+import TUI.Headless
+import TUI.StartupProfiler
+
+__all__ = ["DeferredToplevelSet", "NullToplevelSet"]
+
+class DeferredToplevelSet(RO.Wdg.ToplevelSet):
+    """A ToplevelSet that can defer loading window modules until their windows are needed
+    """
+    def __init__(self,
+        fileName = None,
+        defGeomVisDict = None,
+        createFile = False,
+        logFunc = None,
+    ):
+        """Create a DeferredToplevelSet
+
+        Inputs:
+        - fileName, defGeomVisDict, createFile: see RO.Wdg.ToplevelSet
+        - logFunc: function for logging errors loading window modules, or None;
+            it must take two arguments: the text to log and severity (an RO.Constants.sev constant)
+        """
+        self.deferredDict = {} # dict of window name: window module name, for windows not yet loaded
+        self.logFunc = logFunc
+        self._hideDeferred = False # hide deferred windows from getNames? (used by writeGeomVisFile)
+        RO.Wdg.ToplevelSet.__init__(self,
+            fileName = fileName,
+            defGeomVisDict = defGeomVisDict,
+            createFile = createFile,
+        )
+
+    def addDeferredWindow(self, name, modName, defVisible=False):
+        """Register a window whose module should be loaded when the window is first needed
+
+        Inputs:
+        - name: name of window, as used by the module's addWindow function
+        - modName: full name of window module, e.g. "TUI.TCC.SkyWindow";
+            the module must have a function addWindow(tlSet) that creates the named window
+        - defVisible: default visibility of the window, as specified by addWindow;
+            if the window is visible according to the geometry file (or by default)
+            then the module is loaded immediately
+        """
+        if name in self.deferredDict or self.getToplevel(name):
+            raise RuntimeError("toplevel %r already exists" % (name,))
+        self.deferredDict[name] = modName
+        if self.fileVisDict.get(name, defVisible):
+            self.loadDeferredWindow(name)
+
+    def isDeferred(self, name):
+        """Return True if the named window is registered but its module has not been loaded
+        """
+        return name in self.deferredDict
+
+    def loadDeferredWindow(self, name):
+        """Load the window module for the named deferred window, if not already loaded
+
+        Return True if successful (or the window is already loaded), False otherwise.
+        Failures are logged and printed to stderr; the window is then removed from the set.
+        """
+        modName = self.deferredDict.get(name)
+        if modName is None:
+            return True
+        # remove all windows created by this module first, so createToplevel does not recurse
+        for tlName, tlModName in self.deferredDict.items():
+            if tlModName == modName:
+                del self.deferredDict[tlName]
+        try:
+            module = __import__(modName, globals(), locals(), "addWindow")
+            module.addWindow(self)
+        except Exception as e:
+            errMsg = "%s.addWindow failed: %s" % (modName, RO.StringUtil.strFromException(e))
+            if self.logFunc:
+                self.logFunc(errMsg, severity=RO.Constants.sevError)
+            sys.stderr.write(errMsg + "\n")
+            traceback.print_exc(file=sys.stderr)
+            return False
+        return True
+
+    def createToplevel(self, name, *args, **kargs):
+        """Create a new Toplevel, add it to the set and return it.
+
+        See RO.Wdg.ToplevelSet.createToplevel for details.
+        """
+        with TUI.StartupProfiler.timeIt("window", name):
+            return RO.Wdg.ToplevelSet.createToplevel(self, name, *args, **kargs)
+
+    def getNames(self, prefix=""):
+        """Return all window names of windows that start with the specified prefix
+        (or all names if prefix omitted), including windows that have not yet been loaded.
+
+        The names are in alphabetical order, ignoring case.
+        """
+        nameList = RO.Wdg.ToplevelSet.getNames(self)
+        if not self._hideDeferred:
+            nameList += self.deferredDict.keys()
+            nameList.sort(key=lambda s: s.lower())
+        if not prefix:
+            return nameList
+        return [name for name in nameList if name.startswith(prefix)]
+
+    def getToplevel(self, name):
+        """Return the named Toplevel, or None if it does not exist.
+
+        If the window has been registered but not yet loaded, load it first.
+        """
+        if name in self.deferredDict and not self._hideDeferred:
+            self.loadDeferredWindow(name)
+        return RO.Wdg.ToplevelSet.getToplevel(self, name)
+
+    def writeGeomVisFile(self, fileName=None, readFirst=True):
+        """Write toplevel geometry and visibility info to a file that readGeomVisFile can read.
+
+        Windows that have not been loaded retain the data in the file (if any).
+        See RO.Wdg.ToplevelSet.writeGeomVisFile for details.
+        """
+        fileName = fileName or self.defFileName
+        self._hideDeferred = True
+        try:
+            RO.Wdg.ToplevelSet.writeGeomVisFile(self, fileName=fileName, readFirst=readFirst)
+        finally:
+            self._hideDeferred = False
+
+        deferredNames = sorted(name for name in self.deferredDict \
+            if name in self.fileGeomDict or name in self.fileVisDict or name in self.fileState)
+        if not deferredNames:
+            return
+        try:
+            outFile = open(fileName, "a")
+        except Exception as e:
+            raise RuntimeError("Could not open geometry file %r; error: %s\n" % (fileName, RO.StringUtil.strFromException(e)))
+        try:
+            for name in deferredNames:
+                valueList = [self.fileGeomDict.get(name, ""), str(self.fileVisDict.get(name, False))]
+                stateDict = self.fileState.get(name)
+                if stateDict:
+                    valueList.append(json.dumps(stateDict))
+                outFile.write("%s = %s\n" % (name, ", ".join(valueList)))
+        finally:
+            outFile.close()
+
+
+class NullToplevelSet(DeferredToplevelSet):
+    """A DeferredToplevelSet for running without Tk (see TUI.Headless)
+
+    Window modules are never loaded and every window is a TUI.Headless.NullWdg.
+    The geometry file is neither read nor written.
+    """
+    def __init__(self, logFunc=None):
+        """Create a NullToplevelSet
+
+        Inputs:
+        - logFunc: see DeferredToplevelSet
+        """
+        DeferredToplevelSet.__init__(self, logFunc=logFunc)
+
+    def loadDeferredWindow(self, name):
+        """Replace the named deferred window with a null window, without loading its window module
+
+        Always returns True.
+        """
+        if self.deferredDict.pop(name, None) is not None:
+            self.addToplevel(TUI.Headless.NullWdg(), name)
+        return True
+
+    def createToplevel(self, name, *args, **kargs):
+        """Create a null window, add it to the set and return it
+
+        The arguments are accepted for compatibility with RO.Wdg.ToplevelSet.createToplevel,
+        but are ignored (in particular, wdgFunc is not called).
+        """
+        tl = TUI.Headless.NullWdg()
+        self.addToplevel(tl, name)
+        return tl
+
+    def writeGeomVisFile(self, fileName=None, readFirst=True):
+        """Do nothing
+        """
+        pass
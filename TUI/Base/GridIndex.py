@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+"""A spatial index of 2-d points, for finding the point nearest a given position (e.g. the mouse)
+
+The points are sorted into square cells of a regular grid, so a search only examines
+the points in the cells near the search position.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Fixed searches with a huge or infinite maxDist (the cell range overflowed); added a self-test.
+"""
+import numpy
+
+__all__ = ["GridIndex"]
+
+class GridIndex(object):
+    """A grid-based spatial index of 2-d points
+
+    The index is static: to change the points, create a new index.
+    """
+    def __init__(self, xArr, yArr, cellSize=8.0):
+        """Create a GridIndex
+
+        Inputs:
+        - xArr: x positions (a sequence or numpy array)
+        - yArr: y positions (a sequence or numpy array of the same length as xArr)
+        - cellSize: size of each grid cell, in the same units as x and y;
+            searches are fastest if cellSize is similar to the usual search radius
+
+        Non-finite positions are ignored.
+        """
+        if cellSize <= 0:
+            raise RuntimeError("cellSize=%s must be positive" % (cellSize,))
+        self.cellSize = float(cellSize)
+        xArr = numpy.asarray(xArr, dtype=float)
+        yArr = numpy.asarray(yArr, dtype=float)
+        if xArr.shape != yArr.shape:
+            raise RuntimeError("xArr and yArr must have the same shape")
+
+        ptIndArr = numpy.flatnonzero(numpy.isfinite(xArr) & numpy.isfinite(yArr))
+        cellXArr, cellYArr = self._cellsFromPos(xArr[ptIndArr], yArr[ptIndArr])
+        if len(ptIndArr) > 0:
+            self._minCell = (cellXArr.min(), cellYArr.min())
+            self._maxCell = (cellXArr.max(), cellYArr.max())
+        else:
+            self._minCell = self._maxCell = (0, 0)
+        keyArr = self._keysFromCells(cellXArr, cellYArr)
+        sortInds = numpy.argsort(keyArr, kind="mergesort")
+        self._keyArr = keyArr[sortInds]
+        self._ptIndArr = ptIndArr[sortInds] # index of each point in the original arrays
+        self._xArr = xArr[self._ptIndArr]
+        self._yArr = yArr[self._ptIndArr]
+
+    def findNearest(self, xyPos, maxDist=None):
+        """Return (index, distance) of the point nearest xyPos, or (None, None) if none found
+
+        Inputs:
+        - xyPos: x,y position
+        - maxDist: maximum distance; if None then there is no limit
+
+        If several points are equally near, the one with the smallest index is returned.
+        """
+        if len(self._keyArr) == 0:
+            return (None, None)
+        if maxDist is None:
+            candInds = numpy.arange(len(self._keyArr))
+        else:
+            candInds = self._getCandidates(xyPos, maxDist)
+            if len(candInds) == 0:
+                return (None, None)
+        distSqArr = (self._xArr[candInds] - xyPos[0])**2 + (self._yArr[candInds] - xyPos[1])**2
+        minDistSq = distSqArr.min()
+        if maxDist is not None and minDistSq > maxDist * maxDist:
+            return (None, None)
+        ptInd = self._ptIndArr[candInds[distSqArr == minDistSq]].min()
+        return (int(ptInd), float(numpy.sqrt(minDistSq)))
+
+    def findWithin(self, xyPos, maxDist):
+        """Return the indices of all points within maxDist of xyPos, as a sorted numpy array
+        """
+        candInds = self._getCandidates(xyPos, maxDist)
+        distSqArr = (self._xArr[candInds] - xyPos[0])**2 + (self._yArr[candInds] - xyPos[1])**2
+        return numpy.sort(self._ptIndArr[candInds[distSqArr <= maxDist * maxDist]])
+
+    def __len__(self):
+        return len(self._keyArr)
+
+    def _cellsFromPos(self, xArr, yArr):
+        """Return cell x, y indices (as int arrays) for x, y positions
+        """
+        return (
+            numpy.floor(xArr / self.cellSize).astype(numpy.int64),
+            numpy.floor(yArr / self.cellSize).astype(numpy.int64),
+        )
+
+    def _keysFromCells(self, cellXArr, cellYArr):
+        """Return a sortable key for each cell, such that the cells in a row (same cell y) are adjacent
+
+        Cells must be within the range of cells that contain points.
+        """
+        numCellsX = self._maxCell[0] - self._minCell[0] + 1
+        return ((cellYArr - self._minCell[1]) * numCellsX) + (cellXArr - self._minCell[0])
+
+    def _getCandidates(self, xyPos, maxDist):
+        """Return indices (into the sorted arrays) of points in the cells within maxDist of xyPos
+        """
+        if len(self._keyArr) == 0:
+            return numpy.zeros(0, dtype=int)
+        # compute cell bounds as floats and clip them to the occupied cells before converting to int,
+        # so a huge (or infinite) maxDist cannot overflow
+        xyPos = numpy.array(xyPos[0:2], dtype=float)
+        minCellXY = numpy.floor((xyPos - maxDist) / self.cellSize)
+        maxCellXY = numpy.floor((xyPos + maxDist) / self.cellSize)
+        if numpy.any(minCellXY > self._maxCell) or numpy.any(maxCellXY < self._minCell):
+            return numpy.zeros(0, dtype=int)
+        minCellX, minCellY = [int(val) for val in numpy.maximum(minCellXY, self._minCell)]
+        maxCellX, maxCellY = [int(val) for val in numpy.minimum(maxCellXY, self._maxCell)]
+        if (maxCellY - minCellY + 1) * (maxCellX - minCellX + 1) > len(self._keyArr):
+            # more cells than points; examine all points
+            return numpy.arange(len(self._keyArr))
+
+        # each row of cells is a contiguous range of keys
+        cellYArr = numpy.arange(minCellY, maxCellY + 1)
+        begIndArr = numpy.searchsorted(self._keyArr, self._keysFromCells(minCellX, cellYArr), side="left")
+        endIndArr = numpy.searchsorted(self._keyArr, self._keysFromCells(maxCellX, cellYArr), side="right")
+        candIndList = [numpy.arange(begInd, endInd) for begInd, endInd in zip(begIndArr, endIndArr) if endInd > begInd]
+        if not candIndList:
+            return numpy.zeros(0, dtype=int)
+        return numpy.concatenate(candIndList)
+
+
+if __name__ == "__main__":
+    print "Testing GridIndex"
+    nFailures = 0
+
+    def checkSearch(gridIndex, xArr, yArr, xyPos, maxDist):
+        """Compare findNearest and findWithin to a brute-force search; return the number of failures
+        """
+        distArr = numpy.hypot(xArr - xyPos[0], yArr - xyPos[1])
+        with numpy.errstate(invalid="ignore"):
+            predWithin = numpy.flatnonzero(distArr <= maxDist)
+        if len(predWithin) > 0:
+            predNearest = int(predWithin[numpy.argmin(distArr[predWithin])])
+        else:
+            predNearest = None
+        nearest = gridIndex.findNearest(xyPos, maxDist)[0]
+        within = gridIndex.findWithin(xyPos, maxDist)
+        numFailed = 0
+        if nearest != predNearest:
+            print "findNearest(%s, %s) = %s != %s" % (xyPos, maxDist, nearest, predNearest)
+            numFailed += 1
+        if list(within) != list(predWithin):
+            print "findWithin(%s, %s) = %s != %s" % (xyPos, maxDist, list(within), list(predWithin))
+            numFailed += 1
+        return numFailed
+
+    numpy.random.seed(1)
+    xArr = numpy.random.uniform(-100, 100, 500)
+    yArr = numpy.random.uniform(0, 300, 500)
+    xArr[7] = numpy.nan
+    gridIndex = GridIndex(xArr, yArr, cellSize=5.0)
+    for xyPos in ((11, 11), (-100, 0), (0, 150), (1.0e6, -1.0e6)):
+        for maxDist in (0.0, 1.0, 3.0, 20.0, 200.0, 1.0e30, 1.0e300, numpy.inf):
+            nFailures += checkSearch(gridIndex, xArr, yArr, xyPos, maxDist)
+    if gridIndex.findNearest((11, 11))[0] != gridIndex.findNearest((11, 11), numpy.inf)[0]:
+        print "findNearest with maxDist=None and maxDist=inf disagree"
+        nFailures += 1
+
+    emptyIndex = GridIndex([], [])
+    if emptyIndex.findNearest((0, 0), 1.0e30) != (None, None) or len(emptyIndex.findWithin((0, 0), numpy.inf)) != 0:
+        print "search of empty index found a point"
+        nFailures += 1
+
+    if nFailures == 0:
+        print "No failures"
+    else:
+        print "%s failures" % (nFailures,)
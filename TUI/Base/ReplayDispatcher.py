@@ -0,0 +1,382 @@
+#!/usr/bin/env python
+"""Replay recorded hub replies, to measure how fast TUI can absorb them
+
+Replies are read from a capture file or a log archive and dispatched through the TUI dispatcher
+(opscore.actor.cmdkeydispatcher.CmdKeyVarDispatcher.dispatchReplyStr), either as fast as possible
+or at a scaled version of the recorded rate. The following are measured:
+- dispatch cost per actor: total time spent in dispatchReplyStr (including parsing, logging and callbacks)
+- callback cost per actor and per keyword: time spent in keyword variable callbacks
+- parse cost per actor (optional): time to parse the replies, measured separately
+- Tk starvation: how late a periodic Tk timer fires while replies are being dispatched
+  (when headless, how late a periodic twisted timer fires)
+
+A capture file is a text file with one hub reply per line:
+    [unixTime] cmdr cmdID actor msgCode keywords
+Lines that do not look like hub replies are ignored, so a log of stdout may also be used
+if it contains hub replies. A log archive is a directory written by TUI.Models.LogArchive.
+
+Usage, to replay with all standard windows loaded (but hidden):
+    python ReplayDispatcher.py [--speed=<factor>] [--windows] [--parse] [--headless] <captureFile or logArchiveDir>
+--headless runs without Tk (see TUI.Headless), e.g. on a host with no display;
+window modules are then not loaded, even with --windows.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Added --headless option.
+"""
+import os
+import sys
+import time
+
+import opscore.actor.keyvar
+import opscore.protocols.parser
+import RO.StringUtil
+import TUI.Headless
+import TUI.Models.TUIModel
+import TUI.Version
+
+__all__ = ["ReplayDispatcher", "ReplayStats", "readCaptureFile", "readLogArchive", "readReplies"]
+
+MsgCodes = frozenset(":>iwef!")
+
+def _splitReply(replyStr):
+    """Return (cmdr, cmdID, actor, msgCode) of a hub reply string, or None if it is not a hub reply
+    """
+    fields = replyStr.split(None, 4)
+    if len(fields) < 4 or fields[3] not in MsgCodes:
+        return None
+    try:
+        int(fields[1])
+    except ValueError:
+        return None
+    return fields[0:4]
+
+def readCaptureFile(filePath):
+    """Read a capture file; yield (unixTime, replyStr) for each reply
+
+    unixTime is None if the line has no time stamp.
+    """
+    with open(filePath, "rU") as captureFile:
+        for line in captureFile:
+            line = line.strip()
+            if not line:
+                continue
+            unixTime = None
+            timeStr, sep, remStr = line.partition(" ")
+            try:
+                unixTime = float(timeStr)
+                if _splitReply(remStr) is not None:
+                    line = remStr
+                else:
+                    unixTime = None
+            except ValueError:
+                pass
+            if _splitReply(line) is None:
+                continue
+            yield (unixTime, line)
+
+def readLogArchive(dirPath):
+    """Read hub replies from a log archive (see TUI.Models.LogArchive); yield (unixTime, replyStr) for each
+
+    Entries generated by TUI itself (including synthesized command entries) are skipped.
+    """
+    import TUI.Models.LogArchive
+    archive = TUI.Models.LogArchive.LogArchive(dirPath, maxAgeDays=None)
+    try:
+        for segment in archive.segmentList:
+            for index in segment.getIndices():
+                logEntry = segment.getEntry(int(index))
+                if logEntry.cmdInfo is not None or logEntry.actor == TUI.Version.ApplicationName:
+                    continue
+                replyStr = logEntry.msgStr
+                if isinstance(replyStr, unicode):
+                    replyStr = replyStr.encode("utf-8")
+                if _splitReply(replyStr) is None:
+                    continue
+                yield (logEntry.unixTime, replyStr)
+    finally:
+        archive.close()
+
+def readReplies(path):
+    """Read replies from a capture file or log archive directory; return a list of (unixTime, replyStr)
+    """
+    if os.path.isdir(path):
+        return list(readLogArchive(path))
+    return list(readCaptureFile(path))
+
+
+class ActorStats(object):
+    """Replay statistics for one actor
+    """
+    def __init__(self, actor):
+        self.actor = actor
+        self.numReplies = 0
+        self.dispatchTime = 0.0
+        self.callbackTime = 0.0
+        self.parseTime = 0.0
+        self.numParseErrors = 0
+
+
+class ReplayStats(object):
+    """Statistics gathered while replaying hub replies
+    """
+    def __init__(self):
+        self.actorStatsDict = {} # dict of actor: ActorStats
+        self.keyCallbackTimeDict = {} # dict of (actor, keyword name): callback time (sec)
+        self.numReplies = 0
+        self.wallTime = 0.0
+        self.lateList = [] # list of lateness (sec) of the Tk probe timer
+        self.probeInterval = None
+
+    def getActorStats(self, actor):
+        actorStats = self.actorStatsDict.get(actor)
+        if actorStats is None:
+            actorStats = ActorStats(actor)
+            self.actorStatsDict[actor] = actorStats
+        return actorStats
+
+    def getReport(self, maxKeywords=20):
+        """Return a report as a string
+        """
+        lineList = []
+        totDispatchTime = sum(actorStats.dispatchTime for actorStats in self.actorStatsDict.itervalues())
+        totCallbackTime = sum(actorStats.callbackTime for actorStats in self.actorStatsDict.itervalues())
+        lineList.append("Replayed %d replies in %0.2f sec: %0.0f replies/sec; dispatch %0.2f sec, callbacks %0.2f sec" % \
+            (self.numReplies, self.wallTime, self.numReplies / max(self.wallTime, 1.0e-9),
+            totDispatchTime, totCallbackTime))
+        if self.numReplies > 0 and totDispatchTime > 0:
+            lineList.append("Maximum sustainable rate (dispatch only): %0.0f replies/sec" % \
+                (self.numReplies / totDispatchTime,))
+        lineList.append("")
+        lineList.append("%-16s %9s %11s %11s %11s %11s %8s" % \
+            ("actor", "replies", "dispatch ms", "usec/reply", "callback ms", "parse ms", "errors"))
+        actorStatsList = sorted(self.actorStatsDict.itervalues(), key=lambda st: st.dispatchTime, reverse=True)
+        for actorStats in actorStatsList:
+            lineList.append("%-16s %9d %11.1f %11.1f %11.1f %11.1f %8d" % (
+                actorStats.actor,
+                actorStats.numReplies,
+                actorStats.dispatchTime * 1000.0,
+                actorStats.dispatchTime * 1.0e6 / max(actorStats.numReplies, 1),
+                actorStats.callbackTime * 1000.0,
+                actorStats.parseTime * 1000.0,
+                actorStats.numParseErrors,
+            ))
+
+        if self.keyCallbackTimeDict:
+            lineList.append("")
+            lineList.append("Most expensive keyword callbacks:")
+            keyTimeList = sorted(self.keyCallbackTimeDict.iteritems(), key=lambda item: item[1], reverse=True)
+            for (actor, keyName), callbackTime in keyTimeList[0:maxKeywords]:
+                lineList.append("%-40s %11.1f ms" % ("%s.%s" % (actor, keyName), callbackTime * 1000.0))
+
+        if self.lateList:
+            lateList = sorted(self.lateList)
+            numLate = sum(1 for late in lateList if late > self.probeInterval)
+            lineList.append("")
+            lineList.append("Tk starvation (timer requested every %0.0f ms, %d samples): " \
+                "median late %0.1f ms; 99%% %0.1f ms; max %0.1f ms; %0.1f%% of samples late by > interval" % (
+                self.probeInterval * 1000.0,
+                len(lateList),
+                lateList[len(lateList) // 2] * 1000.0,
+                lateList[min(len(lateList) - 1, int(len(lateList) * 0.99))] * 1000.0,
+                lateList[-1] * 1000.0,
+                numLate * 100.0 / len(lateList),
+            ))
+        return "\n".join(lineList)
+
+
+class ReplayDispatcher(object):
+    """Replay hub replies through the TUI dispatcher and gather statistics (a ReplayStats)
+    """
+    def __init__(self,
+        replyList,
+        speed = None,
+        chunkTime = 0.05,
+        probeInterval = 0.01,
+        measureParse = False,
+        doneFunc = None,
+    ):
+        """Inputs:
+        - replyList: a list of (unixTime, replyStr); unixTime may be None if speed is None
+        - speed: replay speed relative to the recorded rate (e.g. 10 for ten times real time);
+            if None then replay as fast as possible, yielding to the event loop every chunkTime seconds
+        - chunkTime: maximum time to dispatch replies before yielding to the event loop (sec)
+        - probeInterval: interval of the Tk timer used to measure Tk starvation (sec)
+        - measureParse: if True then measure the cost of parsing each reply
+            (by parsing it a second time, outside the timed dispatch)
+        - doneFunc: function to call when replay is finished; it receives this object
+        """
+        self.replyList = replyList
+        self.speed = float(speed) if speed else None
+        self.chunkTime = float(chunkTime)
+        self.probeInterval = float(probeInterval)
+        self.doneFunc = doneFunc
+        self.tuiModel = TUI.Models.TUIModel.Model(True)
+        self.dispatcher = self.tuiModel.dispatcher
+        self.parser = opscore.protocols.parser.ReplyParser() if measureParse else None
+        self.stats = ReplayStats()
+        self.stats.probeInterval = self.probeInterval
+        self.isDone = False
+        self._nextInd = 0
+        self._startTime = None
+        self._replayStartTime = None
+        self._probeTime = None
+        self._callbackDepth = 0
+        self._origDoCallbacks = None
+
+        if self.speed is not None:
+            for unixTime, replyStr in replyList:
+                if unixTime is None:
+                    raise RuntimeError("Replies have no time stamps; speed must be None")
+            if replyList:
+                self._replayStartTime = replyList[0][0]
+
+    def start(self):
+        """Start replaying
+        """
+        self._installCallbackTimer()
+        self._startTime = time.time()
+        self._probeTime = time.time() + self.probeInterval
+        self.tuiModel.tkRoot.after(int(self.probeInterval * 1000), self._probe)
+        self.tuiModel.reactor.callLater(0, self._dispatchChunk)
+
+    def dispatchReply(self, replyStr):
+        """Dispatch one reply and update the statistics
+        """
+        cmdr, cmdID, actor, msgCode = _splitReply(replyStr)
+        actorStats = self.stats.getActorStats(actor)
+        if self.parser:
+            parseStartTime = time.time()
+            try:
+                self.parser.parse(replyStr)
+            except Exception:
+                actorStats.numParseErrors += 1
+            actorStats.parseTime += time.time() - parseStartTime
+        startTime = time.time()
+        self.dispatcher.dispatchReplyStr(replyStr)
+        actorStats.dispatchTime += time.time() - startTime
+        actorStats.numReplies += 1
+        self.stats.numReplies += 1
+
+    def _dispatchChunk(self):
+        """Dispatch the next chunk of replies and schedule the next chunk
+        """
+        chunkStartTime = time.time()
+        numReplies = len(self.replyList)
+        if self.speed is None:
+            while self._nextInd < numReplies and time.time() - chunkStartTime < self.chunkTime:
+                self.dispatchReply(self.replyList[self._nextInd][1])
+                self._nextInd += 1
+            delay = 0
+        else:
+            replayTime = self._replayStartTime + ((chunkStartTime - self._startTime) * self.speed)
+            while self._nextInd < numReplies and self.replyList[self._nextInd][0] <= replayTime \
+                and time.time() - chunkStartTime < self.chunkTime:
+                self.dispatchReply(self.replyList[self._nextInd][1])
+                self._nextInd += 1
+            if self._nextInd < numReplies:
+                delay = max(0, (self.replyList[self._nextInd][0] - replayTime) / self.speed)
+        if self._nextInd >= numReplies:
+            self._finish()
+            return
+        self.tuiModel.reactor.callLater(delay, self._dispatchChunk)
+
+    def _finish(self):
+        """Replay is finished; restore callbacks and call doneFunc
+        """
+        self.stats.wallTime = time.time() - self._startTime
+        self.isDone = True
+        self._removeCallbackTimer()
+        if self.doneFunc:
+            self.doneFunc(self)
+
+    def _installCallbackTimer(self):
+        """Time keyword variable callbacks, by wrapping KeyVar._doCallbacks
+        """
+        keyVarClass = opscore.actor.keyvar.KeyVar
+        origDoCallbacks = keyVarClass._doCallbacks
+        self._origDoCallbacks = origDoCallbacks
+        stats = self.stats
+        def timedDoCallbacks(keyVar, *args, **kargs):
+            if self._callbackDepth > 0:
+                # nested callback; its time is included in the outer callback's time
+                return origDoCallbacks(keyVar, *args, **kargs)
+            self._callbackDepth += 1
+            startTime = time.time()
+            try:
+                return origDoCallbacks(keyVar, *args, **kargs)
+            finally:
+                callbackTime = time.time() - startTime
+                self._callbackDepth -= 1
+                actor = getattr(keyVar, "actor", "?")
+                keyName = getattr(keyVar, "name", "?")
+                stats.getActorStats(actor).callbackTime += callbackTime
+                keyTuple = (actor, keyName)
+                stats.keyCallbackTimeDict[keyTuple] = stats.keyCallbackTimeDict.get(keyTuple, 0.0) + callbackTime
+        keyVarClass._doCallbacks = timedDoCallbacks
+
+    def _probe(self):
+        """Periodic Tk timer callback; record how late it fires
+        """
+        if self.isDone:
+            return
+        currTime = time.time()
+        self.stats.lateList.append(max(0.0, currTime - self._probeTime))
+        self._probeTime = currTime + self.probeInterval
+        self.tuiModel.tkRoot.after(int(self.probeInterval * 1000), self._probe)
+
+    def _removeCallbackTimer(self):
+        """Restore KeyVar._doCallbacks
+        """
+        if self._origDoCallbacks is not None:
+            opscore.actor.keyvar.KeyVar._doCallbacks = self._origDoCallbacks
+            self._origDoCallbacks = None
+
+
+if __name__ == "__main__":
+    import optparse
+
+    parser = optparse.OptionParser(usage="%prog [options] captureFile or logArchiveDir")
+    parser.add_option("--speed", type="float", default=None,
+        help="replay speed relative to the recorded rate; default is as fast as possible")
+    parser.add_option("--windows", action="store_true", default=False,
+        help="load all standard windows (hidden), so their callbacks are measured")
+    parser.add_option("--parse", action="store_true", default=False,
+        help="measure parse cost (by parsing each reply twice)")
+    parser.add_option("--headless", action="store_true", default=False,
+        help="run without Tk (window modules are not loaded)")
+    options, args = parser.parse_args()
+    if len(args) != 1:
+        parser.error("Specify one capture file or log archive directory")
+    if options.headless:
+        TUI.Headless.setHeadless(True)
+
+    tuiModel = TUI.Models.TUIModel.Model(True)
+    if options.windows:
+        import TUI.LoadStdModules
+        TUI.LoadStdModules.loadAll()
+        # loadAll defers loading most windows until they are shown; load them all now
+        tlSet = tuiModel.tlSet
+        for name in tlSet.getNames():
+            if tlSet.isDeferred(name):
+                tlSet.loadDeferredWindow(name)
+
+    try:
+        replyList = readReplies(args[0])
+    except Exception as e:
+        sys.stderr.write("Could not read %r: %s\n" % (args[0], RO.StringUtil.strFromException(e)))
+        sys.exit(1)
+    print "Read %d replies from %r" % (len(replyList), args[0])
+
+    def doneFunc(replayer):
+        print replayer.stats.getReport()
+        tuiModel.reactor.stop()
+
+    replayer = ReplayDispatcher(
+        replyList = replyList,
+        speed = options.speed,
+        measureParse = options.parse,
+        doneFunc = doneFunc,
+    )
+    replayer.start()
+    tuiModel.reactor.run()
@@ -4,6 +4,7 @@
 History:
 2014-02-11 ROwen    Extracted from TUI.ScriptMenu and renamed from _LoadScript
 2015-11-05 ROwen    Ditched obsolete "except (SystemExit, KeyboardInterrupt): raise" code
+2026-10-18          Record the time to reopen each script window when profiling startup (see TUI.StartupProfiler).
 """
 import os
 import tkMessageBox
@@ -13,6 +14,7 @@ from RO.StringUtil import strFromException
 import TUI.Base.Wdg
 import TUI.TUIPaths
 import TUI.Models
+import TUI.StartupProfiler
 
 __all__ = ("getScriptDirs", "ScriptLoader", "reopenScriptWindows", "ScriptWindowNamePrefix")
 
@@ -103,7 +105,8 @@ def reopenScriptWindows():
             for scriptDir in scriptDirs:
                 fullPath = os.path.join(scriptDir, subPath)
                 if os.path.isfile(fullPath):
-                    ScriptLoader(subPathList=subPathList, fullPath=fullPath, showErrDialog=False)()
+                    with TUI.StartupProfiler.timeIt("script", fullPath):
+                        ScriptLoader(subPathList=subPathList, fullPath=fullPath, showErrDialog=False)()
                     continue
 
 
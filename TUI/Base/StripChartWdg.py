@@ -7,35 +7,286 @@ History:
             - plotKeyVar no longer takes a "name" argument; use label if you want a name that shows up in legends.
 2012-05-31  Return line from plotKeyVar.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          plotKeyVar reads data from the shared TUI.Base.TimeSeriesStore, so each keyword value
+                    is recorded once and recent history is shown even if the chart is created late.
+                    Backward-incompatible change: plotKeyVar's func receives a float; a PVT is converted
+                    to its position before func sees it.
+                    Added useHistory argument to plotKeyVar.
+                    The displayed data of a line is held in numpy arrays, so _SeriesLine overrides
+                    _purgeOldData (the base class version only works with lists).
+2026-10-18          Reduced the cost of drawing:
+                    - Displayed data is decimated to the min and max of each pixel column (see decimateMinMax).
+                    - New data is drawn at most once per frameInterval (a new argument), no matter how fast
+                      it arrives, and only the subplots whose lines changed are blitted.
+                    - addLine returns a line whose data is held in a TimeSeries ring buffer.
 """
+import time
+
+import numpy
+import RO.TkUtil
 import RO.Wdg.StripChartWdg
+import TUI.Base.TimeSeriesStore
 
 TimeConverter = RO.Wdg.StripChartWdg.TimeConverter
 
+def decimateMinMax(tArr, yArr, tMin, tMax, numBins):
+    """Decimate data to at most two points per bin: the min and max value in that bin
+
+    Inputs:
+    - tArr: times, in increasing order (numpy array)
+    - yArr: values (numpy array)
+    - tMin, tMax: time range to divide into bins
+    - numBins: number of bins (e.g. the width of the axis in pixels)
+
+    Returns (tArr, yArr) as new numpy arrays. The min and max of each bin are reported
+    at the time of the first and last point in the bin, in the order that preserves the trend
+    within the bin. NaN values propagate to their bin, so gaps in the data are retained.
+    If there are not many more points than bins then the data is returned undecimated.
+    """
+    numBins = int(numBins)
+    if numBins < 1 or len(tArr) <= 4 * numBins or tMax <= tMin:
+        return numpy.array(tArr), numpy.array(yArr)
+    binInd = ((tArr - tMin) * (numBins / float(tMax - tMin))).astype(int)
+    startInds = numpy.concatenate(([0], numpy.flatnonzero(numpy.diff(binInd)) + 1))
+    endInds = numpy.concatenate((startInds[1:], [len(tArr)])) - 1
+    minArr = numpy.minimum.reduceat(yArr, startInds)
+    maxArr = numpy.maximum.reduceat(yArr, startInds)
+    with numpy.errstate(invalid="ignore"):
+        isRising = yArr[startInds] <= yArr[endInds]
+    outTArr = numpy.empty(2 * len(startInds), dtype=float)
+    outYArr = numpy.empty(2 * len(startInds), dtype=float)
+    outTArr[0::2] = tArr[startInds]
+    outTArr[1::2] = tArr[endInds]
+    outYArr[0::2] = numpy.where(isRising, minArr, maxArr)
+    outYArr[1::2] = numpy.where(isRising, maxArr, minArr)
+    return outTArr, outYArr
+
+
 class StripChartWdg(RO.Wdg.StripChartWdg.StripChartWdg):
-    def plotKeyVar(self, subplotInd, keyVar, keyInd=0, func=None, **kargs):
+    def __init__(self, master, frameInterval=0.25, **kargs):
+        """Construct a StripChartWdg
+
+        Inputs:
+        - master: Tk parent widget
+        - frameInterval: minimum interval between redraws due to new data (sec)
+        **kargs: keyword arguments for RO.Wdg.StripChartWdg.StripChartWdg, such as timeRange
+        """
+        self.frameInterval = float(frameInterval)
+        self._dirtyLines = set() # lines whose data has changed since the last frame
+        self._frameTimer = RO.TkUtil.Timer()
+        RO.Wdg.StripChartWdg.StripChartWdg.__init__(self, master, **kargs)
+
+    def addLine(self, subplotInd=0, **kargs):
+        """Add a new quantity to plot; add data by calling addPoint on the returned line
+
+        Inputs:
+        - subplotInd: index of subplot
+        **kargs: keyword arguments for the matplotlib Line2D constructor;
+            see RO.Wdg.StripChartWdg.StripChartWdg.addLine for more information
+        """
+        return _SeriesLine(
+            subplot = self.subplotArr[subplotInd],
+            cnvTimeFunc = self._cnvTimeFunc,
+            wdg = self,
+            series = TUI.Base.TimeSeriesStore.TimeSeries(),
+            canAddPoints = True,
+        **kargs)
+
+    def plotKeyVar(self, subplotInd, keyVar, keyInd=0, func=None, useHistory=True, **kargs):
         """Plot one value of one keyVar
-        
+
         Inputs:
         - subplotInd: index of line on Subplot
         - keyVar: keyword variable to plot
         - keyInd: index of keyword variable to plot
-        - func: function to transform the value; note that func will never receive None;
+        - func: function to transform the value; it receives a float (a PVT is converted to its position)
+            and should return a float or None (to omit the point);
             if func is None then the data is not transformed
+        - useHistory: if True then show data recorded before this line was created
+            (as far back as the time range); set False if func depends on the current state of other keyVars
         **kargs: keyword arguments for StripChartWdg.addLine
         """
-        line = self.addLine(subplotInd=subplotInd, **kargs)
-        
+        series = TUI.Base.TimeSeriesStore.getStore().getSeries(keyVar, keyInd)
+        return _SeriesLine(
+            subplot = self.subplotArr[subplotInd],
+            cnvTimeFunc = self._cnvTimeFunc,
+            wdg = self,
+            series = series,
+            func = func,
+            minTime = None if useHistory else time.time(),
+        **kargs)
+
+    def removeLine(self, line):
+        """Remove an existing line added by addLine, addConstantLine or plotKeyVar
+
+        Raise an exception if the line is not found
+        """
+        if isinstance(line, _SeriesLine):
+            line._disconnect()
+            self._dirtyLines.discard(line)
+        RO.Wdg.StripChartWdg.StripChartWdg.removeLine(self, line)
+
+    def _drawFrame(self):
+        """Update the data of lines that have changed and draw them
+        """
+        if not self._isVisible:
+            return
+        dirtyLines = self._dirtyLines
+        self._dirtyLines = set()
+
+        dirtySubplots = []
+        doRescale = False
+        for line in dirtyLines:
+            line._updateData()
+            if line.subplot not in dirtySubplots:
+                dirtySubplots.append(line.subplot)
+            if not doRescale and line.subplot.get_autoscaley_on():
+                doRescale = not line._isInYLimits()
+
+        if doRescale:
+            for subplot in dirtySubplots:
+                if subplot.get_autoscaley_on():
+                    subplot.relim()
+                    subplot.autoscale_view(scalex=False, scaley=True)
+            self.canvas.draw() # the resulting draw event draws all lines
+            return
+
+        for subplot in dirtySubplots:
+            if not subplot._scwBackground:
+                continue
+            self.canvas.restore_region(subplot._scwBackground)
+            for line in subplot._scwLines:
+                subplot.draw_artist(line.line2d)
+            self.canvas.blit(subplot.bbox)
+
+    def _lineChanged(self, line):
+        """Note that the data for a line has changed; it will be drawn at the next frame
+        """
+        self._dirtyLines.add(line)
+        if self._isVisible and not self._frameTimer.isActive:
+            self._frameTimer.start(self.frameInterval, self._drawFrame)
+
+    def _updateTimeAxis(self):
+        """Update the time axis; calls itself
+        """
+        if self._isVisible or self._isFirst:
+            # the whole canvas is about to be redrawn, so update all lines
+            self._frameTimer.cancel()
+            self._dirtyLines = set()
+            for subplot in self.subplotArr:
+                for line in subplot._scwLines:
+                    line._updateData()
+        RO.Wdg.StripChartWdg.StripChartWdg._updateTimeAxis(self)
+
+
+class _SeriesLine(RO.Wdg.StripChartWdg._Line):
+    """A strip chart line that displays data from a TUI.Base.TimeSeriesStore.TimeSeries
+    """
+    def __init__(self, subplot, cnvTimeFunc, wdg, series, func=None, minTime=None, canAddPoints=False, **kargs):
+        """Create a line
+
+        Inputs:
+        - subplot: the matplotlib Subplot instance displaying this line
+        - cnvTimeFunc: a function that takes a POSIX timestamp and returns matplotlib days
+        - wdg: parent strip chart widget
+        - series: the TimeSeries to display
+        - func: function to transform each value, or None if no transformation wanted
+        - minTime: ignore data earlier than this (POSIX timestamp); None to show all history
+        - canAddPoints: if True then addPoint adds data to the series (which should belong to this line)
+        - **kargs: keyword arguments for matplotlib Line2D, such as color
+        """
+        RO.Wdg.StripChartWdg._Line.__init__(self, subplot=subplot, cnvTimeFunc=cnvTimeFunc, wdg=wdg, **kargs)
+        # displayed data is held in numpy arrays (set by _updateData), not the lists used by the base class
+        self._tList = numpy.zeros(0, dtype=float)
+        self._yList = numpy.zeros(0, dtype=float)
+        self.series = series
+        self._func = func
+        self._minTime = minTime
+        self._canAddPoints = bool(canAddPoints)
         if func is None:
-            func = lambda x: x
-        
-        def callFunc(keyVar, line=line, keyInd=keyInd, func=func):
-            if not keyVar.isCurrent or not keyVar.isGenuine:
-                return
-            val = keyVar[keyInd]
-            if val is None:
-                return
-            line.addPoint(func(val))
-        
-        keyVar.addCallback(callFunc, callNow=False)
-        return line
+            self._dataSeries = series
+        else:
+            # transformed values, computed once per point
+            self._dataSeries = TUI.Base.TimeSeriesStore.TimeSeries(maxPoints=series.maxPoints)
+            for t, y in zip(*series.getData(minTime)):
+                self._appendTransformed(t, y)
+        series.addCallback(self._seriesCallback, callNow=False)
+        self._wdg._lineChanged(self)
+
+    def addPoint(self, y, t=None):
+        """Append a new data point (only supported for lines created by addLine)
+
+        Inputs:
+        - y: y value; if None the point is silently ignored
+        - t: time as a POSIX timestamp (e.g. time.time()); if None then "now"
+        """
+        if not self._canAddPoints:
+            raise RuntimeError("Cannot add points to a line created by plotKeyVar")
+        if y is None:
+            return
+        if t is None:
+            t = time.time()
+        self.series.append(t, y)
+
+    def clear(self):
+        """Clear all data (data received from now on will be shown)
+        """
+        self._minTime = time.time()
+        if self._func is not None:
+            self._dataSeries.clear()
+        self._wdg._lineChanged(self)
+
+    def _appendTransformed(self, t, y):
+        """Transform a value and append it to the data series, unless the transformed value is None
+        """
+        y = self._func(y)
+        if y is None:
+            return
+        self._dataSeries.append(t, y)
+
+    def _disconnect(self):
+        """Stop receiving data from the series
+        """
+        self.series.removeCallback(self._seriesCallback, doRaise=False)
+
+    def _isInYLimits(self):
+        """Return True if all displayed finite data is within the y limits of the subplot
+        """
+        yArr = self._yList[numpy.isfinite(self._yList)]
+        if len(yArr) == 0:
+            return True
+        yMin, yMax = sorted(self.subplot.get_ylim())
+        return yMin <= yArr.min() and yArr.max() <= yMax
+
+    def _purgeOldData(self, minMplDays):
+        """Do nothing; data older than the time range is omitted by _updateData
+
+        This override is required: the base class version tests "if not self._tList",
+        which raises ValueError for a numpy array.
+        """
+        pass
+
+    def _seriesCallback(self, series):
+        """Called when a point is added to the series (or it is cleared)
+        """
+        if self._func is not None:
+            t, y = series.getLast()
+            if t is None:
+                self._dataSeries.clear()
+            elif self._minTime is None or t >= self._minTime:
+                self._appendTransformed(t, y)
+        self._wdg._lineChanged(self)
+
+    def _updateData(self):
+        """Update the displayed data from the data series, decimated to the width of the subplot
+        """
+        tMax = time.time() + self._wdg.updateInterval
+        tMin = tMax - self._wdg._timeRange
+        minTime = tMin
+        if self._minTime is not None:
+            minTime = max(minTime, self._minTime)
+        tArr, yArr = self._dataSeries.getData(minTime)
+        tArr, yArr = decimateMinMax(tArr, yArr, tMin=tMin, tMax=tMax, numBins=self.subplot.bbox.width)
+        self._tList = self._cnvTimeFunc(tArr)
+        self._yList = yArr
+        self.line2d.set_data(self._tList, self._yList)
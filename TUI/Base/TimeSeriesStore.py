@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""A shared store of the recent history of keyword values, for strip charts
+
+Each recorded value is identified by (actor, keyword name, value index) and is recorded once,
+no matter how many strip charts show it. Values are stored as floats in a ring buffer of
+POSIX timestamps and values (see TimeSeries); PVTs are stored as their position at the time
+the keyword is received.
+
+The ring buffer holds the most recent points at full rate. Older points are retained in decimated form:
+the minimum and maximum of each longTermInterval, for up to longTermMaxPoints points
+(a week, by default), so a strip chart with a long time range shows the whole range,
+whatever the rate at which the keyword is output.
+
+Keywords in StdKeyList are recorded from startup (see TUI.BackgroundTasks),
+so strip chart windows that are opened late can still show recent history.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          TimeSeries retains decimated long-term data (by default a week's worth),
+                    so a long time range is not limited to the last maxPoints points.
+"""
+import time
+
+import numpy
+import RO.AddCallback
+import TUI.Models
+
+__all__ = ["TimeSeries", "TimeSeriesStore", "getStore", "StdKeyList"]
+
+# default maximum number of points retained at full rate by a TimeSeries
+DefaultMaxPoints = 20000
+# default interval of the decimated long-term data of a TimeSeries (sec)
+DefaultLongTermInterval = 60.0
+# default maximum number of decimated long-term points retained by a TimeSeries
+# (2 points per interval for one week)
+DefaultLongTermMaxPoints = 2 * int(7 * 24 * 3600 / DefaultLongTermInterval)
+
+# values that are recorded from startup: (actor, keyword name, value index);
+# these are the values plotted by the strip charts in TUI.Inst.GuideMonitor
+StdKeyList = (
+    ("boss", "SP1SecondaryDewarPress", 0),
+    ("boss", "SP2SecondaryDewarPress", 0),
+    ("boss", "SP1R0CCDTempRead", 0),
+    ("boss", "SP1B2CCDTempRead", 0),
+    ("boss", "SP2R0CCDTempRead", 0),
+    ("boss", "SP2B2CCDTempRead", 0),
+    ("guider", "axisChange", 0),
+    ("guider", "axisChange", 1),
+    ("guider", "axisChange", 2),
+    ("guider", "axisError", 0),
+    ("guider", "axisError", 1),
+    ("guider", "axisError", 2),
+    ("guider", "focusChange", 0),
+    ("guider", "focusError", 0),
+    ("guider", "fwhm", 1),
+    ("guider", "scaleChange", 0),
+    ("guider", "scaleError", 0),
+    ("guider", "seeing", 0),
+    ("tcc", "guideOff", 2),
+    ("tcc", "objArcOff", 0),
+    ("tcc", "objArcOff", 1),
+    ("tcc", "scaleFac", 0),
+    ("tcc", "secFocus", 0),
+)
+
+class TimeSeries(RO.AddCallback.BaseMixin):
+    """A ring buffer of (POSIX timestamp, value) points, plus decimated long-term data
+
+    The buffer starts small and grows as needed, up to maxPoints; after that the oldest points are discarded.
+    Data is held twice, so that the most recent points are always available as contiguous numpy views.
+    Points must be added in order of increasing time.
+
+    If longTermInterval is not None then every point is also decimated into a second, long-term TimeSeries:
+    for each longTermInterval the points with the minimum and maximum value are retained.
+    getData returns long-term points for times earlier than the oldest full-rate point.
+
+    Callback functions are called (with this TimeSeries as the only argument) whenever a point is added
+    or the data is cleared.
+    """
+    def __init__(self,
+        maxPoints = DefaultMaxPoints,
+        initialSize = 256,
+        longTermInterval = DefaultLongTermInterval,
+        longTermMaxPoints = DefaultLongTermMaxPoints,
+    ):
+        """Create a TimeSeries
+
+        Inputs:
+        - maxPoints: maximum number of points to retain at full rate
+        - initialSize: initial capacity (number of points); grows as needed
+        - longTermInterval: interval for decimated long-term data (sec); None for no long-term data
+        - longTermMaxPoints: maximum number of decimated long-term points to retain
+        """
+        RO.AddCallback.BaseMixin.__init__(self)
+        self.maxPoints = int(maxPoints)
+        if self.maxPoints < 1:
+            raise RuntimeError("maxPoints=%s must be positive" % (maxPoints,))
+        self._allocate(min(int(initialSize), self.maxPoints))
+        if longTermInterval is None:
+            self.longTermInterval = None
+            self._longTermSeries = None
+        else:
+            self.longTermInterval = float(longTermInterval)
+            if self.longTermInterval <= 0:
+                raise RuntimeError("longTermInterval=%s must be positive" % (longTermInterval,))
+            self._longTermSeries = TimeSeries(
+                maxPoints = longTermMaxPoints,
+                initialSize = initialSize,
+                longTermInterval = None,
+            )
+        self._clearBin()
+
+    def append(self, t, y):
+        """Add a point
+
+        Inputs:
+        - t: time as a POSIX timestamp (e.g. time.time())
+        - y: value (a float)
+        """
+        if self._numPoints == self._size and self._size < self.maxPoints:
+            self._grow()
+        ind = self._endInd
+        self._tArr[ind] = self._tArr[ind + self._size] = t
+        self._yArr[ind] = self._yArr[ind + self._size] = y
+        self._endInd = (ind + 1) % self._size
+        self._numPoints = min(self._numPoints + 1, self._size)
+        if self._longTermSeries is not None:
+            self._binPoint(t, y)
+        self._doCallbacks()
+
+    def clear(self):
+        """Discard all data
+        """
+        self._endInd = 0
+        self._numPoints = 0
+        if self._longTermSeries is not None:
+            self._longTermSeries.clear()
+            self._clearBin()
+        self._doCallbacks()
+
+    def getData(self, minTime=None):
+        """Return (times, values) as numpy arrays, oldest first
+
+        Inputs:
+        - minTime: omit points whose time is earlier than this (POSIX timestamp); None to return all points
+
+        Points earlier than the oldest full-rate point are decimated long-term points.
+        The arrays may be views of internal data: do not modify them and do not retain them
+        (they are changed when points are added).
+        """
+        endInd = self._endInd + self._size
+        startInd = endInd - self._numPoints
+        tArr = self._tArr[startInd:endInd]
+        yArr = self._yArr[startInd:endInd]
+        if minTime is not None and self._numPoints > 0 and tArr[0] < minTime:
+            ind = numpy.searchsorted(tArr, minTime)
+            tArr = tArr[ind:]
+            yArr = yArr[ind:]
+        elif self._longTermSeries is not None and len(self._longTermSeries) > 0:
+            ltTArr, ltYArr = self._longTermSeries.getData(minTime)
+            if self._numPoints > 0:
+                numOlder = numpy.searchsorted(ltTArr, tArr[0])
+                ltTArr = ltTArr[0:numOlder]
+                ltYArr = ltYArr[0:numOlder]
+            if len(ltTArr) > 0:
+                tArr = numpy.concatenate((ltTArr, tArr))
+                yArr = numpy.concatenate((ltYArr, yArr))
+        return tArr, yArr
+
+    def getLast(self):
+        """Return the most recent point as (time, value), or (None, None) if no data
+        """
+        if self._numPoints == 0:
+            return (None, None)
+        ind = self._endInd + self._size - 1
+        return (self._tArr[ind], self._yArr[ind])
+
+    def __len__(self):
+        return self._numPoints
+
+    def _binPoint(self, t, y):
+        """Add a point to the current long-term bin, first saving the previous bin if t is in a new bin
+        """
+        binNum = int(t // self.longTermInterval)
+        if binNum != self._binNum:
+            self._saveBin()
+            self._binNum = binNum
+            self._binMinPt = self._binMaxPt = (t, y)
+        elif y < self._binMinPt[1]:
+            self._binMinPt = (t, y)
+        elif y > self._binMaxPt[1]:
+            self._binMaxPt = (t, y)
+
+    def _clearBin(self):
+        """Discard the current long-term bin
+        """
+        self._binNum = None
+        self._binMinPt = None # (t, y) of minimum value in current bin
+        self._binMaxPt = None # (t, y) of maximum value in current bin
+
+    def _saveBin(self):
+        """Append the minimum and maximum points of the current long-term bin (if any) to the long-term series
+        """
+        if self._binNum is None:
+            return
+        for t, y in sorted(set((self._binMinPt, self._binMaxPt))):
+            self._longTermSeries.append(t, y)
+
+    def _allocate(self, size):
+        """Allocate empty buffers with room for size points
+        """
+        self._size = size
+        self._tArr = numpy.zeros(2 * size, dtype=float)
+        self._yArr = numpy.zeros(2 * size, dtype=float)
+        self._endInd = 0 # index of next point to write, in range [0, size)
+        self._numPoints = 0
+
+    def _grow(self):
+        """Double the capacity (up to maxPoints), retaining the data
+        """
+        tArr, yArr = [numpy.array(arr) for arr in self.getData()]
+        numPoints = len(tArr)
+        self._allocate(min(2 * self._size, self.maxPoints))
+        for newArr, oldArr in ((self._tArr, tArr), (self._yArr, yArr)):
+            newArr[0:numPoints] = oldArr
+            newArr[self._size:self._size + numPoints] = oldArr
+        self._endInd = numPoints % self._size
+        self._numPoints = numPoints
+
+
+class TimeSeriesStore(object):
+    """A store of TimeSeries, one per recorded keyword value
+    """
+    def __init__(self, maxPoints=DefaultMaxPoints):
+        """Create a TimeSeriesStore
+
+        Inputs:
+        - maxPoints: maximum number of points retained for each value
+        """
+        self.maxPoints = int(maxPoints)
+        self._seriesDict = dict() # dict of (actor, keyword name, value index): TimeSeries
+
+    def getSeries(self, keyVar, keyInd=0):
+        """Return the TimeSeries for one value of a keyVar, starting to record it if necessary
+
+        Inputs:
+        - keyVar: keyword variable
+        - keyInd: index of value
+        """
+        key = (keyVar.actor, keyVar.name, keyInd)
+        series = self._seriesDict.get(key)
+        if series is None:
+            series = TimeSeries(maxPoints=self.maxPoints)
+            self._seriesDict[key] = series
+
+            def callFunc(keyVar, series=series, keyInd=keyInd):
+                if not keyVar.isCurrent or not keyVar.isGenuine:
+                    return
+                val = keyVar[keyInd]
+                if hasattr(val, "getPos"):
+                    # a PVT
+                    val = val.getPos()
+                if val is None:
+                    return
+                series.append(time.time(), float(val))
+
+            keyVar.addCallback(callFunc, callNow=False)
+        return series
+
+    def recordKeys(self, keyList):
+        """Start recording the specified values
+
+        Inputs:
+        - keyList: a collection of (actor, keyword name, value index)
+        """
+        for actor, keyName, keyInd in keyList:
+            keyVar = getattr(TUI.Models.getModel(actor), keyName)
+            self.getSeries(keyVar, keyInd)
+
+
+_theStore = None
+
+def getStore():
+    """Return the shared TimeSeriesStore
+    """
+    global _theStore
+    if _theStore is None:
+        _theStore = TimeSeriesStore()
+    return _theStore
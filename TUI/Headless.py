@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""Support for running TUI without Tk, e.g. to benchmark keyword dispatching and scripts
+on a host that has no display.
+
+To run headless, set environment variable TUI_HEADLESS to a value other than "" or "0",
+or call setHeadless() before the TUI model is created. In headless mode:
+- The TUI model (TUI.Models.getModel("tui")) does not create a Tk root or install twisted's Tk support,
+  and RO.Comm.Generic uses the twisted framework. Run the event loop with tuiModel.reactor.run().
+- tuiModel.tkRoot is a NullTkRoot: after, after_idle and after_cancel use the twisted reactor
+  and all other widget methods do nothing.
+- tuiModel.tlSet is a TUI.Base.DeferredToplevelSet.NullToplevelSet: window modules are registered
+  (so their names are known) but are never loaded, and no windows are created.
+- tuiModel.prefs only contains preferences that do not need Tk (no fonts, colors or sounds)
+  and they have their default values, so results do not depend on the user's preferences.
+- Sounds are not played.
+The models, LogSource, the dispatcher and script runners work as usual;
+a script runner that needs a master widget can use tuiModel.tkRoot.
+
+This module must only import from the standard library, because it is used
+before Tk and twisted are set up.
+
+History:
+2026-10-18          Initial version.
+"""
+import os
+
+__all__ = ["isHeadless", "setHeadless", "NullWdg", "NullTkRoot"]
+
+HeadlessEnvVar = "TUI_HEADLESS"
+
+_isHeadless = os.environ.get(HeadlessEnvVar, "") not in ("", "0")
+
+def isHeadless():
+    """Return True if TUI is running (or will run) without Tk
+    """
+    return _isHeadless
+
+def setHeadless(headless=True):
+    """Specify whether TUI should run without Tk
+
+    Must be called before the TUI model is created.
+    """
+    global _isHeadless
+    _isHeadless = bool(headless)
+
+def _nullFunc(*args, **kargs):
+    """Do nothing
+    """
+    return None
+
+
+class NullWdg(object):
+    """A stand-in for a Tk widget: every public method exists and does nothing
+    """
+    def __init__(self, master=None, *args, **kargs):
+        self.master = master
+
+    def winfo_exists(self):
+        return True
+
+    def winfo_toplevel(self):
+        return self
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _nullFunc
+
+
+class NullTkRoot(NullWdg):
+    """A stand-in for the Tk root whose timer methods use the twisted reactor
+    """
+    def __init__(self, reactor):
+        """Create a NullTkRoot
+
+        Inputs:
+        - reactor: twisted reactor
+        """
+        NullWdg.__init__(self)
+        self.reactor = reactor
+        self._callDict = {} # dict of ID: twisted DelayedCall
+        self._nextID = 0
+
+    def after(self, ms, func=None, *args):
+        """Call func(*args) after ms milliseconds and return an ID for after_cancel
+
+        Unlike Tk, func is required.
+        """
+        if func is None:
+            raise RuntimeError("func is required")
+        self._nextID += 1
+        afterID = "after#%d" % (self._nextID,)
+        self._callDict[afterID] = self.reactor.callLater(max(0, ms) / 1000.0, self._doCall, afterID, func, args)
+        return afterID
+
+    def after_idle(self, func, *args):
+        """Call func(*args) as soon as possible and return an ID for after_cancel
+        """
+        return self.after(0, func, *args)
+
+    def after_cancel(self, afterID):
+        """Cancel a call scheduled by after or after_idle; ignored if already called or cancelled
+        """
+        delayedCall = self._callDict.pop(afterID, None)
+        if delayedCall is not None and delayedCall.active():
+            delayedCall.cancel()
+
+    def _doCall(self, afterID, func, args):
+        self._callDict.pop(afterID, None)
+        func(*args)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+"""Guider focus analysis for a sequence of gproc images
+
+FocusHistory holds the guide probe focus offset and FWHM of many consecutive images
+in 2-d numpy arrays (one row per image, one column per guide probe), so focus fits
+for all images (and rolling fits over several images) are computed in one vectorized pass.
+
+The fit is a line to rms^2 - C focusOffset^2 vs. focusOffset, where rms is the star rms size (um)
+and C depends on the focal ratio; see FocusPlotWdg for the history of this model.
+
+This module does not use Tk.
+
+History:
+2026-10-18          Initial version, extracted from FocusPlotWdg.fitFocus and vectorized.
+"""
+import numpy
+
+__all__ = ["FocusFit", "FocusHistory"]
+
+FocalRatio = 5.0
+_C = 5.0 / (32.0 * FocalRatio**2)
+_FWHMPerRMS = 2.35
+
+def micronsPerArcSecFromPlateScale(plateScale):
+    """Return microns per arcsec, given plate scale (mm/deg)
+    """
+    return plateScale * 1.0e3 / 3600.0
+
+
+class FocusFit(object):
+    """The results of one or more focus fits, as numpy arrays with one element per fit
+
+    Fields:
+    - slopeArr, interceptArr: coefficients of the fit of rms^2 - C focusOffset^2 (um^2) vs. focusOffset (um)
+    - numPointsArr: number of data points used by each fit
+    - minFocusOffsetArr, maxFocusOffsetArr: range of focus offset of the data points (um)
+    - micronsPerArcSecArr: scale used to convert rms (um) to FWHM (arcsec)
+    - isValidArr: True for each fit that succeeded
+    """
+    def __init__(self, slopeArr, interceptArr, numPointsArr, minFocusOffsetArr, maxFocusOffsetArr, micronsPerArcSecArr):
+        self.slopeArr = slopeArr
+        self.interceptArr = interceptArr
+        self.numPointsArr = numPointsArr
+        self.minFocusOffsetArr = minFocusOffsetArr
+        self.maxFocusOffsetArr = maxFocusOffsetArr
+        self.micronsPerArcSecArr = micronsPerArcSecArr
+        with numpy.errstate(invalid="ignore"):
+            self.isValidArr = (numPointsArr >= 2) & (maxFocusOffsetArr > minFocusOffsetArr) \
+                & numpy.isfinite(slopeArr) & numpy.isfinite(interceptArr) & numpy.isfinite(micronsPerArcSecArr)
+
+    @property
+    def bestFocusOffsetArr(self):
+        """Return the focus offset (um) at which the fit FWHM is smallest; NaN if the fit failed
+        """
+        return numpy.where(self.isValidArr, -self.slopeArr / (2.0 * _C), numpy.nan)
+
+    @property
+    def minFWHMArr(self):
+        """Return the smallest fit FWHM (arcsec); NaN if the fit failed or has no real minimum
+        """
+        minRMSSqArr = self.interceptArr - (self.slopeArr**2 / (4.0 * _C))
+        with numpy.errstate(invalid="ignore"):
+            return numpy.where(self.isValidArr & (minRMSSqArr >= 0),
+                numpy.sqrt(numpy.abs(minRMSSqArr)) * (_FWHMPerRMS / self.micronsPerArcSecArr), numpy.nan)
+
+    def getCurve(self, ind, nPoints=50):
+        """Return (focusOffsetArr, fwhmArr) for one fit, over the range of its data, or None if the fit failed
+
+        Inputs:
+        - ind: index of fit
+        - nPoints: number of points in the returned arrays
+        """
+        if not self.isValidArr[ind]:
+            return None
+        focusOffsetArr = numpy.linspace(self.minFocusOffsetArr[ind], self.maxFocusOffsetArr[ind], nPoints)
+        rmsSqArr = (focusOffsetArr * self.slopeArr[ind]) + self.interceptArr[ind] + (_C * focusOffsetArr**2)
+        with numpy.errstate(invalid="ignore"):
+            fwhmArr = numpy.sqrt(rmsSqArr) * (_FWHMPerRMS / self.micronsPerArcSecArr[ind])
+        return focusOffsetArr, fwhmArr
+
+    def getErrMsg(self, ind):
+        """Return a message explaining why one fit failed, or None if it succeeded
+        """
+        if self.isValidArr[ind]:
+            return None
+        if not numpy.isfinite(self.micronsPerArcSecArr[ind]):
+            return "plate scale unknown"
+        if self.numPointsArr[ind] < 2:
+            return "too few data points"
+        if not self.maxFocusOffsetArr[ind] > self.minFocusOffsetArr[ind]:
+            return "no focus offset range"
+        return "fit failed"
+
+    def __len__(self):
+        return len(self.slopeArr)
+
+
+class FocusHistory(object):
+    """Guide probe focus data for a sequence of images
+
+    Fields (each has one row per image, oldest first):
+    - imageNames: list of image names
+    - focusOffsetArr: focus offset of each guide probe (um); a 2-d array
+    - fwhmArr: FWHM of each guide probe (arcsec); a 2-d array
+    - isGoodArr: True if the guide probe exists, is enabled and the values are finite; a 2-d array
+    - micronsPerArcSecArr: scale of each image (um/arcsec); NaN if unknown
+    - seeingArr: seeing of each image (arcsec); NaN if unknown
+    """
+    def __init__(self, maxImages=500):
+        """Create a FocusHistory
+
+        Inputs:
+        - maxImages: maximum number of images; when exceeded the oldest image is discarded
+        """
+        self.maxImages = int(maxImages)
+        self.clear()
+
+    def addImage(self, imageName, probeArr, plateScale, seeing=numpy.nan):
+        """Add data for an image
+
+        Inputs:
+        - imageName: name of image
+        - probeArr: guide probe table (see GuideImage.readProbeTable)
+        - plateScale: plate scale (mm/deg), or NaN if unknown
+        - seeing: seeing (arcsec), or NaN if unknown
+
+        If the image is already present then its data is replaced.
+        """
+        ind = self.findName(imageName)
+        if ind is None:
+            if self.numImages >= self.maxImages:
+                self._discardOldest()
+            ind = self.numImages
+            self.numImages += 1
+            self.imageNames.append(imageName)
+        numProbes = len(probeArr)
+        if numProbes > self._focusOffsetArr.shape[1]:
+            self._addProbeColumns(numProbes - self._focusOffsetArr.shape[1])
+
+        focusOffsetArr = numpy.asarray(probeArr["focusOffset"], dtype=float)
+        fwhmArr = numpy.asarray(probeArr["fwhm"], dtype=float)
+        self._focusOffsetArr[ind] = numpy.nan
+        self._fwhmArr[ind] = numpy.nan
+        self._isGoodArr[ind] = False
+        self._focusOffsetArr[ind, 0:numProbes] = focusOffsetArr
+        self._fwhmArr[ind, 0:numProbes] = fwhmArr
+        self._isGoodArr[ind, 0:numProbes] = probeArr["exists"] & probeArr["enabled"] \
+            & numpy.isfinite(fwhmArr) & numpy.isfinite(focusOffsetArr)
+        self._micronsPerArcSecArr[ind] = micronsPerArcSecFromPlateScale(float(plateScale))
+        self._seeingArr[ind] = float(seeing)
+
+    def clear(self):
+        """Discard all data
+        """
+        self.imageNames = []
+        self.numImages = 0
+        self._focusOffsetArr = numpy.zeros((self.maxImages, 0), dtype=float)
+        self._fwhmArr = numpy.zeros((self.maxImages, 0), dtype=float)
+        self._isGoodArr = numpy.zeros((self.maxImages, 0), dtype=bool)
+        self._micronsPerArcSecArr = numpy.zeros(self.maxImages, dtype=float)
+        self._seeingArr = numpy.zeros(self.maxImages, dtype=float)
+
+    def findName(self, imageName):
+        """Return the index of the named image, or None if not present
+        """
+        try:
+            return self.imageNames.index(imageName)
+        except ValueError:
+            return None
+
+    @property
+    def focusOffsetArr(self):
+        return self._focusOffsetArr[0:self.numImages]
+
+    @property
+    def fwhmArr(self):
+        return self._fwhmArr[0:self.numImages]
+
+    @property
+    def isGoodArr(self):
+        return self._isGoodArr[0:self.numImages]
+
+    @property
+    def micronsPerArcSecArr(self):
+        return self._micronsPerArcSecArr[0:self.numImages]
+
+    @property
+    def seeingArr(self):
+        return self._seeingArr[0:self.numImages]
+
+    def fitEach(self):
+        """Fit the focus data of each image separately; return a FocusFit with one fit per image
+        """
+        return self.fitRolling(1)
+
+    def fitRolling(self, numImages):
+        """Fit the focus data of numImages consecutive images at a time
+
+        Returns a FocusFit with one fit per image, where fit i uses the data from image i
+        and the numImages - 1 images before it (or as many as are available).
+        The data of each image is converted to um using its own scale;
+        fit i uses the scale of image i to convert back to arcsec.
+        """
+        numImages = max(1, int(numImages))
+        # ignore the data of images whose scale is unknown
+        isGoodArr = self.isGoodArr & numpy.isfinite(self.micronsPerArcSecArr)[:, numpy.newaxis]
+        focusOffsetArr = numpy.where(isGoodArr, self.focusOffsetArr, 0.0)
+        rmsArr = numpy.where(isGoodArr, self.fwhmArr, 0.0) * (self.micronsPerArcSecArr / _FWHMPerRMS)[:, numpy.newaxis]
+        yArr = numpy.where(isGoodArr, rmsArr**2 - (_C * focusOffsetArr**2), 0.0)
+        with numpy.errstate(invalid="ignore"):
+            minFocusOffsetArr = numpy.where(isGoodArr, focusOffsetArr, numpy.inf).min(axis=1) \
+                if isGoodArr.shape[1] > 0 else numpy.zeros(self.numImages) + numpy.inf
+            maxFocusOffsetArr = numpy.where(isGoodArr, focusOffsetArr, -numpy.inf).max(axis=1) \
+                if isGoodArr.shape[1] > 0 else numpy.zeros(self.numImages) - numpy.inf
+
+        # sums for a linear least squares fit of y vs. focus offset, per image
+        sumArr = numpy.column_stack((
+            isGoodArr.sum(axis=1),
+            focusOffsetArr.sum(axis=1),
+            yArr.sum(axis=1),
+            (focusOffsetArr**2).sum(axis=1),
+            (focusOffsetArr * yArr).sum(axis=1),
+        )).astype(float)
+        if numImages > 1:
+            # sum over a window of images using cumulative sums, and find the focus offset range of each window
+            cumSumArr = numpy.vstack((numpy.zeros((1, 5)), numpy.cumsum(sumArr, axis=0)))
+            endInds = numpy.arange(1, self.numImages + 1)
+            sumArr = cumSumArr[endInds] - cumSumArr[numpy.maximum(endInds - numImages, 0)]
+            windowMinArr = minFocusOffsetArr.copy()
+            windowMaxArr = maxFocusOffsetArr.copy()
+            for shift in range(1, min(numImages, self.numImages)):
+                windowMinArr[shift:] = numpy.minimum(windowMinArr[shift:], minFocusOffsetArr[:-shift])
+                windowMaxArr[shift:] = numpy.maximum(windowMaxArr[shift:], maxFocusOffsetArr[:-shift])
+            minFocusOffsetArr = windowMinArr
+            maxFocusOffsetArr = windowMaxArr
+
+        numPointsArr, sumXArr, sumYArr, sumXXArr, sumXYArr = sumArr.T
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            denomArr = (numPointsArr * sumXXArr) - sumXArr**2
+            slopeArr = ((numPointsArr * sumXYArr) - (sumXArr * sumYArr)) / denomArr
+            interceptArr = (sumYArr - (slopeArr * sumXArr)) / numPointsArr
+        return FocusFit(
+            slopeArr = slopeArr,
+            interceptArr = interceptArr,
+            numPointsArr = numPointsArr.astype(int),
+            minFocusOffsetArr = minFocusOffsetArr,
+            maxFocusOffsetArr = maxFocusOffsetArr,
+            micronsPerArcSecArr = self.micronsPerArcSecArr.copy(),
+        )
+
+    def __len__(self):
+        return self.numImages
+
+    def _addProbeColumns(self, numNew):
+        """Add columns for more guide probes
+        """
+        self._focusOffsetArr = numpy.hstack((self._focusOffsetArr, numpy.zeros((self.maxImages, numNew)) + numpy.nan))
+        self._fwhmArr = numpy.hstack((self._fwhmArr, numpy.zeros((self.maxImages, numNew)) + numpy.nan))
+        self._isGoodArr = numpy.hstack((self._isGoodArr, numpy.zeros((self.maxImages, numNew), dtype=bool)))
+
+    def _discardOldest(self):
+        """Discard the data for the oldest image
+        """
+        for arr in (self._focusOffsetArr, self._fwhmArr, self._isGoodArr, self._micronsPerArcSecArr, self._seeingArr):
+            arr[0:-1] = arr[1:]
+        del self.imageNames[0]
+        self.numImages -= 1
@@ -12,25 +12,39 @@ History:
 2010-06-28 ROwen    Removed duplicate import (thanks to pychecker).
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
 2015-11-05 ROwen    Modernized "except" syntax.
+2026-10-18          Close the FITS file when done with it (it is now memory-mapped).
+2026-10-18          Keep the guide probe data of recent images (for the current plate) in a
+                    FocusAnalysis.FocusHistory and fit them all in one vectorized pass.
+                    Also show a rolling fit of the last RollingLen images, and a trend plot
+                    of best focus offset for each image and for the rolling fit.
+                    Plot artists are created once and updated in place; the canvas is redrawn
+                    with draw_idle, rather than clearing and redrawing the axes for each image.
+                    fitFocus is replaced by FocusAnalysis.FocusFit.
+                    plot(None) now clears the data for the current image, but not the trend;
+                    clear also discards the focus history.
 """
-import itertools
 import os
 import sys
 import Tkinter
 
 import numpy
 import matplotlib
+import matplotlib.gridspec
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2TkAgg
 
 import RO.Constants
 import RO.StringUtil
 import TUI.Base.Wdg.StatusBar
+import FocusAnalysis
 import GuideImage
 
 _HelpURL = "Instruments/FocusPlotWin.html"
 
 ShowToolbar = False # show matplotlib toolbar on graph?
 
+RollingLen = 10 # number of images in the rolling fit
+_MaxHistLen = 500 # maximum number of images in the focus history
+
 class FocusPlotWdg(Tkinter.Frame):
     def __init__(self,
         master,
@@ -48,87 +62,78 @@ class FocusPlotWdg(Tkinter.Frame):
 
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
-        self.plotAxis = plotFig.add_subplot(1, 1, 1)
+        gridSpec = matplotlib.gridspec.GridSpec(2, 1, height_ratios=[3, 1])
+        self.plotAxis = plotFig.add_subplot(gridSpec[0])
+        self.trendAxis = plotFig.add_subplot(gridSpec[1])
         
         self.statusBar = TUI.Base.Wdg.StatusBar(
             master = self,
             helpURL = _HelpURL,
         )
         self.statusBar.grid(row=1, column=0, sticky="ew")
-        
+
+        self.focusHistory = FocusAnalysis.FocusHistory(maxImages=_MaxHistLen)
+        self.plateID = None # plate ID of the images in focusHistory
+        self.currImageName = None # name of the image whose data is shown, or None
+        self._probeLabelList = [] # probe number annotations; unused ones are hidden
+        self._makePlot()
 
     def plot(self, imObj):
-        """Show plot for a new image; clear if imObj is None or has no plate info.
+        """Add the data for a new image to the focus history and show it;
+        clear the data for the current image if imObj is None or has no plate info.
         """
 #        print "FocusPlotWdg.plot(imObj=%s)" % (imObj,)
-        self.clear()
         if imObj is None:
+            self._showImage(None)
             return
         
         try:
             fitsObj = self.getFITSObj(imObj)
             if fitsObj is None:
+                self._showImage(None)
                 return
         except Exception as e:
             sys.stderr.write("FocusPlotWdg: could not get FITS object: %s\n" % \
                 (RO.StringUtil.strFromException(e),))
+            self._showImage(None)
             return
         try:
-            probeData = fitsObj[6].data        
-            numProbes = len(probeData)
-            isGoodArr = probeData.field("exists") & probeData.field("enabled") & \
-                numpy.isfinite(probeData.field("fwhm"))
-            if len(isGoodArr) == 0:
-                return
-            focusOffsetArr = numpy.extract(isGoodArr, probeData.field("focusOffset"))
-            fwhmArr = numpy.extract(isGoodArr, probeData.field("fwhm"))
-            probeNumberArr = numpy.extract(isGoodArr, numpy.arange(1, numProbes + 1, dtype=int))
+            imHdr = fitsObj[0].header
+            probeArr = GuideImage.readProbeTable(fitsObj)
+            plateScale = _getFloat(imHdr, "PLATSCAL")
+            seeing = _getFloat(imHdr, "SEEING")
+            plateID = imHdr.get("PLATEID")
         except Exception as e:
             sys.stderr.write("FocusPlotWdg could not parse data in image %s: %s\n" % \
                 (imObj.imageName, RO.StringUtil.strFromException(e)))
+            self._showImage(None)
             return
+        finally:
+            fitsObj.close()
 
-        self.plotAxis.plot(focusOffsetArr, fwhmArr, color='black', linestyle="", marker='o', label="probe")
-        
-        # add probe numbers
-        for focusOffset, fwhm, probeNumber in itertools.izip(focusOffsetArr, fwhmArr, probeNumberArr):
-            self.plotAxis.annotate("%s" % (probeNumber,), (focusOffset, fwhm), xytext=(5, -5),
-            textcoords="offset points")
-         
-        # add invisible 0,0 point to force autoscale to include origin
-        self.plotAxis.plot([0.0], [0.0], linestyle="", marker="")
-        
-        # fit data and show the fit
-        fitArrays = self.fitFocus(focusOffsetArr, fwhmArr, fitsObj)
-        if fitArrays is not None:
-            self.plotAxis.plot(fitArrays[0], fitArrays[1], color='blue', linestyle="-", label="best fit")
-
-        # add seeing
-        try:
-            seeingStr = fitsObj[0].header["SEEING"]
-            seeing = float(seeingStr)
-        except Exception:
-            seeing = numpy.nan
-        if numpy.isfinite(seeing):
-            self.plotAxis.plot([0.0], [seeing], linestyle="", marker="x", markersize=12,
-                color="green", markeredgewidth=1, label="seeing")
-            
-        self.plotAxis.set_title(imObj.imageName)
-        
-        legend = self.plotAxis.legend(loc=4, numpoints=1)
-        legend.draw_frame(False)
-
-        self.figCanvas.draw()
+        if plateID is not None and plateID != self.plateID:
+            # a new plate; start a new focus history
+            self.focusHistory.clear()
+            self.plateID = plateID
+        self.focusHistory.addImage(imObj.imageName, probeArr, plateScale=plateScale, seeing=seeing)
+        self._showImage(imObj.imageName)
     
     def getFITSObj(self, imObj):
         """Get pyfits fits object, or None if the file is not a usable version of a GPROC file
+
+        The caller must close the returned object.
         """
         fitsObj = imObj.getFITSObj()
+        if fitsObj is None:
+            self.statusBar.setMsg("Could not read image: %s" % (imObj.getStateStr(),),
+                severity = RO.Constants.sevWarning, isTemp=True)
+            return None
         try:
             sdssFmtStr = fitsObj[0].header["SDSSFMT"]
         except Exception:
             self.statusBar.setMsg("No SDSSFMT header entry",
                 severity = RO.Constants.sevWarning, isTemp=True)
+            fitsObj.close()
             return None
 
         try:
@@ -138,73 +143,147 @@ class FocusPlotWdg(Tkinter.Frame):
         except Exception:
             self.statusBar.setMsg("Could not parse SDSSFMT=%r" % (sdssFmtStr,),
                 severity = RO.Constants.sevWarning, isTemp=True)
+            fitsObj.close()
             return None
 
         if formatName.lower() != "gproc":
             self.statusBar.setMsg("SDSSFMT = %s != gproc" % (formatName.lower(),),
                 severity = RO.Constants.sevWarning, isTemp=True)
+            fitsObj.close()
             return None
         
         self.statusBar.clearTempMsg()
         return fitsObj
-
-    def fitFocus(self, focusOffsetArr, fwhmArr, fitsObj, nPoints=50):
-        """Fit a line to rms^2 - focus offset^2 vs. focus offset
-        
-        (after converting to suitable units)
-        
-        Inputs:
-        - focusOffsetArr: array of focus offset values (um)
-        - fwhmArr: array of FWHM values (arcsec)
-        - nPoints: number of points desired in the returned fit arrays
-        
-        Returns [newFocusOffArr, fitFWHMArr] if the fit succeeds; None otherwise
-        """
-        if len(focusOffsetArr) < 2:
-            self.statusBar.setMsg("Cannot fit data: too few data points",
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
-        if min(focusOffsetArr) == max(focusOffsetArr):
-            self.statusBar.setMsg("Cannot fit data: no focus offset range",
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
-        try:
-            plateScale = float(fitsObj[0].header["PLATSCAL"])
-
-            focalRatio = 5.0
-            C = 5.0 / (32.0 * focalRatio**2)
-
-            # compute RMS in microns
-            # RMS = FWHM / 2.35, but FWHM is in arcsec
-            # plateScale is in mm/deg
-            micronsPerArcsec = plateScale * 1.0e3 / 3600.0
-            rmsArr = fwhmArr * (micronsPerArcsec / 2.35) # in microns
-    
-            yArr = rmsArr**2 - (C * focusOffsetArr**2)
-            
-            fitCoeff = numpy.polyfit(focusOffsetArr, yArr, 1)
-    
-            fitFocusOffsetArr = numpy.linspace(min(focusOffsetArr), max(focusOffsetArr), nPoints)
-            fitYArr = (fitFocusOffsetArr * fitCoeff[0]) + fitCoeff[1]
-            fitRMSSqArr = fitYArr + (C * fitFocusOffsetArr**2)
-            
-            fitFWHM = numpy.sqrt(fitRMSSqArr) * (2.35 / micronsPerArcsec)
-            
-            return [fitFocusOffsetArr, fitFWHM]
-        except Exception as e:
-            self.statusBar.setMsg("Cannot fit data: %s" % (RO.StringUtil.strFromException(e),),
-                severity = RO.Constants.sevWarning, isTemp=True)
-            return None
     
     def clear(self):
-        self.plotAxis.clear()
+        """Discard the focus history and clear the plot
+        """
+        self.focusHistory.clear()
+        self.plateID = None
+        self._showImage(None)
+
+    def _makePlot(self):
+        """Create the plot artists; their data is set by _showImage
+        """
         self.plotAxis.grid(True)
-        # start with autoscale disabled due to bug in matplotlib
         self.plotAxis.set_autoscale_on(True)
         self.plotAxis.set_xlabel("Guide probe focus offset (um)")
         self.plotAxis.set_ylabel("Guide star FWHM (arcsec)")
+        self.titleText = self.plotAxis.set_title("")
+        self.rollPointsLine = self.plotAxis.plot([], [], color="gray", linestyle="", marker=".",
+            label="last %d images" % (RollingLen,))[0]
+        self.probeLine = self.plotAxis.plot([], [], color="black", linestyle="", marker="o", label="probe")[0]
+        self.fitLine = self.plotAxis.plot([], [], color="blue", linestyle="-", label="best fit")[0]
+        self.rollFitLine = self.plotAxis.plot([], [], color="red", linestyle="--",
+            label="fit of last %d" % (RollingLen,))[0]
+        self.seeingLine = self.plotAxis.plot([], [], linestyle="", marker="x", markersize=12,
+            color="green", markeredgewidth=1, label="seeing")[0]
+        # invisible 0,0 point to force autoscale to include origin
+        self.plotAxis.plot([0.0], [0.0], linestyle="", marker="")
+        legend = self.plotAxis.legend(loc=4, numpoints=1)
+        legend.draw_frame(False)
+
+        self.trendAxis.grid(True)
+        self.trendAxis.set_autoscale_on(True)
+        self.trendAxis.set_xlabel("Image")
+        self.trendAxis.set_ylabel("Best focus (um)")
+        self.trendLine = self.trendAxis.plot([], [], color="blue", linestyle="", marker=".")[0]
+        self.rollTrendLine = self.trendAxis.plot([], [], color="red", linestyle="-")[0]
+        self.currTrendLine = self.trendAxis.plot([], [], color="black", linestyle="", marker="o")[0]
         self.figCanvas.draw()
 
+    def _showImage(self, imageName):
+        """Show the focus data for one image (if any) and the focus trend, updating the plot artists in place
+
+        Inputs:
+        - imageName: name of image to show; None (or an image not in the focus history) to show no image
+        """
+        focusHistory = self.focusHistory
+        ind = None if imageName is None else focusHistory.findName(imageName)
+        self.currImageName = imageName if ind is not None else None
+        eachFit = focusHistory.fitEach()
+        rollFit = focusHistory.fitRolling(RollingLen)
+
+        numLabels = 0
+        if ind is None:
+            for line in (self.probeLine, self.fitLine, self.rollPointsLine, self.rollFitLine, self.seeingLine):
+                line.set_data([], [])
+            self.titleText.set_text("")
+        else:
+            isGoodArr = focusHistory.isGoodArr[ind]
+            focusOffsetArr = focusHistory.focusOffsetArr[ind][isGoodArr]
+            fwhmArr = focusHistory.fwhmArr[ind][isGoodArr]
+            self.probeLine.set_data(focusOffsetArr, fwhmArr)
+
+            # add probe numbers
+            for focusOffset, fwhm, probeNumber in zip(focusOffsetArr, fwhmArr, numpy.flatnonzero(isGoodArr) + 1):
+                if numLabels < len(self._probeLabelList):
+                    probeLabel = self._probeLabelList[numLabels]
+                    probeLabel.set_text("%s" % (probeNumber,))
+                    probeLabel.xy = (focusOffset, fwhm)
+                    probeLabel.set_visible(True)
+                else:
+                    probeLabel = self.plotAxis.annotate("%s" % (probeNumber,), (focusOffset, fwhm), xytext=(5, -5),
+                        textcoords="offset points")
+                    self._probeLabelList.append(probeLabel)
+                numLabels += 1
+
+            # show the fit of this image
+            fitArrays = eachFit.getCurve(ind)
+            if fitArrays is None:
+                self.fitLine.set_data([], [])
+                self.statusBar.setMsg("Cannot fit data: %s" % (eachFit.getErrMsg(ind),),
+                    severity = RO.Constants.sevWarning, isTemp=True)
+            else:
+                self.fitLine.set_data(*fitArrays)
+
+            # show the data and fit of this image and the preceding images
+            begInd = max(0, ind + 1 - RollingLen)
+            isRollGoodArr = focusHistory.isGoodArr[begInd:ind + 1]
+            self.rollPointsLine.set_data(
+                focusHistory.focusOffsetArr[begInd:ind + 1][isRollGoodArr],
+                focusHistory.fwhmArr[begInd:ind + 1][isRollGoodArr],
+            )
+            rollFitArrays = rollFit.getCurve(ind)
+            if rollFitArrays is None:
+                self.rollFitLine.set_data([], [])
+            else:
+                self.rollFitLine.set_data(*rollFitArrays)
+
+            # add seeing
+            seeing = focusHistory.seeingArr[ind]
+            if numpy.isfinite(seeing):
+                self.seeingLine.set_data([0.0], [seeing])
+            else:
+                self.seeingLine.set_data([], [])
+
+            self.titleText.set_text(imageName)
+        for probeLabel in self._probeLabelList[numLabels:]:
+            probeLabel.set_visible(False)
+
+        # show the best focus offset trend
+        imNumArr = numpy.arange(len(focusHistory))
+        self.trendLine.set_data(imNumArr, eachFit.bestFocusOffsetArr)
+        self.rollTrendLine.set_data(imNumArr, rollFit.bestFocusOffsetArr)
+        if ind is None:
+            self.currTrendLine.set_data([], [])
+        else:
+            self.currTrendLine.set_data([ind], [eachFit.bestFocusOffsetArr[ind]])
+
+        for axis in (self.plotAxis, self.trendAxis):
+            axis.relim()
+            axis.autoscale_view()
+        self.figCanvas.draw_idle()
+
+
+def _getFloat(hdr, name):
+    """Return a FITS header value as a float, or NaN if missing or invalid
+    """
+    try:
+        return float(hdr[name])
+    except Exception:
+        return numpy.nan
+
 
 if __name__ == "__main__":
     import GuideTest
@@ -222,7 +301,6 @@ if __name__ == "__main__":
         imageName = "proc-gimg-1310.fits",
         isLocal = True,
     )
-    gim.getFITSObj()
     testFrame.plot(gim)
 
     GuideTest.tuiModel.reactor.run()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+"""Browse a directory of guide images (e.g. gcam and gproc files from a night), for post-night analysis
+
+Choose a directory to index it (see ImageIndex); the index is saved in the directory,
+so reopening the directory only reads new or changed files. The images that match the filter
+(name pattern, format, exposure time range and maximum seeing) are listed; select one to display it.
+Images are prepared for display in background threads (see ImagePrepPool), as for the guide window,
+and the images on either side of the displayed image are prepared in advance,
+so stepping through the list with the arrow keys is quick.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Share the prepared image cache and preparation threads with the guide windows,
+                    rather than creating another of each.
+2026-10-18          Bug fix: plate view annotations were not drawn, because GuideWdg.annDisplayList
+                    was passed gim, which GrayImageWdg.addAnnotation also passes.
+"""
+import os
+import sys
+import threading
+import traceback
+import Tkinter
+import tkFileDialog
+
+import numpy
+import RO.Constants
+import RO.StringUtil
+import RO.Wdg
+import RO.Wdg.GrayImageDispWdg as GImDisp
+import TUI.Base.Wdg
+import TUI.Models
+import GuideImage
+import GuideWdg
+import ImageIndex
+import ImagePrepPool
+
+_HelpURL = "Instruments/Guiding/index.html"
+
+_PrefetchLen = 3 # number of images to prepare in advance on each side of the displayed image
+_ProgressInterval = 25 # report indexing progress every this many files
+
+class GuideBrowserWdg(Tkinter.Frame):
+    def __init__(self,
+        master,
+    **kargs):
+        Tkinter.Frame.__init__(self, master, **kargs)
+
+        self.tuiModel = TUI.Models.getModel("tui")
+        self.dirPath = None # directory being browsed (or indexed), or None
+        self.index = None # ImageIndex for dirPath, or None if not yet indexed
+        self.matchInds = numpy.zeros(0, dtype=int) # indices (into self.index) of images that match the filter
+        self.dispInd = None # index (into self.index) of the displayed image, or None
+        self.imObjDict = {} # dict of image name: GuideImage, for images in dirPath
+        self.prepCache = GuideImage.getPrepCache() # shared with the guide windows
+        self.prepPool = ImagePrepPool.getPool() # shared with the guide windows
+
+        row = 0
+
+        dirFrame = Tkinter.Frame(self)
+        RO.Wdg.Button(
+            master = dirFrame,
+            text = "Directory...",
+            callFunc = self.doChooseDir,
+            helpText = "Choose a directory of guide images to browse",
+            helpURL = _HelpURL,
+        ).pack(side="left")
+        self.dirWdg = RO.Wdg.StrEntry(
+            master = dirFrame,
+            justify = "right",
+            readOnly = True,
+            helpText = "Directory being browsed",
+            helpURL = _HelpURL,
+        )
+        self.dirWdg.pack(side="left", expand=True, fill="x", padx=4)
+        dirFrame.grid(row=row, column=0, columnspan=2, sticky="ew")
+        row += 1
+
+        filterFrame = Tkinter.Frame(self)
+        RO.Wdg.StrLabel(master=filterFrame, text="Name").pack(side="left")
+        self.namePatternWdg = RO.Wdg.StrEntry(
+            master = filterFrame,
+            width = 12,
+            doneFunc = self._applyFilter,
+            helpText = "Show images whose name matches this pattern (e.g. proc-*); blank for all",
+            helpURL = _HelpURL,
+        )
+        self.namePatternWdg.pack(side="left")
+        RO.Wdg.StrLabel(master=filterFrame, text=" Exp Time").pack(side="left")
+        self.minExpTimeWdg = RO.Wdg.FloatEntry(
+            master = filterFrame,
+            minValue = 0,
+            width = 5,
+            doneFunc = self._applyFilter,
+            helpText = "Show images whose exposure time is at least this (sec); blank for no limit",
+            helpURL = _HelpURL,
+        )
+        self.minExpTimeWdg.pack(side="left")
+        RO.Wdg.StrLabel(master=filterFrame, text="-").pack(side="left")
+        self.maxExpTimeWdg = RO.Wdg.FloatEntry(
+            master = filterFrame,
+            minValue = 0,
+            width = 5,
+            doneFunc = self._applyFilter,
+            helpText = "Show images whose exposure time is at most this (sec); blank for no limit",
+            helpURL = _HelpURL,
+        )
+        self.maxExpTimeWdg.pack(side="left")
+        RO.Wdg.StrLabel(master=filterFrame, text=" Max Seeing").pack(side="left")
+        self.maxSeeingWdg = RO.Wdg.FloatEntry(
+            master = filterFrame,
+            minValue = 0,
+            width = 5,
+            doneFunc = self._applyFilter,
+            helpText = "Show images whose seeing is at most this (arcsec); blank for no limit",
+            helpURL = _HelpURL,
+        )
+        self.maxSeeingWdg.pack(side="left")
+        self.gprocOnlyWdg = RO.Wdg.Checkbutton(
+            master = filterFrame,
+            text = "gproc only",
+            defValue = True,
+            callFunc = self._applyFilter,
+            helpText = "Show only processed guide images (SDSSFMT = gproc)?",
+            helpURL = _HelpURL,
+        )
+        self.gprocOnlyWdg.pack(side="left")
+        filterFrame.grid(row=row, column=0, columnspan=2, sticky="w")
+        row += 1
+
+        listFrame = Tkinter.Frame(self)
+        self.listWdg = Tkinter.Listbox(
+            master = listFrame,
+            selectmode = "browse",
+            exportselection = False,
+            width = 36,
+            font = "TkFixedFont",
+        )
+        listScroll = Tkinter.Scrollbar(master=listFrame, orient="vertical", command=self.listWdg.yview)
+        self.listWdg.configure(yscrollcommand=listScroll.set)
+        self.listWdg.grid(row=0, column=0, sticky="ns")
+        listScroll.grid(row=0, column=1, sticky="ns")
+        listFrame.grid_rowconfigure(0, weight=1)
+        self.listWdg.bind("<<ListboxSelect>>", self._listSelect)
+        listFrame.grid(row=row, column=0, sticky="ns")
+
+        self.gim = GImDisp.GrayImageWdg(self,
+            helpURL = _HelpURL,
+            defRange = "99.5%",
+        )
+        self.plateBtn = RO.Wdg.Checkbutton(
+            master = self.gim.toolFrame,
+            text = "Plate",
+            defValue = True,
+            callFunc = self.redisplayImage,
+            helpText = "Show plate view of guide probes or normal image",
+        )
+        self.plateBtn.pack(side="left")
+        self.gim.grid(row=row, column=1, sticky="news")
+        self.grid_rowconfigure(row, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+        row += 1
+
+        self.imInfoWdg = RO.Wdg.StrLabel(
+            master = self,
+            anchor = "w",
+            helpText = "Information about the displayed image",
+            helpURL = _HelpURL,
+        )
+        self.imInfoWdg.grid(row=row, column=0, columnspan=2, sticky="ew")
+        row += 1
+
+        self.statusBar = TUI.Base.Wdg.StatusBar(
+            master = self,
+            helpURL = _HelpURL,
+        )
+        self.statusBar.grid(row=row, column=0, columnspan=2, sticky="ew")
+        row += 1
+
+    def doChooseDir(self, wdg=None):
+        """Choose a directory of guide images to browse
+        """
+        startDir = self.dirPath or self.tuiModel.prefs.getValue("Save To")
+        kargs = {}
+        if startDir is not None and os.path.isdir(startDir):
+            kargs["initialdir"] = startDir
+        dirPath = tkFileDialog.askdirectory(mustexist=True, **kargs)
+        if not dirPath:
+            return
+        self.setDirectory(dirPath)
+
+    def setDirectory(self, dirPath):
+        """Browse a directory of guide images
+
+        The directory is indexed in a background thread; the image list is shown when that is done.
+        """
+        self.dirPath = dirPath
+        self.index = None
+        self.matchInds = numpy.zeros(0, dtype=int)
+        self.dispInd = None
+        self.imObjDict = {}
+        self.dirWdg.set(dirPath)
+        self.dirWdg.xview("end")
+        self.listWdg.delete(0, "end")
+        self.imInfoWdg.set("")
+        self.gim.showMsg("Indexing images", RO.Constants.sevNormal)
+        self.statusBar.setMsg("Indexing %s" % (dirPath,), severity=RO.Constants.sevNormal, isTemp=True)
+        thread = threading.Thread(target=self._indexDir, args=(dirPath,), name="GuideImageIndex")
+        thread.daemon = True
+        thread.start()
+
+    def redisplayImage(self, *args, **kargs):
+        """Redisplay the current image
+        """
+        if self.dispInd is not None:
+            self.showIndex(self.dispInd)
+
+    def showIndex(self, ind):
+        """Display an image, given its index in self.index
+
+        The images on either side of it in the list of matching images are prepared in advance.
+        """
+        self.dispInd = ind
+        imObj = self._getImObj(ind)
+        self._showImageInfo(ind)
+        matchPos = numpy.searchsorted(self.matchInds, ind)
+        for offset in range(_PrefetchLen, 0, -1):
+            # the pool prepares the most recent request first, so request the nearest images last
+            for prefetchPos in (matchPos + offset, matchPos - offset):
+                if 0 <= prefetchPos < len(self.matchInds):
+                    self._prepare(self._getImObj(self.matchInds[prefetchPos]))
+        if imObj.isPrepared:
+            self._showImage(imObj)
+        elif imObj.didFail:
+            self.gim.showMsg(imObj.getStateStr(), RO.Constants.sevWarning)
+        else:
+            self.gim.showMsg("Loading", RO.Constants.sevNormal)
+            self._prepare(imObj)
+
+    def _applyFilter(self, wdg=None):
+        """Apply the filter and list the matching images
+
+        The displayed image stays selected if it still matches, else the first matching image is displayed.
+        """
+        if self.index is None:
+            return
+        self.matchInds = self.index.filter(
+            namePattern = self.namePatternWdg.getString() or None,
+            sdssFmtType = GuideImage.SDSSFmtType if self.gprocOnlyWdg.getBool() else None,
+            minExpTime = self.minExpTimeWdg.getNumOrNone(),
+            maxExpTime = self.maxExpTimeWdg.getNumOrNone(),
+            maxSeeing = self.maxSeeingWdg.getNumOrNone(),
+        )
+        imageArr = self.index.imageArr
+        self.listWdg.delete(0, "end")
+        self.listWdg.insert("end", *[
+            "%-20s %6s %5s" % (
+                self.index.imageNames[ind],
+                _fmtNum(imageArr["expTime"][ind], "%0.1fs"),
+                _fmtNum(imageArr["seeing"][ind], '%0.2f"'),
+            ) for ind in self.matchInds
+        ])
+        self.statusBar.setMsg("%d of %d images match" % (len(self.matchInds), len(self.index)),
+            severity=RO.Constants.sevNormal, isTemp=True)
+
+        if len(self.matchInds) == 0:
+            self.dispInd = None
+            self.imInfoWdg.set("")
+            self.gim.showMsg("No matching images", RO.Constants.sevNormal)
+            return
+        matchPos = numpy.searchsorted(self.matchInds, self.dispInd) if self.dispInd is not None else 0
+        if matchPos >= len(self.matchInds) or self.matchInds[matchPos] != self.dispInd:
+            matchPos = 0
+        self.listWdg.selection_set(matchPos)
+        self.listWdg.see(matchPos)
+        self.showIndex(self.matchInds[matchPos])
+
+    def _getImObj(self, ind):
+        """Return the GuideImage for an image, given its index in self.index
+        """
+        imageName = self.index.imageNames[ind]
+        imObj = self.imObjDict.get(imageName)
+        if imObj is None:
+            imObj = GuideImage.GuideImage(
+                localBaseDir = self.index.dirPath,
+                imageName = imageName,
+                isLocal = True,
+                prepCache = self.prepCache,
+            )
+            self.imObjDict[imageName] = imObj
+        return imObj
+
+    def _indexDir(self, dirPath):
+        """Index a directory and report the result; the body of the indexing thread
+        """
+        reactor = self.tuiModel.reactor
+        def progressFunc(numRead, numToRead):
+            if numRead % _ProgressInterval == 0:
+                reactor.callFromThread(self._indexProgress, dirPath, numRead, numToRead)
+        try:
+            index = ImageIndex.ImageIndex(dirPath)
+            if index.update(progressFunc=progressFunc) > 0:
+                try:
+                    index.save()
+                except RuntimeError as e:
+                    # the directory may be read-only; the index still works, it just is not saved
+                    sys.stderr.write("GuideBrowserWdg: %s\n" % (RO.StringUtil.strFromException(e),))
+        except Exception as e:
+            sys.stderr.write("GuideBrowserWdg: could not index %r:\n" % (dirPath,))
+            traceback.print_exc(file=sys.stderr)
+            reactor.callFromThread(self._indexDone, dirPath, None, RO.StringUtil.strFromException(e))
+            return
+        reactor.callFromThread(self._indexDone, dirPath, index, None)
+
+    def _indexDone(self, dirPath, index, errMsg):
+        """Called (in the main thread) when a directory has been indexed
+        """
+        if dirPath != self.dirPath:
+            # the user has chosen another directory
+            return
+        if index is None:
+            self.gim.showMsg("Could not index directory", RO.Constants.sevError)
+            self.statusBar.setMsg("Could not index %s: %s" % (dirPath, errMsg), severity=RO.Constants.sevError)
+            return
+        self.index = index
+        self._applyFilter()
+
+    def _indexProgress(self, dirPath, numRead, numToRead):
+        """Called (in the main thread) to report progress indexing a directory
+        """
+        if dirPath != self.dirPath:
+            return
+        self.statusBar.setMsg("Indexing %s: read %d of %d new images" % (dirPath, numRead, numToRead),
+            severity=RO.Constants.sevNormal, isTemp=True)
+
+    def _listSelect(self, evt=None):
+        """Handle selection of an image in the list
+        """
+        selPosList = self.listWdg.curselection()
+        if not selPosList:
+            return
+        matchPos = int(selPosList[0])
+        if matchPos >= len(self.matchInds):
+            return
+        self.showIndex(self.matchInds[matchPos])
+
+    def _prepare(self, imObj):
+        """Request that an image be prepared for display, unless already prepared or failed
+        """
+        if imObj.isPrepared or imObj.didFail:
+            return
+        self.prepPool.prepare(imObj, self._prepCallback)
+
+    def _prepCallback(self, imObj, prepImage):
+        """Called (in the main thread) when self.prepPool has prepared an image for display
+        """
+        imObj.setPreparedImage(prepImage)
+        if self.imObjDict.get(imObj.imageName) is not imObj:
+            # image is from a directory no longer being browsed
+            return
+        if self.dispInd is not None and self.index.imageNames[self.dispInd] == imObj.imageName:
+            if imObj.didFail:
+                self.gim.showMsg(imObj.getStateStr(), RO.Constants.sevWarning)
+            else:
+                self._showImage(imObj)
+
+    def _showImage(self, imObj):
+        """Display a prepared image, as a plate view if available and wanted
+        """
+        prepImage = imObj.prepImage
+        if prepImage is None:
+            return
+        plateInfo = prepImage.plateInfo
+        self.plateBtn.setEnable(plateInfo is not None)
+        isPlateView = plateInfo is not None and self.plateBtn.getBool()
+        if isPlateView:
+            imArr = plateInfo.plateImageArr
+        else:
+            imArr = prepImage.imArr
+        if imArr is None:
+            self.gim.showMsg("Image %s has no data in plane 0" % (imObj.imageName,), RO.Constants.sevWarning)
+            return
+        self.gim.showArr(imArr)
+        annDisplayList = prepImage.annDisplayListDict.get(isPlateView)
+        if annDisplayList:
+            self.gim.addAnnotation(
+                GuideWdg.annDisplayList,
+                imPos = (0, 0),
+                rad = 0,
+                isImSize = False,
+                imWdg = self.gim,
+                displayList = annDisplayList,
+            )
+        if prepImage.plateErrSevMsg:
+            severity, errMsg = prepImage.plateErrSevMsg
+            self.statusBar.setMsg(errMsg, severity=severity, isTemp=True)
+
+    def _showImageInfo(self, ind):
+        """Show information from the index about an image, given its index in self.index
+        """
+        imageData = self.index.imageArr[ind]
+        infoList = [
+            self.index.imageNames[ind],
+            "Exp Time: %s" % (_fmtNum(imageData["expTime"], "%0.1f sec"),),
+            "Bin: %s" % (_fmtNum(imageData["binFac"], "%0.0f"),),
+            "Seeing: %s" % (_fmtNum(imageData["seeing"], '%0.2f"'),),
+        ]
+        probeData = self.index.getProbeData(ind)
+        if len(probeData) > 0:
+            fwhmArr = probeData["fwhm"][probeData["exists"] & probeData["enabled"] & numpy.isfinite(probeData["fwhm"])]
+            infoList.append("Median FWHM: %s" % (_fmtNum(numpy.median(fwhmArr) if len(fwhmArr) else numpy.nan, '%0.2f"'),))
+        self.imInfoWdg.set("; ".join(infoList))
+
+
+def _fmtNum(value, fmtStr):
+    """Format a number, or return "?" if it is not finite
+    """
+    if not numpy.isfinite(value):
+        return "?"
+    return fmtStr % (value,)
+
+
+if __name__ == "__main__":
+    import GuideTest
+
+    root = GuideTest.tuiModel.tkRoot
+
+    testFrame = GuideBrowserWdg(root)
+    testFrame.pack(expand="yes", fill="both")
+    if len(sys.argv) > 1:
+        testFrame.setDirectory(sys.argv[1])
+
+    GuideTest.tuiModel.reactor.run()
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""Guide image browser window.
+
+History:
+2026-10-18          Initial version.
+"""
+import GuideBrowserWdg
+
+WindowName = "Inst.Guide Browser"
+
+def addWindow(tlSet):
+    tlSet.createToplevel(
+        name = WindowName,
+        defGeom = "760x620+200+200",
+        resizable = True,
+        visible = False,
+        wdgFunc = GuideBrowserWdg.GuideBrowserWdg,
+    )
+
+
+if __name__ == "__main__":
+    import GuideTest
+
+    tlSet = GuideTest.tuiModel.tlSet
+
+    addWindow(tlSet)
+    tlSet.makeVisible(WindowName)
+    GuideTest.tuiModel.reactor.run()
@@ -28,17 +28,330 @@ History:
 2014-08-27 ROwen    Removed two unused imports.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
 2015-11-05 ROwen    Modernized "except" syntax.
+2026-10-18          Added PreparedImage and prepareImage, to read a guide image and assemble the plate view
+                    (in a background thread; see ImagePrepPool), and GuideImage.prepImage
+                    and GuideImage.setPreparedImage to hold the result. expire clears prepImage.
+2026-10-18          Added PreparedImageCache: a least-recently-used cache of PreparedImage with a memory budget.
+                    GuideImage stores its prepared image in a (usually shared) cache, specified by
+                    the new prepCache argument; prepImage is now a property. Added isPrepared property.
+2026-10-18          Open FITS files memory-mapped, so only the HDUs that are used are read.
+                    prepareImage reads only the headers and data it needs (plane 0 and the mask,
+                    plus whatever the plate view assembler uses) and closes the file, keeping memory-mapped
+                    views of the image and mask; added copyIfMemMapped to copy the displayed image.
+                    getFITSObj callers must now close the returned object.
+2026-10-18          prepareImage also computes the plate view annotations (as PlateView.AnnDisplayLists,
+                    saved in PreparedImage.annDisplayListDict) and records the time taken by each stage
+                    (in PreparedImage.timeDict).
+2026-10-18          Added ProbeDType and readProbeTable, to read the guide probe table of a gproc file.
+2026-10-18          Added getPrepCache, which returns the PreparedImageCache shared by the guide windows
+                    and the guide image browser. PreparedImageCache is keyed by local path, not image name,
+                    so images of the same name from different directories do not collide.
+2026-10-18          Added isMemMapped; PreparedImage.getNumBytes can count only memory-mapped
+                    or only in-memory arrays.
 """
+import collections
+import mmap
 import os
+import sys
+import time
+import traceback
+
+import numpy
 import pyfits
+from opscore.utility import assembleImage
+import RO.Constants
 import RO.StringUtil
 import TUI.Models
+import PlateView
 
 _DebugMem = False # print a message when a file is deleted from disk?
 
 SDSSFmtType = "gproc"
 SDSSFmtMajorVersion = 1
 
+DefaultPrepCacheBytes = 200 * 1000000 # default memory budget for PreparedImageCache (bytes)
+
+# fields of the guide probe table (HDU 6 of a gproc file) read by readProbeTable, in order;
+# each is (name, dtype, value if the column is missing); names match the FITS column names
+ProbeFieldList = (
+    ("exists", bool, False),
+    ("enabled", bool, False),
+    ("gprobebits", int, 0),
+    ("xstar", float, numpy.nan),
+    ("ystar", float, numpy.nan),
+    ("dRA", float, numpy.nan),
+    ("dDec", float, numpy.nan),
+    ("fwhm", float, numpy.nan),
+    ("focusOffset", float, numpy.nan),
+    ("mag", float, numpy.nan),
+)
+ProbeDType = numpy.dtype([("probeNum", int)] + [fieldInfo[0:2] for fieldInfo in ProbeFieldList])
+
+ProbeHDUIndex = 6 # index of the guide probe table HDU in a gproc file
+
+class PreparedImage(object):
+    """Guide image data read from a FITS file and prepared for display
+
+    Fields:
+    - imArr: image data (plane 0 of the FITS file), or None if unavailable;
+        usually a memory-mapped view of the file (see copyIfMemMapped)
+    - maskArr: mask (a uint8 array the same shape as imArr), or None if unavailable;
+        usually a memory-mapped view of the file
+    - plateInfo: plate view information (as returned by assembleImage.AssembleImage), or None
+    - noPlateInfo: True if the image has no plate information (it is not a guider image)
+    - plateErrSevMsg: (severity, message) explaining why a plate view could not be assembled, or None
+    - expTime: exposure time (floating seconds)
+    - binFac: bin factor (a scalar; x = y)
+    - readErrMsg: reason the file could not be read, or None if read successfully
+    - annDisplayListDict: dict of isPlateView: annotations for the image (a PlateView.AnnDisplayList);
+        empty if plateInfo is None
+    - timeDict: dict of stage name: time taken to prepare the image (sec); stages are:
+        "read" (read the FITS file), "assemble" (assemble the plate view), "annotate" (compute annotations)
+    """
+    def __init__(self, readErrMsg=None):
+        self.imArr = None
+        self.maskArr = None
+        self.plateInfo = None
+        self.noPlateInfo = False
+        self.plateErrSevMsg = None
+        self.expTime = None
+        self.binFac = None
+        self.readErrMsg = readErrMsg
+        self.annDisplayListDict = {}
+        self.timeDict = {}
+
+    def getNumBytes(self, memMapped=None):
+        """Return the approximate number of bytes used by the image data
+
+        Inputs:
+        - memMapped: which arrays to count: all if None (the default), else only those that are
+            (if True) or are not (if False) memory-mapped views of the file (see isMemMapped)
+
+        The default includes memory-mapped data, so that the number of open memory maps is limited as well.
+        """
+        arrList = [self.imArr, self.maskArr]
+        if self.plateInfo is not None:
+            arrList += [getattr(self.plateInfo, "plateImageArr", None), getattr(self.plateInfo, "plateMaskArr", None)]
+            for stampInfo in getattr(self.plateInfo, "stampList", ()):
+                arrList += [getattr(stampInfo, "image", None), getattr(stampInfo, "mask", None)]
+        return sum(arr.nbytes for arr in arrList
+            if arr is not None and (memMapped is None or isMemMapped(arr) == memMapped))
+
+
+class PreparedImageCache(object):
+    """A least-recently-used cache of PreparedImage, keyed by local path
+
+    When the total size of the cached images exceeds maxBytes, the least recently used images
+    are discarded (but the most recently added image is always kept).
+    """
+    def __init__(self, maxBytes=DefaultPrepCacheBytes):
+        """Inputs:
+        - maxBytes: memory budget (bytes)
+        """
+        self.maxBytes = int(maxBytes)
+        self.numBytes = 0
+        self._prepDict = collections.OrderedDict() # local path: (PreparedImage, numBytes); oldest first
+
+    def clear(self):
+        """Discard all cached images
+        """
+        self._prepDict.clear()
+        self.numBytes = 0
+
+    def get(self, localPath):
+        """Return the PreparedImage for an image, or None if not cached
+
+        Marks the image as most recently used.
+        """
+        prepNumBytes = self._prepDict.pop(localPath, None)
+        if prepNumBytes is None:
+            return None
+        self._prepDict[localPath] = prepNumBytes
+        return prepNumBytes[0]
+
+    def put(self, localPath, prepImage):
+        """Add (or replace) a PreparedImage and discard older images as needed to stay within budget
+        """
+        self.remove(localPath)
+        numBytes = prepImage.getNumBytes()
+        self._prepDict[localPath] = (prepImage, numBytes)
+        self.numBytes += numBytes
+        self._purge()
+
+    def remove(self, localPath):
+        """Discard an image, if cached
+        """
+        prepNumBytes = self._prepDict.pop(localPath, None)
+        if prepNumBytes is not None:
+            self.numBytes -= prepNumBytes[1]
+
+    def setMaxBytes(self, maxBytes):
+        """Set the memory budget (bytes), discarding images as needed
+        """
+        self.maxBytes = int(maxBytes)
+        self._purge()
+
+    def _purge(self):
+        """Discard least recently used images until within budget (always keeping the newest image)
+        """
+        while self.numBytes > self.maxBytes and len(self._prepDict) > 1:
+            localPath, (prepImage, numBytes) = self._prepDict.popitem(last=False)
+            self.numBytes -= numBytes
+            if _DebugMem:
+                print "Discarding prepared image %r from cache" % (localPath,)
+
+    def __contains__(self, localPath):
+        return localPath in self._prepDict
+
+    def __len__(self):
+        return len(self._prepDict)
+
+
+_thePrepCache = None
+
+def getPrepCache():
+    """Return the PreparedImageCache shared by the guide windows and the guide image browser
+
+    Its memory budget is set by the "Guide Image Cache" preference (MB).
+    """
+    global _thePrepCache
+    if _thePrepCache is None:
+        _thePrepCache = PreparedImageCache()
+        prepCacheMBPref = TUI.Models.getModel("tui").prefs.getPrefVar("Guide Image Cache", None)
+        if prepCacheMBPref is not None:
+            def setMaxBytes(prepCacheMB, prefVar=None):
+                _thePrepCache.setMaxBytes(prepCacheMB * 1000000)
+            prepCacheMBPref.addCallback(setMaxBytes, callNow=True)
+    return _thePrepCache
+
+def prepareImage(localPath, plateViewAssembler):
+    """Read a guide image and assemble its plate view; return a PreparedImage.
+
+    Safe to call from a background thread (as long as plateViewAssembler is not shared between threads).
+    The FITS file is closed before returning.
+
+    Inputs:
+    - localPath: path to FITS file
+    - plateViewAssembler: an assembleImage.AssembleImage
+    """
+    try:
+        fitsIm = pyfits.open(localPath, ignore_missing_end=True, memmap=True)
+    except Exception as e:
+        return PreparedImage(readErrMsg=RO.StringUtil.strFromException(e))
+    try:
+        # avoid len(fitsIm) and bool(fitsIm), which read every header in the file
+        try:
+            imHDU = fitsIm[0]
+        except IndexError:
+            return PreparedImage(readErrMsg="No image data found")
+
+        prepImage = PreparedImage()
+        startTime = time.time()
+        imHdr = imHDU.header
+        prepImage.expTime = imHdr.get("EXPTIME")
+        prepImage.binFac = imHdr.get("BINX")
+        # keep memory-mapped views of the data (pyfits keeps the map open after the file is closed);
+        # pages are only read as they are used, and the display copies the image (see copyIfMemMapped)
+        prepImage.imArr = imHDU.data
+        if prepImage.imArr is not None:
+            try:
+                maskHDU = fitsIm[1]
+            except IndexError:
+                maskHDU = None
+            if maskHDU is not None and maskHDU.header.get("BITPIX") == 8 \
+                and maskHDU.header.get("NAXIS") == prepImage.imArr.ndim:
+                maskArr = maskHDU.data
+                if maskArr is not None and maskArr.shape == prepImage.imArr.shape and maskArr.dtype == numpy.uint8:
+                    prepImage.maskArr = maskArr
+        readDoneTime = time.time()
+        prepImage.timeDict["read"] = readDoneTime - startTime
+
+        try:
+            prepImage.plateInfo = plateViewAssembler(fitsIm)
+        except assembleImage.NoPlateInfo:
+            prepImage.noPlateInfo = True
+        except assembleImage.AIException as e:
+            prepImage.plateErrSevMsg = (RO.Constants.sevWarning,
+                "No plate view: %s" % (RO.StringUtil.strFromException(e),))
+        except Exception as e:
+            prepImage.plateErrSevMsg = (RO.Constants.sevError,
+                "No plate view: %s" % (RO.StringUtil.strFromException(e),))
+            sys.stderr.write("Could not assemble plate view of %r:\n" % (localPath,))
+            traceback.print_exc(file=sys.stderr)
+        assembleDoneTime = time.time()
+        prepImage.timeDict["assemble"] = assembleDoneTime - readDoneTime
+
+        if prepImage.plateInfo is not None:
+            try:
+                for isPlateView, imArr in (
+                    (True, prepImage.plateInfo.plateImageArr),
+                    (False, prepImage.imArr),
+                ):
+                    if imArr is not None:
+                        prepImage.annDisplayListDict[isPlateView] = PlateView.makeAnnDisplayList(
+                            plateInfo = prepImage.plateInfo,
+                            imShape = imArr.shape,
+                            isPlateView = isPlateView,
+                        )
+            except Exception:
+                prepImage.annDisplayListDict = {}
+                sys.stderr.write("Could not compute plate view annotations for %r:\n" % (localPath,))
+                traceback.print_exc(file=sys.stderr)
+            prepImage.timeDict["annotate"] = time.time() - assembleDoneTime
+        return prepImage
+    except Exception as e:
+        return PreparedImage(readErrMsg=RO.StringUtil.strFromException(e))
+    finally:
+        fitsIm.close()
+
+
+def readProbeTable(fitsIm):
+    """Read the guide probe table of a gproc file as a numpy structured array with dtype ProbeDType
+
+    Inputs:
+    - fitsIm: pyfits object for the file
+
+    Returns one entry per guide probe; probeNum is 1 for the first probe.
+    Columns missing from the file are set to their default value (see ProbeFieldList).
+    Raise RuntimeError if the file has no probe table.
+    """
+    try:
+        probeData = fitsIm[ProbeHDUIndex].data
+    except IndexError:
+        raise RuntimeError("No guide probe table")
+    if probeData is None:
+        raise RuntimeError("No guide probe table")
+    colNameSet = set(name.lower() for name in probeData.names)
+    probeArr = numpy.zeros(len(probeData), dtype=ProbeDType)
+    probeArr["probeNum"] = numpy.arange(1, len(probeData) + 1)
+    for name, dtype, defValue in ProbeFieldList:
+        if name.lower() in colNameSet:
+            probeArr[name] = probeData.field(name)
+        else:
+            probeArr[name] = defValue
+    return probeArr
+
+def isMemMapped(arr):
+    """Return True if arr is a memory-mapped array or a view of one
+    """
+    base = arr
+    while base is not None:
+        if isinstance(base, (mmap.mmap, numpy.memmap)):
+            return True
+        base = getattr(base, "base", None)
+    return False
+
+def copyIfMemMapped(arr):
+    """Return arr if it is an ordinary in-memory array (or None), else an in-memory copy of it
+
+    Use this for arrays that must not keep their file open, such as the displayed image
+    (an open memory map prevents deleting the file on Windows).
+    """
+    if isMemMapped(arr):
+        return numpy.array(arr)
+    return arr
+
+
 class BasicImage(object):
     """Information about an image.
 
@@ -144,12 +457,18 @@ class BasicImage(object):
 
     def getFITSObj(self):
         """If the file is available, return a pyfits object, else return None.
+
+        The file is memory-mapped and HDUs are read as they are accessed.
+        The caller must close the returned object when done with it.
         """
         if self.state == self.Downloaded:
             try:
-                fitsIm = pyfits.open(self.localPath, ignore_missing_end=True)
-                if fitsIm:
+                fitsIm = pyfits.open(self.localPath, ignore_missing_end=True, memmap=True)
+                try:
+                    fitsIm[0]
                     return fitsIm
+                except IndexError:
+                    fitsIm.close()
 
                 self.state = self.FileReadFailed
                 self.errMsg = "No image data found"
@@ -213,7 +532,12 @@ class GuideImage(BasicImage):
         downloadWdg = None,
         fetchCallFunc = None,
         isLocal = False,
+        prepCache = None,
     ):
+        """Inputs are as for BasicImage, plus:
+        - prepCache: a PreparedImageCache in which to save prepared image data;
+            if None then a private cache is used that holds only this image
+        """
         self.starDataDict = {} # dict of star type char: star keyword data
         self.defSelDataColor = None
         self.selDataColor = None
@@ -222,6 +546,9 @@ class GuideImage(BasicImage):
         self.didParseFITSHeader = False
         self.binFac = None
         self.expTime = None
+        if prepCache is None:
+            prepCache = PreparedImageCache(maxBytes=0)
+        self.prepCache = prepCache
 
         BasicImage.__init__(self,
             localBaseDir = localBaseDir,
@@ -230,6 +557,18 @@ class GuideImage(BasicImage):
             fetchCallFunc = fetchCallFunc,
             isLocal = isLocal,
         )
+        # discard prepared data for any older image with the same path, since this image replaces it
+        self.prepCache.remove(self.localPath)
+
+    @property
+    def isPrepared(self):
+        """Return True if prepared image data is cached (without affecting the order of the cache)"""
+        return self.localPath in self.prepCache
+
+    @property
+    def prepImage(self):
+        """Return the prepared image data (a PreparedImage), or None if not prepared or no longer cached"""
+        return self.prepCache.get(self.localPath)
 
     def getFITSObj(self):
         """Return the pyfits image object, or None if unavailable.
@@ -241,7 +580,7 @@ class GuideImage(BasicImage):
         - hasPlateInfo: image contains SDSS plug-plate guide probe information
         """
         fitsObj = BasicImage.getFITSObj(self)
-        if fitsObj and not self.didParseFITSHeader:
+        if fitsObj is not None and not self.didParseFITSHeader:
             self.hasPlateInfo = False
             imHdr = fitsObj[0].header
             self.expTime = imHdr.get("EXPTIME")
@@ -249,3 +588,28 @@ class GuideImage(BasicImage):
             self.didParseFITSHeader = True
 
         return fitsObj
+
+    def expire(self):
+        """Delete the file from disk, set state to expired and release prepared image data.
+        """
+        self.prepCache.remove(self.localPath)
+        BasicImage.expire(self)
+
+    def setPreparedImage(self, prepImage):
+        """Set prepared image data (as returned by prepareImage)
+
+        If the image could not be read then set state to FileReadFailed.
+        Ignored if the image is no longer available (e.g. it has expired).
+        """
+        if self.state != self.Downloaded:
+            return
+        if prepImage.readErrMsg is not None:
+            self.state = self.FileReadFailed
+            self.errMsg = prepImage.readErrMsg
+            return
+        self.prepCache.put(self.localPath, prepImage)
+        if not self.didParseFITSHeader:
+            self.hasPlateInfo = False
+            self.expTime = prepImage.expTime
+            self.binFac = prepImage.binFac
+            self.didParseFITSHeader = True
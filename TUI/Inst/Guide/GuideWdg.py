@@ -235,24 +235,46 @@ History:
                     and permit any gzipped file.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
 2015-11-05 ROwen    Modernized "except" syntax.
+2026-10-18          Read guide images and assemble plate views in background threads (see ImagePrepPool);
+                    showImage displays the prepared arrays, so toggling plate view and browsing
+                    history no longer re-read the FITS file.
+                    Download up to _MaxDownloads images at a time, keeping at most _PrefetchLen images
+                    queued for download (newest first); when the window is mapped,
+                    download the newest _PrefetchLen images that were skipped while it was hidden.
+                    Prev/Next prefetch the following image in history.
+2026-10-18          Prepared images are kept in a least-recently-used cache (GuideImage.PreparedImageCache)
+                    whose memory budget is set by the "Guide Image Cache" preference;
+                    images purged from history are removed from the cache.
+                    The cache and the pool of preparation threads are shared with the guide image browser
+                    (see GuideImage.getPrepCache and ImagePrepPool.getPool).
+2026-10-18          Bug fix: doSelect compared _MaxDist to the squared distance.
+2026-10-18          Plate view annotations are computed when the image is prepared (see PlateView)
+                    and drawn as a single annotation, rather than one annotation per item.
+                    The scale bar is now drawn at the upper left corner of the visible canvas.
+                    Moved makeGProbeName, ErrPixPerArcSec and DisabledProbeXSizeFactor to PlateView.
+                    Record the time taken to prepare and display images in renderTimer;
+                    set _DebugTiming to print them.
+2026-10-18          Made annDisplayList public, for use by GuideBrowserWdg.
+                    annDisplayList converts positions with GrayImageWdg.cnvPosFromImPos
+                    instead of duplicating it using the image widget's internal state.
+                    Bug fix: the plate view annotation was passed gim, which GrayImageWdg.addAnnotation
+                    also passes, so no plate view annotations were drawn; renamed the argument imWdg.
 """
 import atexit
 import os
 import re
 import sys
-import traceback
+import time
 import weakref
 import Tkinter
 import tkFileDialog
 
 import numpy
 import opscore.actor
-from opscore.utility import assembleImage
 import RO.Alg
 import RO.CanvasUtil
 import RO.Constants
 import RO.DS9
-import RO.MathUtil
 import RO.OS
 import RO.Prefs
 import RO.StringUtil
@@ -268,7 +290,9 @@ import CorrWdg
 import FocusPlotWindow
 import GuideImage
 import GuideStateWdg
+import ImagePrepPool
 import MangaDitherWdg
+import PlateView
 
 _HelpPrefix = "Instruments/Guiding/index.html#"
 
@@ -279,8 +303,6 @@ _GuideTag = "guide"
 _SelTag = "showSelection"
 _DragRectTag = "centroidDrag"
 _BoreTag = "boresight"
-_ErrTag = "poserr"
-_ProbeNumTag = "probeNum"
 
 _SelRad = 18
 _SelHoleRad = 9
@@ -290,16 +312,15 @@ _GuideHoleRad = 9
 _GuidePredPosRad = 9
 
 _HistLen = 100
+_MaxDownloads = 2 # maximum number of guide images to download at one time
+_PrefetchLen = 3 # maximum number of guide images waiting to be downloaded (older ones are dropped)
 
 _DebugMem = False # print a message when a file is deleted from disk?
 _DebugWdgEnable = False # print messages that help debug widget enable?
+_DebugTiming = False # print the time taken to display each image, and a summary on exit?
 
-_AboveFocusStr = "+" # u"\N{UPWARDS ARROW}"
-_BelowFocusStr = "-" # u"\N{DOWNWARDS ARROW}"
-
-ErrPixPerArcSec = 40 # pixels per arcsec of error on the plug plate
-
-DisabledProbeXSizeFactor = 1.0
+ErrPixPerArcSec = PlateView.ErrPixPerArcSec
+makeGProbeName = PlateView.makeGProbeName
 
 class HistoryBtn(RO.Wdg.Button):
     _InfoDict = {
@@ -345,12 +366,14 @@ class GuideWdg(Tkinter.Frame):
         self.tuiModel = TUI.Models.getModel("tui")
         self.dragStart = None
         self.dragRect = None
-        self.currDownload = None # image object being downloaded
-        self.nextDownload = None # next image object to download
+        self.downloadQueue = [] # image objects waiting to be downloaded; newest last
+        self.downloadingNameSet = set() # names of images being downloaded
         self.settingProbeEnableWdg = False
         self.currCmdInfoList = []
         self.focusPlotTL = None
-        self.plateViewAssembler = assembleImage.AssembleImage(relSize=0.5)
+        self.prepPool = ImagePrepPool.getPool()
+        self.prepCache = GuideImage.getPrepCache()
+        self.renderTimer = PlateView.RenderTimer() # time taken to prepare and display images
         
         self.ftpSaveToPref = self.tuiModel.prefs.getPrefVar("Save To")
         downloadTL = self.tuiModel.tlSet.getToplevel(TUI.TUIMenu.DownloadsWindow.WindowName)
@@ -1275,6 +1298,11 @@ class GuideWdg(Tkinter.Frame):
             # I'm not sure how to reproduce the problem so I'm not sure any workaround
             # is still needed and if this particular one does the job.
             Timer(0.001, self.showImage, self.dispImObj)
+
+        # download the newest images that were skipped while hidden
+        for imObj in reversed(self.imObjDict.values()[0:_PrefetchLen]):
+            if imObj.state == imObj.Ready:
+                self.queueDownload(imObj)
     
     def doNextIm(self, wdg=None):
         """Show next image from history list"""
@@ -1290,6 +1318,7 @@ class GuideWdg(Tkinter.Frame):
             return
         
         self.showImage(self.imObjDict[nextImName])
+        self._prefetchHist(currInd-2)
     
     def doPrevIm(self, wdg=None):
         """Show previous image from history list"""
@@ -1307,6 +1336,7 @@ class GuideWdg(Tkinter.Frame):
             return
         
         self.showImage(self.imObjDict[prevImName])
+        self._prefetchHist(currInd+2)
             
     def doSelect(self, evt):
         """Select a star based on a mouse click
@@ -1328,7 +1358,7 @@ class GuideWdg(Tkinter.Frame):
     
             # look for nearby centroid to choose
             selStarData = None
-            minDistSq = _MaxDist
+            minDistSq = _MaxDist**2
             for typeChar, starDataList in self.dispImObj.starDataDict.iteritems():
                 #print "doSelect checking typeChar=%r, nstars=%r" % (typeChar, len(starDataList))
                 tag, colorPref = self.typeTagColorPrefDict[typeChar]
@@ -1470,26 +1500,23 @@ class GuideWdg(Tkinter.Frame):
         """Called when an image is finished downloading.
         """
 #        print "fetchCallback(imObj=%s); imObj.state=%s" % (imObj, imObj.state)
+        if imObj.state == imObj.Downloaded:
+            # prepare the image for display; _prepCallback will display it if appropriate
+            self.prepPool.prepare(imObj, self._prepCallback)
+
         if self.dispImObj == imObj:
             # something has changed about the current object; update display
             self.showImage(imObj)
-        elif self.showCurrWdg.getBool() and imObj.isDone:
-            # a new image is ready; display it
+        elif self.showCurrWdg.getBool() and imObj.didFail and self._isNewerThanDisp(imObj):
+            # a new image failed; display the reason
             self.showImage(imObj)
         
         if not imObj.isDone:
             return
         
-        if self.currDownload and self.currDownload.isDone:
-            # start downloading next image, if any
-            if self.nextDownload:
-                self.currDownload = self.nextDownload
-                self.nextDownload = None
-                if self.currDownload.state == imObj.Ready:
-                    # download not already started, so start it already
-                    self.currDownload.fetchFile()
-            else:
-                self.currDownload = None
+        # start downloading the next image(s), if any
+        self.downloadingNameSet.discard(imObj.imageName)
+        self._startDownloads()
         
         # display focus plot (or clear it if info not available)
         if self.focusPlotTL:
@@ -1529,6 +1556,18 @@ class GuideWdg(Tkinter.Frame):
 
         return guideState.lower() not in self.OffStates
     
+    def queueDownload(self, imObj):
+        """Queue an image to be downloaded
+
+        At most _PrefetchLen images are kept in the queue; older images are dropped
+        (they will be downloaded if the user displays them).
+        """
+        if imObj in self.downloadQueue:
+            self.downloadQueue.remove(imObj)
+        self.downloadQueue.append(imObj)
+        del self.downloadQueue[0:-_PrefetchLen]
+        self._startDownloads()
+
     def redisplayImage(self, *args, **kargs):
         """Redisplay current image"""
         if self.dispImObj:
@@ -1569,6 +1608,7 @@ class GuideWdg(Tkinter.Frame):
             localBaseDir = localBaseDir,
             imageName = imageName,
             isLocal = True,
+            prepCache = self.prepCache,
         )
         self._trackMem(imObj, str(imObj))
         imObj.fetchFile()
@@ -1598,28 +1638,19 @@ class GuideWdg(Tkinter.Frame):
             sys.stderr.write("GuideWdg warning: expiring display image that was not in history")
             self.dispImObj.expire()
         
-        fitsIm = imObj.getFITSObj() # note: this sets various useful attributes of imObj
+        prepImage = imObj.prepImage # image data prepared by self.prepPool
         mask = None
-#        print "fitsIm=%s, self.gim.ismapped=%s" % (fitsIm, self.gim.winfo_ismapped())
+#        print "prepImage=%s, self.gim.ismapped=%s" % (prepImage, self.gim.winfo_ismapped())
         isPlateView = False
         plateInfo = None
         havePlateInfo = False
-        if fitsIm:
-            try:
-                plateInfo = self.plateViewAssembler(fitsIm)
-            except assembleImage.NoPlateInfo:
+        if prepImage:
+            plateInfo = prepImage.plateInfo
+            if prepImage.noPlateInfo:
                 if self.plateBtn.getBool():
                     errSevMsgList.append((RO.Constants.sevWarning, "No plate view: not a guider image"))
-            except assembleImage.AIException as e:
-                errSevMsgList.append(
-                    (RO.Constants.sevWarning, "No plate view: %s" % (RO.StringUtil.strFromException(e),))
-                )
-            except Exception as e:
-                errSevMsgList.append(
-                    (RO.Constants.sevError, "No plate view: %s" % (RO.StringUtil.strFromException(e),))
-                )
-                sys.stderr.write("Could not assemble plate view of %r:\n" % (imObj.localPath,))
-                traceback.print_exc(file=sys.stderr)
+            elif prepImage.plateErrSevMsg:
+                errSevMsgList.append(prepImage.plateErrSevMsg)
             havePlateInfo = plateInfo is not None
 
             self.plateBtn.setEnable(havePlateInfo)        
@@ -1631,206 +1662,62 @@ class GuideWdg(Tkinter.Frame):
                 mask = plateInfo.plateMaskArr
                 isPlateView = True
             else:
-                imArr = fitsIm[0].data
+                imArr = prepImage.imArr
                 if imArr is None:
                     self.gim.showMsg("Image %s has no data in plane 0" % (imObj.imageName,),
                         severity=RO.Constants.sevWarning)
                     return
-            
-                if len(fitsIm) > 1 and \
-                    fitsIm[1].data.shape == imArr.shape and \
-                    fitsIm[1].data.dtype == numpy.uint8:
-                    mask = fitsIm[1].data
+                mask = prepImage.maskArr
 
         else:
+            stateStr = imObj.getStateStr()
             if imObj.didFail:
                 sev = RO.Constants.sevNormal
             else:
                 if (imObj.state == imObj.Ready) and self.gim.winfo_ismapped():
                     # image not downloaded earlier because guide window was hidden at the time
                     # get it now
+                    self.downloadingNameSet.add(imObj.imageName)
                     imObj.fetchFile()
+                elif imObj.state == imObj.Downloaded:
+                    # image downloaded but not yet prepared for display
+                    self.prepPool.prepare(imObj, self._prepCallback)
+                    stateStr = "Loading"
                 sev = RO.Constants.sevNormal
-            self.gim.showMsg(imObj.getStateStr(), sev)
+            self.gim.showMsg(stateStr, sev)
             imArr = None
         
-        # display new data
-        self.gim.showArr(imArr, mask = mask)
+        # display new data; copy memory-mapped data so the display does not keep the file open
+        startTime = time.time()
+        self.gim.showArr(GuideImage.copyIfMemMapped(imArr), mask = GuideImage.copyIfMemMapped(mask))
         self.dispImObj = imObj
         self.imNameWdg.set(imObj.imageName)
         self.imNameWdg.xview("end")
         
         self.enableHistButtons()
         
-        if isPlateView:
-            # add plate annotations
-            for stampInfo in plateInfo.stampList:
-                doPutProbeLabelOnRight = True
-                if stampInfo.gpEnabled:
-                    # add vector showing star position error, if known
-                    if numpy.alltrue(numpy.isfinite(stampInfo.starRADecErrArcSec)):
-                        pointingErr = stampInfo.starRADecErrArcSec
-                        if pointingErr[0] >= 0:
-                            doPutProbeLabelOnRight = False
-                        pointingErrRTheta = RO.MathUtil.rThetaFromXY(pointingErr * (1, -1))
-                        annRadius = pointingErrRTheta[0] * ErrPixPerArcSec
-        #                print "add annotation at %s of radius %0.1f" % (stampInfo.decImCtrPos, annRadius)
-                        self.gim.addAnnotation(
-                            GImDisp.ann_Line,
-                            imPos = stampInfo.decImCtrPos,
-                            isImSize = False,
-                            rad = annRadius,
-                            angle = pointingErrRTheta[1],
-                            tags = _ErrTag,
-                            fill = "green",
-                        )
-                        
-                        # show uncertainty of position error? how? Also the info isn't available yet.
-                else:
-                    # put an X through the image
-                    self.gim.addAnnotation(
-                        GImDisp.ann_X,
-                        imPos = stampInfo.decImCtrPos,
-                        isImSize = True,
-                        rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
-                        tags = _ErrTag,
-                        fill = "red",
-                    )
-
-                # add text label showing guide probe number
-                probeName = makeGProbeName(stampInfo.gpNumber, stampInfo.gpBits)
-                boxWidth = stampInfo.image.shape[0] / 2.0
-                if doPutProbeLabelOnRight:
-                    anchor = "w"
-                    textPos = stampInfo.decImCtrPos + (boxWidth + 3, 0)
-                else:
-                    anchor = "e"
-                    textPos = stampInfo.decImCtrPos - (boxWidth + 1, 0)
-#                 print "num=%s; startPos=%s; ctrPos=%s; boxWidth=%s; textPos=%s" % \
-#                     (stampInfo.gpNumber, stampInfo.decImStartPos, stampInfo.decImCtrPos, boxWidth, textPos)
+        dispDoneTime = time.time()
+        
+        if havePlateInfo:
+            # add plate annotations (computed when the image was prepared) as a single annotation
+            annDisplayList = prepImage.annDisplayListDict.get(isPlateView)
+            if annDisplayList:
                 self.gim.addAnnotation(
-                    GImDisp.ann_Text,
-                    imPos = textPos,
-                    text = probeName,
-                    rad = 10,
-                    anchor = anchor,
+                    annDisplayList,
+                    imPos = (0, 0),
+                    rad = 0,
                     isImSize = False,
-                    tags = _ProbeNumTag,
-                    fill = "green",
+                    imWdg = self.gim,
+                    displayList = annDisplayList,
                 )
-                
-            # add N/E axis
-            axisLength = 25
-            axisMargin = 20
-            boxSize = axisLength + axisMargin
-            axisImPos = self.gim.imPosFromArrIJ(numpy.array(imArr.shape) - 1)
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
-                imPos = axisImPos,
-                cnvOffset = (-boxSize, boxSize),
-                rad = axisLength,
-                angle = 0,
-                isImSize = False,
-                tags = _ProbeNumTag,
-                fill = "green",
-                arrow = "last",
-            )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
-                text = "E",
-                imPos = axisImPos,
-                cnvOffset = (3-axisMargin, boxSize),
-                rad = 10,
-                anchor = "w",
-                isImSize = False,
-                tags = _ProbeNumTag,
-                fill = "green",
-            )
 
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
-                imPos = axisImPos,
-                cnvOffset = (-boxSize, boxSize),
-                rad = axisLength,
-                angle = -90,
-                isImSize = False,
-                tags = _ProbeNumTag,
-                fill = "green",
-                arrow = "last",
-            )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
-                text = "N",
-                imPos = axisImPos,
-                cnvOffset = (-boxSize, axisMargin),
-                rad = 10,
-                anchor = "s",
-                isImSize = False,
-                tags = _ProbeNumTag,
-                fill = "green",
-            )
-
-            # add scale
-            scaleCnvOffset = numpy.array((10, 20))
-            scaleLength = ErrPixPerArcSec
-            scaleImPos = self.gim.imPosFromCnvPos((0, 0))
-            self.gim.addAnnotation(
-                GImDisp.ann_Line,
-                imPos = scaleImPos,
-                cnvOffset = scaleCnvOffset,
-                rad = scaleLength,
-                angle = 0,
-                isImSize = False,
-                tags = _ErrTag,
-                fill = "green",
-            )
-            self.gim.addAnnotation(
-                GImDisp.ann_Text,
-                text = "1 arcsec",
-                imPos = scaleImPos,
-                cnvOffset = scaleCnvOffset,
-                anchor = "sw",
-                rad = 10,
-                isImSize = False,
-                tags = _ErrTag,
-                fill = "green",
-            )
-        elif havePlateInfo:
-            # add probe names as annotation to the unassembled image
-            for stampInfo in plateInfo.stampList:
-                doPutProbeLabelOnRight = True
-                if not stampInfo.gpEnabled:
-                    # put an X through the image
-                    self.gim.addAnnotation(
-                        GImDisp.ann_X,
-                        imPos = stampInfo.gpCtr,
-                        isImSize = True,
-                        rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
-                        tags = _ErrTag,
-                        fill = "red",
-                    )
-
-                # add text label showing guide probe number
-                probeName = makeGProbeName(stampInfo.gpNumber, stampInfo.gpBits)
-                boxWidth = stampInfo.image.shape[0] / 2.0
-                if doPutProbeLabelOnRight:
-                    anchor = "w"
-                    textPos = stampInfo.gpCtr + (boxWidth + 3, 0)
-                else:
-                    anchor = "e"
-                    textPos = stampInfo.gpCtr - (boxWidth + 1, 0)
-#                 print "num=%s; startPos=%s; ctrPos=%s; boxWidth=%s; textPos=%s" % \
-#                     (stampInfo.gpNumber, stampInfo.decImStartPos, stampInfo.decImCtrPos, boxWidth, textPos)
-                self.gim.addAnnotation(
-                    GImDisp.ann_Text,
-                    imPos = textPos,
-                    text = probeName,
-                    rad = 10,
-                    anchor = anchor,
-                    isImSize = False,
-                    tags = _ProbeNumTag,
-                    fill = "green",
-                )
+        if imArr is not None:
+            annDoneTime = time.time()
+            self.renderTimer.record("display", dispDoneTime - startTime)
+            self.renderTimer.record("annotate", annDoneTime - dispDoneTime)
+            if _DebugTiming:
+                print "showImage(%s): display=%0.1f ms; annotate=%0.1f ms" % \
+                    (imObj.imageName, (dispDoneTime - startTime) * 1000, (annDoneTime - dispDoneTime) * 1000)
 
         if errSevMsgList:
             errSevMsgList.sort()
@@ -1915,21 +1802,16 @@ class GuideWdg(Tkinter.Frame):
             imageName = imageName,
             downloadWdg = self.downloadWdg,
             fetchCallFunc = self.fetchCallback,
+            prepCache = self.prepCache,
         )
         self._trackMem(imObj, str(imObj))
         self.addImToHist(imObj)
         
         if self.gim.winfo_ismapped() or (self.focusPlotTL and self.focusPlotTL.getVisible()):
-            if not self.currDownload:
-                # nothing being downloaded, start downloading this image
-                self.currDownload = imObj
-                imObj.fetchFile()
-                if (self.dispImObj is None or self.dispImObj.didFail) and self.showCurrWdg.getBool():
-                    # nothing already showing so display the "downloading" message for this image
-                    self.showImage(imObj)
-            else:
-                # queue this up to be downloaded (replacing any image already there)
-                self.nextDownload = imObj
+            self.queueDownload(imObj)
+            if (self.dispImObj is None or self.dispImObj.didFail) and self.showCurrWdg.getBool():
+                # nothing already showing so display the "downloading" message for this image
+                self.showImage(imObj)
         elif self.showCurrWdg.getBool():
             self.showImage(imObj)
         
@@ -1953,6 +1835,55 @@ class GuideWdg(Tkinter.Frame):
                 isNewest = False
         self.enableHistButtons()
     
+    def _isNewerThanDisp(self, imObj):
+        """Return True if imObj is newer than the displayed image (or no image is displayed)
+        """
+        revHist, currInd = self.getHistInfo()
+        if currInd is None:
+            return True
+        try:
+            return revHist.index(imObj.imageName) < currInd
+        except ValueError:
+            return False
+
+    def _prefetchHist(self, ind):
+        """Download and prepare the image at the specified index of reversed history, if not already done
+        """
+        revHist = self.imObjDict.keys()
+        if not 0 <= ind < len(revHist):
+            return
+        imObj = self.imObjDict[revHist[ind]]
+        if imObj.state == imObj.Ready:
+            if self.gim.winfo_ismapped():
+                self.queueDownload(imObj)
+        elif imObj.state == imObj.Downloaded and not imObj.isPrepared:
+            self.prepPool.prepare(imObj, self._prepCallback)
+
+    def _prepCallback(self, imObj, prepImage):
+        """Called (in the main thread) when self.prepPool has prepared an image for display
+        """
+        imObj.setPreparedImage(prepImage)
+        self.renderTimer.recordDict(prepImage.timeDict)
+        if imObj.imageName not in self.imObjDict:
+            # image has been purged from history
+            return
+        if self.isDispObj(imObj):
+            self.showImage(imObj)
+        elif self.showCurrWdg.getBool() and self._isNewerThanDisp(imObj):
+            # a new image is ready; display it
+            self.showImage(imObj)
+
+    def _startDownloads(self):
+        """Start downloading queued images, newest first, up to _MaxDownloads at a time
+        """
+        while self.downloadQueue and len(self.downloadingNameSet) < _MaxDownloads:
+            imObj = self.downloadQueue.pop()
+            if imObj.state != imObj.Ready or imObj.imageName not in self.imObjDict:
+                # already downloaded (or started downloading) or purged from history
+                continue
+            self.downloadingNameSet.add(imObj.imageName)
+            imObj.fetchFile()
+
     def _guideStateCallback(self, keyVar):
         """Guide state callback
         """
@@ -2055,24 +1986,38 @@ class GuideWdg(Tkinter.Frame):
         """
         for imObj in self.imObjDict.itervalues():
             imObj.expire()
+        if _DebugTiming:
+            print "\n".join(["%s image timing:" % (self.actor,)] + self.renderTimer.getReport())
+
+def annDisplayList(cnv, xpos, ypos, rad, imWdg, displayList, tags=()):
+    """Draw all annotations in a PlateView.AnnDisplayList; an annotation type for GrayImageWdg.addAnnotation
+
+    Canvas positions are computed for all items at once;
+    the annotation is redrawn whenever the image is zoomed or scrolled.
 
-def makeGProbeName(gprobeNum, gprobeBits):
-    """Construct a guide probe name from its number and gProbeBits
-    
     Inputs:
-    gprobeNum: guide probe number (an integer, though a string will do)
-    gprobeBits: guide probe bits; if None then the above/below focus suffix is not added
+    - cnv: canvas on which to draw
+    - xpos, ypos, rad: ignored
+    - imWdg: the GrayImageWdg (not named gim, because GrayImageWdg.addAnnotation passes gim to Annotation)
+    - displayList: annotations to draw (a PlateView.AnnDisplayList)
+    - tags: tags for all items; the tag of each item (if any) is added
     """
-    if gprobeBits is None:
-        suffixStr = ""
-    elif gprobeBits & 1<<3 != 0:
-        suffixStr = _AboveFocusStr
-    elif gprobeBits & 1<<4 != 0:
-        suffixStr = _BelowFocusStr
-    else:
-        suffixStr = ""
-    return str(gprobeNum) + suffixStr
-
+    imPosArr, cnvOffsetArr, radArr, isImSizeArr = displayList.getArrays()
+    # cnvPosFromImPos only does arithmetic on each axis, so it converts arrays of positions
+    cnvXArr, cnvYArr = imWdg.cnvPosFromImPos((imPosArr[:, 0], imPosArr[:, 1]))
+    # items with no image position are relative to the canvas origin
+    isCnvRel = numpy.isnan(imPosArr[:, 0])
+    cnvXArr[isCnvRel] = 0
+    cnvYArr[isCnvRel] = 0
+    cnvXArr += cnvOffsetArr[:, 0]
+    cnvYArr += cnvOffsetArr[:, 1]
+    cnvRadArr = numpy.where(isImSizeArr, radArr * imWdg.zoomFac, radArr).round().astype(int)
+    tags = tuple(tags)
+    for ind, annName in enumerate(displayList.annNameList):
+        itemTag = displayList.tagList[ind]
+        itemTags = tags + (itemTag,) if itemTag else tags
+        getattr(GImDisp, "ann_" + annName)(cnv, cnvXArr[ind], cnvYArr[ind], int(cnvRadArr[ind]),
+            tags = itemTags, **displayList.kargsList[ind])
 
 if __name__ == "__main__":
     import GuideTest
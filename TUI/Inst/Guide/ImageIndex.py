@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+"""An index of a directory of guide images (e.g. gcam and gproc files), for browsing them offline
+
+The index records, for each FITS file in the directory, a few header values
+(EXPTIME, BINX, SDSSFMT and SEEING) and the guide probe table (see GuideImage.readProbeTable).
+It is saved in the directory as file IndexFileName, so a directory need only be read once;
+after that, only files that are new or have changed since the index was saved are read.
+
+All data is held in numpy arrays, so images can be filtered and looked up quickly.
+This module does not use Tk, so an index may be built in a background thread.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Bug fix: update returned 0 if files were only removed, so the index was not saved.
+"""
+import fnmatch
+import os
+import sys
+import traceback
+
+import numpy
+import pyfits
+import RO.StringUtil
+import GuideImage
+
+__all__ = ["ImageIndex"]
+
+IndexFileName = "guideImageIndex.npz"
+IndexVersion = 1
+
+# suffixes of files to index (compared in lowercase)
+FITSSuffixes = (".fits", ".fit", ".fits.gz", ".fit.gz")
+
+# fields of per-image data, in order
+ImageDType = numpy.dtype([
+    ("fileSize", numpy.int64), # file size (bytes); used to detect changed files
+    ("fileMTime", float), # file modification time (POSIX timestamp); used to detect changed files
+    ("isReadable", bool), # could the file be read?
+    ("expTime", float), # EXPTIME header value (sec); NaN if unknown
+    ("binFac", float), # BINX header value; NaN if unknown
+    ("seeing", float), # SEEING header value (arcsec); NaN if unknown
+    ("sdssFmt", "S32"), # SDSSFMT header value, e.g. "gproc 1 4"; "" if unknown
+    ("probeStart", int), # index of first guide probe of this image in probeArr
+    ("numProbes", int), # number of guide probes of this image in probeArr
+])
+
+class ImageIndex(object):
+    """An index of the guide images in one directory
+
+    Fields:
+    - dirPath: path to directory
+    - imageNames: names of indexed files (relative to dirPath), sorted by name
+    - imageArr: data for each image (a numpy structured array with dtype ImageDType,
+        in the same order as imageNames)
+    - probeArr: guide probe table of all images (a numpy structured array with dtype GuideImage.ProbeDType);
+        use getProbeData to get the table for one image
+    """
+    def __init__(self, dirPath):
+        """Create an ImageIndex, reading the saved index file (if any)
+
+        Call update to index new or changed files.
+
+        Inputs:
+        - dirPath: path to directory of guide images
+        """
+        self.dirPath = dirPath
+        self._setData([], numpy.zeros(0, dtype=ImageDType), numpy.zeros(0, dtype=GuideImage.ProbeDType))
+        self._load()
+
+    @property
+    def indexPath(self):
+        """Return the path to the index file"""
+        return os.path.join(self.dirPath, IndexFileName)
+
+    def filter(self,
+        namePattern = None,
+        sdssFmtType = None,
+        minExpTime = None,
+        maxExpTime = None,
+        maxSeeing = None,
+    ):
+        """Return the indices of images that match all specified criteria, as a numpy int array
+
+        Inputs:
+        - namePattern: image name pattern (as used by fnmatch, e.g. "gimg-*.fits"), or None for any
+        - sdssFmtType: image format type, e.g. "gproc" (as in SDSSFMT; case is ignored), or None for any
+        - minExpTime: minimum exposure time (sec), or None for no limit
+        - maxExpTime: maximum exposure time (sec), or None for no limit
+        - maxSeeing: maximum seeing (arcsec), or None for no limit; images with unknown seeing are rejected
+
+        Images that could not be read are always rejected.
+        """
+        isMatch = self.imageArr["isReadable"].copy()
+        with numpy.errstate(invalid="ignore"):
+            if minExpTime is not None:
+                isMatch &= self.imageArr["expTime"] >= minExpTime
+            if maxExpTime is not None:
+                isMatch &= self.imageArr["expTime"] <= maxExpTime
+            if maxSeeing is not None:
+                isMatch &= self.imageArr["seeing"] <= maxSeeing
+        if sdssFmtType:
+            fmtTypeArr = numpy.array([fmtStr.split(" ", 1)[0].lower() for fmtStr in self.imageArr["sdssFmt"]])
+            isMatch &= fmtTypeArr == sdssFmtType.lower()
+        if namePattern:
+            isMatch &= numpy.array([fnmatch.fnmatch(name, namePattern) for name in self.imageNames], dtype=bool)
+        return numpy.flatnonzero(isMatch)
+
+    def findName(self, imageName):
+        """Return the index of the named image, or None if not found
+        """
+        return self._nameIndDict.get(imageName)
+
+    def getPath(self, ind):
+        """Return the path to an image, given its index
+        """
+        return os.path.join(self.dirPath, self.imageNames[ind])
+
+    def getProbeData(self, ind):
+        """Return the guide probe table of an image, given its index
+
+        Returns a numpy structured array with dtype GuideImage.ProbeDType
+        (with no entries if the image has no probe table).
+        """
+        probeStart = self.imageArr["probeStart"][ind]
+        numProbes = self.imageArr["numProbes"][ind]
+        return self.probeArr[probeStart:probeStart + numProbes]
+
+    def save(self):
+        """Save the index to the index file
+
+        Raise RuntimeError if the file cannot be written.
+        """
+        tempPath = self.indexPath + ".tmp"
+        try:
+            with open(tempPath, "wb") as outFile:
+                numpy.savez(outFile,
+                    version = numpy.array(IndexVersion),
+                    imageNames = numpy.array(self.imageNames, dtype=str),
+                    imageArr = self.imageArr,
+                    probeArr = self.probeArr,
+                )
+            if os.path.exists(self.indexPath):
+                # os.rename will not replace an existing file on Windows
+                os.remove(self.indexPath)
+            os.rename(tempPath, self.indexPath)
+        except Exception as e:
+            raise RuntimeError("Could not write index file %r: %s" % (self.indexPath, RO.StringUtil.strFromException(e)))
+
+    def update(self, progressFunc=None):
+        """Index new and changed files, and forget files that no longer exist
+
+        Inputs:
+        - progressFunc: a function to call after reading each file, or None;
+            it receives two arguments: the number of files read so far and the number to read
+
+        Returns the number of files that were read or removed from the index
+        (0 if the index was already up to date, so there is no need to save it).
+        Files that have not changed since they were indexed are not read.
+        """
+        # find files to index and determine which must be read
+        statList = [] # list of (imageName, os.stat result, index in old data or None if file must be read)
+        for imageName in sorted(os.listdir(self.dirPath)):
+            if not imageName.lower().endswith(FITSSuffixes):
+                continue
+            filePath = os.path.join(self.dirPath, imageName)
+            if not os.path.isfile(filePath):
+                continue
+            try:
+                fileStat = os.stat(filePath)
+            except OSError:
+                continue
+            oldInd = self._nameIndDict.get(imageName)
+            if oldInd is not None and (self.imageArr["fileSize"][oldInd] != fileStat.st_size \
+                or self.imageArr["fileMTime"][oldInd] != fileStat.st_mtime):
+                oldInd = None
+            statList.append((imageName, fileStat, oldInd))
+        numToRead = sum(1 for statInfo in statList if statInfo[2] is None)
+        numRemoved = len(self.imageNames) - (len(statList) - numToRead)
+        if numToRead == 0 and numRemoved == 0:
+            return 0
+
+        imageArr = numpy.zeros(len(statList), dtype=ImageDType)
+        probeDataList = []
+        numRead = 0
+        numProbes = 0
+        for ind, (imageName, fileStat, oldInd) in enumerate(statList):
+            if oldInd is not None:
+                imageArr[ind] = self.imageArr[oldInd]
+                probeData = self.getProbeData(oldInd)
+            else:
+                imageArr[ind], probeData = _readImage(os.path.join(self.dirPath, imageName))
+                imageArr["fileSize"][ind] = fileStat.st_size
+                imageArr["fileMTime"][ind] = fileStat.st_mtime
+                numRead += 1
+                if progressFunc:
+                    progressFunc(numRead, numToRead)
+            imageArr["probeStart"][ind] = numProbes
+            imageArr["numProbes"][ind] = len(probeData)
+            numProbes += len(probeData)
+            probeDataList.append(probeData)
+
+        if probeDataList:
+            probeArr = numpy.concatenate(probeDataList)
+        else:
+            probeArr = numpy.zeros(0, dtype=GuideImage.ProbeDType)
+        self._setData(
+            imageNames = [statInfo[0] for statInfo in statList],
+            imageArr = imageArr,
+            probeArr = probeArr,
+        )
+        return numRead + numRemoved
+
+    def __len__(self):
+        return len(self.imageNames)
+
+    def _load(self):
+        """Load the index file, if it exists and is usable; on failure the index is left empty
+        """
+        if not os.path.isfile(self.indexPath):
+            return
+        try:
+            with open(self.indexPath, "rb") as inFile:
+                indexData = numpy.load(inFile)
+                if int(indexData["version"]) != IndexVersion:
+                    return
+                imageArr = indexData["imageArr"]
+                probeArr = indexData["probeArr"]
+                imageNames = list(indexData["imageNames"])
+            if imageArr.dtype != ImageDType or probeArr.dtype != GuideImage.ProbeDType \
+                or len(imageNames) != len(imageArr):
+                return
+        except Exception as e:
+            sys.stderr.write("Ignoring unreadable guide image index %r: %s\n" % \
+                (self.indexPath, RO.StringUtil.strFromException(e)))
+            return
+        self._setData(imageNames, imageArr, probeArr)
+
+    def _setData(self, imageNames, imageArr, probeArr):
+        """Set the index data
+        """
+        self.imageNames = list(imageNames)
+        self.imageArr = imageArr
+        self.probeArr = probeArr
+        self._nameIndDict = dict((name, ind) for ind, name in enumerate(self.imageNames))
+
+
+def _readImage(filePath):
+    """Read index data for one image file
+
+    Returns (imageData, probeData), where:
+    - imageData is a numpy record with dtype ImageDType (with probeStart and numProbes not set);
+        isReadable is False if the file could not be read
+    - probeData is the guide probe table (see GuideImage.readProbeTable),
+        with no entries if the file has none or could not be read
+    """
+    imageData = numpy.zeros(1, dtype=ImageDType)[0]
+    for name in ("expTime", "binFac", "seeing"):
+        imageData[name] = numpy.nan
+    probeData = numpy.zeros(0, dtype=GuideImage.ProbeDType)
+    try:
+        fitsIm = pyfits.open(filePath, ignore_missing_end=True, memmap=True)
+    except Exception:
+        return imageData, probeData
+    try:
+        imHdr = fitsIm[0].header
+        imageData["isReadable"] = True
+        for name, hdrName in (("expTime", "EXPTIME"), ("binFac", "BINX"), ("seeing", "SEEING")):
+            try:
+                imageData[name] = float(imHdr[hdrName])
+            except Exception:
+                pass
+        imageData["sdssFmt"] = str(imHdr.get("SDSSFMT", "")).strip()
+        if imageData["sdssFmt"].lower().startswith(GuideImage.SDSSFmtType):
+            try:
+                probeData = GuideImage.readProbeTable(fitsIm)
+            except Exception:
+                sys.stderr.write("Could not read guide probe table of %r:\n" % (filePath,))
+                traceback.print_exc(file=sys.stderr)
+    except Exception:
+        imageData["isReadable"] = False
+    finally:
+        fitsIm.close()
+    return imageData, probeData
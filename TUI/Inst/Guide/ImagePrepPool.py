@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""Prepare guide images for display using a pool of background threads
+
+Reading a guide image and assembling its plate view takes long enough to make the user interface
+sluggish, so it is done in background threads. The results are reported in the main thread.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Share one pool (see getPool); each request has its own callback function
+                    and images are identified by local path.
+"""
+import sys
+import threading
+import traceback
+
+from opscore.utility import assembleImage
+import RO.StringUtil
+import TUI.Models
+import GuideImage
+
+__all__ = ["ImagePrepPool", "getPool"]
+
+class ImagePrepPool(object):
+    """A pool of threads that read guide images and assemble plate views
+
+    Requests are handled newest first. When an image has been prepared, the callback function
+    of each request for it is called in the main thread as callFunc(imObj, prepImage),
+    where prepImage is a GuideImage.PreparedImage. Images are identified by local path,
+    so requests for the same file (e.g. from the guide window and the guide image browser)
+    are prepared once.
+    """
+    def __init__(self,
+        numThreads = 2,
+        maxPending = 10,
+        relSize = 0.5,
+    ):
+        """Inputs:
+        - numThreads: number of worker threads
+        - maxPending: maximum number of images waiting to be prepared; if exceeded the oldest requests are dropped
+        - relSize: relative size of guide probe images in the plate view (see assembleImage.AssembleImage)
+        """
+        self.maxPending = int(maxPending)
+        self.relSize = relSize
+        self._reactor = TUI.Models.getModel("tui").reactor
+        self._cond = threading.Condition()
+        self._pendingList = [] # local paths of images waiting to be prepared; newest last
+        self._requestDict = {} # dict of local path: list of (imObj, callFunc),
+            # for images waiting to be prepared or being prepared
+        for ind in range(numThreads):
+            thread = threading.Thread(target=self._run, name="GuideImagePrep%d" % (ind,))
+            thread.daemon = True
+            thread.start()
+
+    def isBusy(self, imObj):
+        """Return True if imObj is waiting to be prepared or being prepared
+        """
+        return imObj.localPath in self._requestDict
+
+    def prepare(self, imObj, callFunc):
+        """Request that an image be prepared
+
+        If the image is already waiting then it is moved to the front of the queue.
+        Call only from the main thread.
+
+        Inputs:
+        - imObj: the image (a GuideImage.GuideImage)
+        - callFunc: function to call (in the main thread) when the image has been prepared
+        """
+        localPath = imObj.localPath
+        with self._cond:
+            requestList = self._requestDict.get(localPath)
+            if requestList is None:
+                self._requestDict[localPath] = [(imObj, callFunc)]
+            else:
+                if (imObj, callFunc) not in requestList:
+                    requestList.append((imObj, callFunc))
+                if localPath in self._pendingList:
+                    self._pendingList.remove(localPath)
+                else:
+                    # already being prepared
+                    return
+            self._pendingList.append(localPath)
+            if len(self._pendingList) > self.maxPending:
+                for droppedPath in self._pendingList[0:-self.maxPending]:
+                    del self._requestDict[droppedPath]
+                del self._pendingList[0:-self.maxPending]
+            self._cond.notify()
+
+    def _prepDone(self, localPath, prepImage):
+        """Report a prepared image; called in the main thread
+        """
+        with self._cond:
+            requestList = self._requestDict.pop(localPath, ())
+        for imObj, callFunc in requestList:
+            try:
+                callFunc(imObj, prepImage)
+            except Exception:
+                sys.stderr.write("ImagePrepPool callback %s failed:\n" % (callFunc,))
+                traceback.print_exc(file=sys.stderr)
+
+    def _run(self):
+        """Prepare images; the body of each worker thread
+        """
+        # each thread has its own assembler, because assemblers are not known to be thread safe
+        plateViewAssembler = assembleImage.AssembleImage(relSize=self.relSize)
+        while True:
+            with self._cond:
+                while not self._pendingList:
+                    self._cond.wait()
+                localPath = self._pendingList.pop()
+            try:
+                prepImage = GuideImage.prepareImage(localPath, plateViewAssembler)
+            except Exception as e:
+                prepImage = GuideImage.PreparedImage(readErrMsg=RO.StringUtil.strFromException(e))
+            self._reactor.callFromThread(self._prepDone, localPath, prepImage)
+
+
+_thePool = None
+
+def getPool():
+    """Return the ImagePrepPool shared by the guide windows and the guide image browser
+    """
+    global _thePool
+    if _thePool is None:
+        _thePool = ImagePrepPool()
+    return _thePool
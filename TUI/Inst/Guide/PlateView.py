@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+"""Annotations for guide images that have plate view information
+
+makeAnnDisplayList computes all annotations for a guide image (error vectors, X marks
+for disabled probes, probe labels, N/E axes and scale bar) as an AnnDisplayList.
+This requires no Tk, so it is done when the image is prepared (in a background thread;
+see GuideImage.prepareImage) and the result is cached with the prepared image.
+GuideWdg then draws the whole display list as a single GrayImageWdg annotation.
+
+RenderTimer accumulates the time taken by each stage of preparing and displaying guide images.
+
+History:
+2026-10-18          Initial version. Extracted ErrPixPerArcSec, DisabledProbeXSizeFactor and makeGProbeName
+                    from GuideWdg and the plate view annotation code from GuideWdg.showImage.
+"""
+import numpy
+import RO.MathUtil
+
+__all__ = ["AnnDisplayList", "makeAnnDisplayList", "makeGProbeName", "RenderTimer"]
+
+ErrTag = "poserr"
+ProbeNumTag = "probeNum"
+
+_AboveFocusStr = "+" # u"\N{UPWARDS ARROW}"
+_BelowFocusStr = "-" # u"\N{DOWNWARDS ARROW}"
+
+ErrPixPerArcSec = 40 # pixels per arcsec of error on the plug plate
+
+DisabledProbeXSizeFactor = 1.0
+
+class AnnDisplayList(object):
+    """A list of image annotations, to be drawn as a batch
+
+    Each annotation is described as for RO.Wdg.GrayImageDispWdg.GrayImageWdg.addAnnotation,
+    except the annotation type is a name, e.g. "Line" for RO.Wdg.GrayImageDispWdg.ann_Line.
+    """
+    def __init__(self):
+        self.annNameList = [] # annotation type name of each annotation
+        self.tagList = [] # tag of each annotation, or None
+        self.kargsList = [] # dict of additional keyword arguments for each annotation
+        self._imPosList = []
+        self._cnvOffsetList = []
+        self._radList = []
+        self._isImSizeList = []
+        self._arrays = None
+
+    def add(self, annName, imPos, rad, cnvOffset=(0, 0), isImSize=True, tag=None, **kargs):
+        """Add an annotation
+
+        Inputs:
+        - annName: name of annotation type: "Circle", "Line", "Plus", "Text" or "X"
+        - imPos: image position of annotation; if None then the position is the canvas origin
+            (so the annotation does not move when the image is scrolled)
+        - rad, cnvOffset, isImSize: see RO.Wdg.GrayImageDispWdg.GrayImageWdg.addAnnotation
+        - tag: one tag for the annotation, or None
+        **kargs: additional arguments for the annotation type, e.g. fill
+        """
+        self.annNameList.append(annName)
+        self.tagList.append(tag)
+        self.kargsList.append(kargs)
+        if imPos is None:
+            self._imPosList.append((numpy.nan, numpy.nan))
+        else:
+            self._imPosList.append(tuple(imPos))
+        self._cnvOffsetList.append(tuple(cnvOffset))
+        self._radList.append(rad)
+        self._isImSizeList.append(bool(isImSize))
+        self._arrays = None
+
+    def getArrays(self):
+        """Return (imPosArr, cnvOffsetArr, radArr, isImSizeArr) as numpy arrays with one entry per annotation
+
+        - imPosArr: image position (an Nx2 float array); NaN if relative to the canvas origin
+        - cnvOffsetArr: canvas offset (an Nx2 int array)
+        - radArr: radius (a float array)
+        - isImSizeArr: True if radius is in image pixels, False if in canvas pixels (a bool array)
+        """
+        if self._arrays is None:
+            numAnn = len(self.annNameList)
+            self._arrays = (
+                numpy.array(self._imPosList, dtype=float).reshape(numAnn, 2),
+                numpy.array(self._cnvOffsetList, dtype=int).reshape(numAnn, 2),
+                numpy.array(self._radList, dtype=float),
+                numpy.array(self._isImSizeList, dtype=bool),
+            )
+        return self._arrays
+
+    def __len__(self):
+        return len(self.annNameList)
+
+
+def makeAnnDisplayList(plateInfo, imShape, isPlateView):
+    """Return annotations for a guide image that has plate view information, as an AnnDisplayList
+
+    Inputs:
+    - plateInfo: plate view information, as returned by assembleImage.AssembleImage
+    - imShape: shape of the displayed image array
+    - isPlateView: True if the plate view is displayed, False if the unassembled image is displayed
+    """
+    annList = AnnDisplayList()
+    if isPlateView:
+        for stampInfo in plateInfo.stampList:
+            doPutProbeLabelOnRight = True
+            if stampInfo.gpEnabled:
+                # add vector showing star position error, if known
+                if numpy.alltrue(numpy.isfinite(stampInfo.starRADecErrArcSec)):
+                    pointingErr = stampInfo.starRADecErrArcSec
+                    if pointingErr[0] >= 0:
+                        doPutProbeLabelOnRight = False
+                    pointingErrRTheta = RO.MathUtil.rThetaFromXY(pointingErr * (1, -1))
+                    annList.add(
+                        "Line",
+                        imPos = stampInfo.decImCtrPos,
+                        isImSize = False,
+                        rad = pointingErrRTheta[0] * ErrPixPerArcSec,
+                        angle = pointingErrRTheta[1],
+                        tag = ErrTag,
+                        fill = "green",
+                    )
+            else:
+                # put an X through the image
+                annList.add(
+                    "X",
+                    imPos = stampInfo.decImCtrPos,
+                    isImSize = True,
+                    rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
+                    tag = ErrTag,
+                    fill = "red",
+                )
+            _addProbeLabel(annList, stampInfo, stampInfo.decImCtrPos, doPutProbeLabelOnRight)
+
+        # add N/E axis
+        axisLength = 25
+        axisMargin = 20
+        boxSize = axisLength + axisMargin
+        axisImPos = (float(imShape[1] - 1), float(imShape[0] - 1))
+        for angle, text, textOffset, anchor in (
+            (0, "E", (3 - axisMargin, boxSize), "w"),
+            (-90, "N", (-boxSize, axisMargin), "s"),
+        ):
+            annList.add(
+                "Line",
+                imPos = axisImPos,
+                cnvOffset = (-boxSize, boxSize),
+                rad = axisLength,
+                angle = angle,
+                isImSize = False,
+                tag = ProbeNumTag,
+                fill = "green",
+                arrow = "last",
+            )
+            annList.add(
+                "Text",
+                text = text,
+                imPos = axisImPos,
+                cnvOffset = textOffset,
+                rad = 10,
+                anchor = anchor,
+                isImSize = False,
+                tag = ProbeNumTag,
+                fill = "green",
+            )
+
+        # add scale, at the canvas origin
+        scaleCnvOffset = (10, 20)
+        annList.add(
+            "Line",
+            imPos = None,
+            cnvOffset = scaleCnvOffset,
+            rad = ErrPixPerArcSec,
+            angle = 0,
+            isImSize = False,
+            tag = ErrTag,
+            fill = "green",
+        )
+        annList.add(
+            "Text",
+            text = "1 arcsec",
+            imPos = None,
+            cnvOffset = scaleCnvOffset,
+            anchor = "sw",
+            rad = 10,
+            isImSize = False,
+            tag = ErrTag,
+            fill = "green",
+        )
+    else:
+        # add probe names as annotation to the unassembled image
+        for stampInfo in plateInfo.stampList:
+            if not stampInfo.gpEnabled:
+                # put an X through the image
+                annList.add(
+                    "X",
+                    imPos = stampInfo.gpCtr,
+                    isImSize = True,
+                    rad = stampInfo.getRadius() * DisabledProbeXSizeFactor,
+                    tag = ErrTag,
+                    fill = "red",
+                )
+            _addProbeLabel(annList, stampInfo, stampInfo.gpCtr, True)
+    return annList
+
+def _addProbeLabel(annList, stampInfo, ctrPos, doPutProbeLabelOnRight):
+    """Add a text label showing the guide probe name
+
+    Inputs:
+    - annList: an AnnDisplayList
+    - stampInfo: guide probe stamp information
+    - ctrPos: image position of the center of the probe
+    - doPutProbeLabelOnRight: put the label to the right of the probe? else to the left
+    """
+    probeName = makeGProbeName(stampInfo.gpNumber, stampInfo.gpBits)
+    boxWidth = stampInfo.image.shape[0] / 2.0
+    if doPutProbeLabelOnRight:
+        anchor = "w"
+        textPos = numpy.add(ctrPos, (boxWidth + 3, 0))
+    else:
+        anchor = "e"
+        textPos = numpy.subtract(ctrPos, (boxWidth + 1, 0))
+    annList.add(
+        "Text",
+        imPos = textPos,
+        text = probeName,
+        rad = 10,
+        anchor = anchor,
+        isImSize = False,
+        tag = ProbeNumTag,
+        fill = "green",
+    )
+
+def makeGProbeName(gprobeNum, gprobeBits):
+    """Construct a guide probe name from its number and gProbeBits
+
+    Inputs:
+    gprobeNum: guide probe number (an integer, though a string will do)
+    gprobeBits: guide probe bits; if None then the above/below focus suffix is not added
+    """
+    if gprobeBits is None:
+        suffixStr = ""
+    elif gprobeBits & 1<<3 != 0:
+        suffixStr = _AboveFocusStr
+    elif gprobeBits & 1<<4 != 0:
+        suffixStr = _BelowFocusStr
+    else:
+        suffixStr = ""
+    return str(gprobeNum) + suffixStr
+
+
+class RenderTimer(object):
+    """Accumulate the time taken by each stage of preparing and displaying guide images
+    """
+    def __init__(self):
+        self.stageDict = {} # dict of stage name: [number of times, total time, maximum time]
+
+    def clear(self):
+        """Discard all data
+        """
+        self.stageDict = {}
+
+    def record(self, stage, dTime):
+        """Record the time taken by one stage
+
+        Inputs:
+        - stage: name of stage, e.g. "assemble"
+        - dTime: time taken (sec)
+        """
+        stageData = self.stageDict.get(stage)
+        if stageData is None:
+            self.stageDict[stage] = [1, dTime, dTime]
+        else:
+            stageData[0] += 1
+            stageData[1] += dTime
+            stageData[2] = max(stageData[2], dTime)
+
+    def recordDict(self, timeDict):
+        """Record the times in a dict of stage: time taken (sec)
+        """
+        for stage, dTime in timeDict.iteritems():
+            self.record(stage, dTime)
+
+    def getReport(self):
+        """Return a report of mean and maximum time per stage, as a list of lines
+        """
+        lineList = ["%-12s %6s %10s %10s" % ("stage", "count", "mean ms", "max ms")]
+        for stage, (num, totTime, maxTime) in sorted(self.stageDict.iteritems()):
+            lineList.append("%-12s %6d %10.1f %10.1f" % (stage, num, totTime * 1000.0 / num, maxTime * 1000.0))
+        return lineList
@@ -5,6 +5,8 @@ History:
 2012-04-23 Elena Malanushenko, converted from a script to a window by Russell Owen
 2012-06-04 ROwen    Fix clear button.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Do not show model flux recorded before the window was opened,
+                    since fluxFun depends on the current probe and expTime.
 """
 import Tkinter
 import matplotlib
@@ -72,6 +74,7 @@ class FluxMonitorWdg(Tkinter.Frame):
             keyVar = self.guiderModel.probe,
             keyInd = 7,
             func = fluxFun,
+            useHistory = False,
             color = "green",
         )
         self.stripChartWdg.showY(0.0, 1.0, subplotInd=0)
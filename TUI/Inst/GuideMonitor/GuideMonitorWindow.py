@@ -18,10 +18,10 @@ History:
 2013-03-21 ROwen    Modified to use guider keyword gprobeBits instead of synthetic keyword fullGProbeBits
                     now that ticket #433 is fixed!
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Updated for StripChartWdg.plotKeyVar func receiving the position of a PVT.
 """
 import Tkinter
 import matplotlib
-import RO.CnvUtil
 import RO.PhysConst
 import RO.Wdg
 import TUI.Base.StripChartWdg
@@ -76,14 +76,14 @@ class GuideMonitorWdg(Tkinter.Frame):
         subplotInd = 0
         
         # RA/Dec arc offset subplot
-        def arcsecFromPVT(val):
-            return 3600.0 * RO.CnvUtil.posFromPVT(val)
+        def arcsecFromDeg(val):
+            return 3600.0 * val
         self.stripChartWdg.plotKeyVar(
             label="RA net offset",
             subplotInd=subplotInd,
             keyVar=self.tccModel.objArcOff,
             keyInd=0,
-            func=arcsecFromPVT,
+            func=arcsecFromDeg,
             color="blue",
             drawstyle="steps-post",
         )
@@ -112,7 +112,7 @@ class GuideMonitorWdg(Tkinter.Frame):
             subplotInd=subplotInd,
             keyVar=self.tccModel.objArcOff,
             keyInd=1,
-            func=arcsecFromPVT,
+            func=arcsecFromDeg,
             color="blue",
             drawstyle="steps-post",
         )
@@ -142,7 +142,7 @@ class GuideMonitorWdg(Tkinter.Frame):
             subplotInd=subplotInd,
             keyVar=self.tccModel.guideOff,
             keyInd=2,
-            func=arcsecFromPVT,
+            func=arcsecFromDeg,
             color="blue",
             drawstyle="steps-post",
         )
@@ -64,22 +64,34 @@ This is the main routine that calls everything else.
                     Modified to only show the version name, not version date, in the log at startup.
 2013-09-04 ROwen    Use application name instead of TUI in several places.
 2014-02-12 ROwen    Added a call to reopen script windows.
+2026-10-18          Added optional startup profiling; see TUI.StartupProfiler.
+2026-10-18          Added headless mode, which runs without Tk or windows; see TUI.Headless.
 """
 import os
 import sys
 import time
+import TUI.StartupProfiler
+# start profiling (if requested) before the expensive imports
+TUI.StartupProfiler.startFromEnviron()
+import TUI.Headless
 import Tkinter
 import numpy
 numpy.seterr(all="ignore") # suppress "Warning: invalid value encountered in divide"
 import matplotlib
-matplotlib.use("TkAgg")
+if TUI.Headless.isHeadless():
+    matplotlib.use("Agg")
+else:
+    matplotlib.use("TkAgg")
 # controls the background of the axis label regions (which default to gray)
 matplotlib.rc("figure", facecolor="white")
 matplotlib.rc("axes", titlesize="medium") # default is large, which is too big
 matplotlib.rc("legend", fontsize="medium") # default is large, which is too big
 
 import RO.Comm.Generic
-RO.Comm.Generic.setFramework("tk")
+if TUI.Headless.isHeadless():
+    RO.Comm.Generic.setFramework("twisted")
+else:
+    RO.Comm.Generic.setFramework("tk")
 
 import TUI.Base.ScriptLoader
 import TUI.BackgroundTasks
@@ -96,21 +108,28 @@ sys.executable = os.path.abspath(sys.executable)
 
 def runTUI():
     """Run TUI.
+
+    If headless (see TUI.Headless) then Tk is not used, windows are not created
+    and there is no menu bar.
     """
-    # Hide the Tk root; must do this before setting up preferences (which is done by the tui model).
-    tkRoot = Tkinter.Tk()
-    tkRoot.withdraw()
-    # if console exists, hide it
-    try:
-        tkRoot.tk.call("console", "hide")
-    except Tkinter.TclError:
-        pass
+    isHeadless = TUI.Headless.isHeadless()
+    if not isHeadless:
+        # Hide the Tk root; must do this before setting up preferences (which is done by the tui model).
+        with TUI.StartupProfiler.timeIt("startup", "Tk root"):
+            tkRoot = Tkinter.Tk()
+            tkRoot.withdraw()
+        # if console exists, hide it
+        try:
+            tkRoot.tk.call("console", "hide")
+        except Tkinter.TclError:
+            pass
     
     # create and obtain the TUI model
     tuiModel = TUI.Models.getModel("tui")
     
     # set up background tasks
-    backgroundHandler = TUI.BackgroundTasks.BackgroundKwds()
+    with TUI.StartupProfiler.timeIt("startup", "BackgroundTasks"):
+        backgroundHandler = TUI.BackgroundTasks.BackgroundKwds()
 
     # get locations to look for windows
     addPathList = TUI.TUIPaths.getAddPaths()
@@ -132,7 +151,9 @@ def runTUI():
     TUI.Base.ScriptLoader.reopenScriptWindows()
     
     # add the main menu
-    TUI.MenuBar.MenuBar()
+    if not isHeadless:
+        with TUI.StartupProfiler.timeIt("startup", "MenuBar"):
+            TUI.MenuBar.MenuBar()
     
     tuiModel.logMsg(
         "%s %s: ready to connect" % (TUI.Version.ApplicationName, TUI.Version.VersionName)
@@ -141,6 +162,13 @@ def runTUI():
     platformStr = getPlatform()
     sys.stdout.write("%s %s running on %s started %s\n" % \
         (TUI.Version.ApplicationName, TUI.Version.VersionName, platformStr, startTimeStr))
+
+    # draw the windows, so their time is included in the startup profile
+    if not isHeadless:
+        with TUI.StartupProfiler.timeIt("startup", "initial display"):
+            tkRoot.update_idletasks()
+    if not TUI.StartupProfiler.finish():
+        sys.exit(1)
     
     tuiModel.reactor.run()
 
@@ -34,7 +34,16 @@ History:
 2011-05-03 ROwen    Added code to work around ticket #1161: keys reports a value of None when a list is empty.
 2011-06-13 ROwen    Made automatic status command a refresh command, for proper logging.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Made the display efficient during alert storms:
+                    - Active alerts and rules are updated in place: only changed lines are deleted
+                      or inserted (see _SortedTextLines), instead of redisplaying everything.
+                    - Redisplay is coalesced: it happens at most once every _DisplayDelay seconds.
+                    - Status requests are coalesced: at most one is pending at a time.
+                    - Sounds are rate-limited: at most one per alert and severity every _MinSoundInterval seconds.
+2026-10-18          Bug fix: lines in the alert and rule displays lacked the tags LogWdg.addMsg applies,
+                    so find and severity filtering missed them. Sound times are forgotten when an alert clears.
 """
+import bisect
 import re
 import sys
 import time
@@ -42,6 +51,7 @@ import opscore.actor
 import Tkinter
 import SimpleDialog
 import RO.Constants
+import RO.TkUtil
 import RO.Wdg
 import RO.Wdg.WdgPrefs
 import TUI.Base.Wdg
@@ -52,6 +62,10 @@ _HelpURL = "Misc/AlertsWin.html"
 
 CmdTimeLimit = 2.5 # command time limit
 
+_DisplayDelay = 0.2 # delay before redisplaying alerts or rules after a change (sec)
+_StatusDelay = 0.5 # delay before requesting status for alerts with unknown info (sec)
+_MinSoundInterval = 10.0 # minimum interval between sounds for a given alert and severity (sec)
+
 _DownInstPrefix = "__downInst" # for disabled ID
 
 # dictionary of alert severity (lowercase), RO.Const severity
@@ -281,6 +295,64 @@ class DownInstrument(object):
             "Enable %s" % (self.instName,),
         )
 
+class _SortedTextLines(object):
+    """Lines of text in an RO.Wdg.LogWdg, kept sorted and updated with a minimum of editing
+    
+    Each line has a unique line ID and a sort key; lines are displayed in order of increasing sort key.
+    Lines get the same tags as text added by LogWdg.addMsg, so the log widget's find
+    and severity filtering work on them.
+    """
+    def __init__(self, logWdg):
+        """Inputs:
+        - logWdg: RO.Wdg.LogWdg; it should not contain any other text
+        """
+        self.textWdg = logWdg.text
+        self._keyList = [] # sort key of each displayed line, in display order
+        self._lineDict = {} # dict of line ID: (sort key, text, tags)
+
+        # LogWdg can only append, so learn the tags addMsg applies by adding an empty line
+        logWdg.addMsg("")
+        self._logTags = tuple(self.textWdg.tag_names("1.0"))
+        logWdg.clearOutput()
+
+    def setLines(self, lineList):
+        """Set the displayed lines, deleting and inserting only lines that have changed
+
+        Inputs:
+        - lineList: a collection of (sort key, line ID, text, tags), where:
+            - sort key: sort key; it must be unique, e.g. by including the line ID
+            - line ID: unique ID for the line
+            - text: text of line (without a trailing \n)
+            - tags: a collection of tags for the text
+
+        Return True if any line changed.
+        """
+        newLineDict = dict((lineID, (sortKey, text, tuple(tags))) for sortKey, lineID, text, tags in lineList)
+        didChange = False
+        for lineID, lineData in self._lineDict.items():
+            if newLineDict.get(lineID) != lineData:
+                self._deleteLine(lineID)
+                didChange = True
+        for lineID, lineData in newLineDict.iteritems():
+            if lineID not in self._lineDict:
+                self._insertLine(lineID, lineData)
+                didChange = True
+        return didChange
+
+    def _deleteLine(self, lineID):
+        sortKey = self._lineDict.pop(lineID)[0]
+        ind = bisect.bisect_left(self._keyList, sortKey)
+        del self._keyList[ind]
+        self.textWdg.delete("%d.0" % (ind + 1,), "%d.0" % (ind + 2,))
+
+    def _insertLine(self, lineID, lineData):
+        sortKey, text, tags = lineData
+        ind = bisect.bisect_left(self._keyList, sortKey)
+        self._keyList.insert(ind, sortKey)
+        self._lineDict[lineID] = lineData
+        self.textWdg.insert("%d.0" % (ind + 1,), text + "\n", " ".join(self._logTags + tags))
+
+
 class AlertsWdg(Tkinter.Frame):
     def __init__(self, master):
         Tkinter.Frame.__init__(self, master)
@@ -297,6 +369,12 @@ class AlertsWdg(Tkinter.Frame):
         self.downInstDict = {}
         
         self._statusCmd = None
+        self._statusTimer = RO.TkUtil.Timer()
+        self._displayAlertsTimer = RO.TkUtil.Timer()
+        self._displayRulesTimer = RO.TkUtil.Timer()
+
+        # dictionary of (alertID, severity): time sound was last played for that alert
+        self._soundTimeDict = {}
         
         row = 0
         maxCols = 5
@@ -374,6 +452,8 @@ class AlertsWdg(Tkinter.Frame):
             relief = "ridge",
         )
         self.rulesWdg.text.ctxSetConfigFunc(self._ruleCtxConfigMenu)
+        self._alertLines = _SortedTextLines(self.alertsWdg)
+        self._ruleLines = _SortedTextLines(self.rulesWdg)
         self.rulesWdg.grid(row=row, column=0, columnspan=maxCols, sticky="news")
         row += 1
         
@@ -445,25 +525,23 @@ class AlertsWdg(Tkinter.Frame):
         self.sendCmd("instrumentState instrument=%s down" % (instName,))
 
     def displayActiveAlerts(self):
-        alertList = []
-        currTime = time.time()
+        """Display active alerts, sorted by severity, then age (newest first), then alertID
+        """
+        self._displayAlertsTimer.cancel()
+        lineList = []
+        numDisabled = 0
         for alertInfo in self.alertDict.itervalues():
-            alertAge = currTime - alertInfo.timestamp
             sevOrder = self.severityOrderDict.get(alertInfo.severity, 99)
-            alertList.append(
-                ((sevOrder, alertAge, alertInfo.alertID), alertInfo)
-            )
-        alertList.sort()
-        self.alertsWdg.clearOutput()
-        numDisabled = 0
-        for sortKey, alertInfo in alertList:
             msgStr = "%s \t%s %s" % (alertInfo.severity.title(), alertInfo.alertID, alertInfo.value)
             if alertInfo.isAcknowledged:
                 msgStr = "[%s]" % (msgStr,)
             if not alertInfo.isEnabled:
                 numDisabled += 1
-            self.alertsWdg.addMsg(msgStr, tags=alertInfo.tags)
-        self.alertsWdg.text.see("1.0")
+            lineList.append(
+                ((sevOrder, -alertInfo.timestamp, alertInfo.alertID), alertInfo.alertID, msgStr, alertInfo.tags)
+            )
+        if self._alertLines.setLines(lineList):
+            self.alertsWdg.text.see("1.0")
 
         isCurrent = self.alertsModel.activeAlerts.isCurrent and not self._needStatus()
         self.disabledAlertsShowHideWdg.setIsCurrent(isCurrent)
@@ -482,23 +560,21 @@ class AlertsWdg(Tkinter.Frame):
     def displayRules(self):
         """Display disable alert rules and down instruments
         """
-        self.rulesWdg.clearOutput()
-        downInstList = list((di.instName, di) for di in self.downInstDict.itervalues())
-        downInstList.sort()
-        for sortKey, downInfo in downInstList:
+        self._displayRulesTimer.cancel()
+        lineList = []
+        for downInfo in self.downInstDict.itervalues():
             msgStr = "Down \t%s \t%s" % (downInfo.instName, downInfo.issuer)
-            self.rulesWdg.addMsg(msgStr, tags=downInfo.tags)
+            lineList.append(
+                ((0, downInfo.instName, downInfo.disabledID), downInfo.disabledID, msgStr, downInfo.tags)
+            )
         
-        ruleList = []
         for alertInfo in self.ruleDict.itervalues():
             sevOrder = self.severityOrderDict.get(alertInfo.severity, 99)
-            ruleList.append(
-                ((sevOrder, alertInfo.alertID), alertInfo)
-            )
-        ruleList.sort()
-        for sortKey, alertInfo in ruleList:
             msgStr = "%s \t%s \t%s" % (alertInfo.severity.title(), alertInfo.alertID, alertInfo.issuer)
-            self.rulesWdg.addMsg(msgStr, tags=alertInfo.tags)
+            lineList.append(
+                ((1, sevOrder, alertInfo.alertID, alertInfo.disabledID), alertInfo.disabledID, msgStr, alertInfo.tags)
+            )
+        self._ruleLines.setLines(lineList)
 
         numDisabled = len(self.ruleDict) + len(self.downInstDict)
         severity = RO.Constants.sevWarning
@@ -596,6 +672,13 @@ class AlertsWdg(Tkinter.Frame):
         menu.add_separator()
         return True
 
+    def _forgetSoundTimes(self, alertID):
+        """Forget when sounds were played for an alert that has cleared
+        """
+        for soundKey in self._soundTimeDict.keys():
+            if soundKey[0] == alertID:
+                del(self._soundTimeDict[soundKey])
+
     def _getIDAtInsertCursor(self, textWdg):
         """Get ID at cursor (alertID or disabledID, depending on textWdg)
         
@@ -651,12 +734,13 @@ class AlertsWdg(Tkinter.Frame):
         if currAlertIDs != oldAlertIDs:
             for deadAlertID in oldAlertIDs - currAlertIDs:
                 del(self.alertDict[deadAlertID])
+                self._forgetSoundTimes(deadAlertID)
             for newAlertID in currAlertIDs - oldAlertIDs:
                 self.alertDict[newAlertID] = AlertInfo(newAlertID)
         
-        if not self._statusCmdRunning() and self._needStatus():
-            self.tuiModel.reactor.callLater(0.5, self._getStatus)
-        self.displayActiveAlerts()
+        if not self._statusCmdRunning() and not self._statusTimer.isActive and self._needStatus():
+            self._statusTimer.start(_StatusDelay, self._getStatus)
+        self._scheduleDisplayActiveAlerts()
 
     def _alertCallback(self, keyVar):
 #         print "_alertCallback(%s)" % (keyVar,)
@@ -670,14 +754,19 @@ class AlertsWdg(Tkinter.Frame):
             return
         if newAlertInfo.isDone and oldAlertInfo:
             del(self.alertDict[newAlertInfo.alertID])
+            self._forgetSoundTimes(newAlertInfo.alertID)
         else:
             self.alertDict[newAlertInfo.alertID] = newAlertInfo
-        self.displayActiveAlerts()
+        self._scheduleDisplayActiveAlerts()
         if newAlertInfo.isEnabled \
             and not newAlertInfo.isAcknowledged \
             and newAlertInfo.severity not in ("ok", "info"):
-#            print "playing alert sound for %s" % (newAlertInfo,)
-            TUI.PlaySound.alert(newAlertInfo.severity)
+            soundKey = (newAlertInfo.alertID, newAlertInfo.severity)
+            currTime = time.time()
+            if currTime - self._soundTimeDict.get(soundKey, 0) >= _MinSoundInterval:
+#                print "playing alert sound for %s" % (newAlertInfo,)
+                self._soundTimeDict[soundKey] = currTime
+                TUI.PlaySound.alert(newAlertInfo.severity)
     
     def _disabledAlertRulesCallback(self, keyVar):
 #         print "_disabledAlertRulesCallback(%s)" % (keyVar,)
@@ -696,7 +785,7 @@ class AlertsWdg(Tkinter.Frame):
                     continue
                 disabledInfo = DisableRule(alertID, severity, issuer)
                 self.ruleDict[disabledInfo.disabledID] = disabledInfo
-        self.displayRules()
+        self._scheduleDisplayRules()
 
     def _downInstrumentsCallback(self, keyVar):
 #         print "_downInstrumentsCallback(%s)" % (keyVar,)
@@ -708,7 +797,7 @@ class AlertsWdg(Tkinter.Frame):
                 continue
             downInst = DownInstrument(instName)
             self.downInstDict[downInst.disabledID] = downInst
-        self.displayRules()
+        self._scheduleDisplayRules()
     
     def _doShowHideDisableRules(self, wdg=None):
         doShow = self.disableRulesShowHideWdg.getBool()
@@ -723,6 +812,18 @@ class AlertsWdg(Tkinter.Frame):
         self.alertsWdg.text.tag_configure("en_False", elide=not doShow)
         self.alertsWdg.text.see("1.0")
     
+    def _scheduleDisplayActiveAlerts(self):
+        """Display active alerts soon (if not already scheduled)
+        """
+        if not self._displayAlertsTimer.isActive:
+            self._displayAlertsTimer.start(_DisplayDelay, self.displayActiveAlerts)
+
+    def _scheduleDisplayRules(self):
+        """Display rules soon (if not already scheduled)
+        """
+        if not self._displayRulesTimer.isActive:
+            self._displayRulesTimer.start(_DisplayDelay, self.displayRules)
+
     def _selectCurrentLine(self, textWdg):
         """Select the line in a Text widget that the mouse points to.
         This should be a method of Text instead, but for now...
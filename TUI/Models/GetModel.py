@@ -9,10 +9,12 @@ Warnings:
 2010-03-11 ROwen
 2010-05-21 ROwen    Minor tweak to the way opscore.actor.model is imported
 2010-08-25 ROwen    Added guider model to special list
+2026-10-18          Record model creation time when profiling startup (see TUI.StartupProfiler).
 """
 __all__ = ["getModel"]
 
 import opscore.actor.model
+import TUI.StartupProfiler
 import HubModel
 import MCPModel
 import TCCModel
@@ -34,9 +36,10 @@ def getModel(actor):
         return model
 
     specialModule = _specialModelDict.get(actor)
-    if specialModule:
-        model = specialModule.Model()
-    else:
-        model = opscore.actor.model.Model(actor)
+    with TUI.StartupProfiler.timeIt("model", actor):
+        if specialModule:
+            model = specialModule.Model()
+        else:
+            model = opscore.actor.model.Model(actor)
     _modelDict[actor] = model
     return _modelDict[actor]
@@ -0,0 +1,626 @@
+"""Persistent on-disk archive of log entries, for LogSource
+
+The archive is a directory of segments. Each segment consists of two append-only files:
+- <name>.tuilog: the data file: a sequence of binary records, one per log entry
+- <name>.tuiidx: the index file: a fixed-size record per log entry containing
+    the entry's index, unix time and offset of its record in the data file
+plus a small text file listing the actors seen in that segment:
+- <name>.tuiact: one actor name per line
+
+Segments are read using mmap, so paging through history does not hold it in memory.
+Log entry indices continue from one session to the next, so every archived entry
+has a unique index and indices increase with time.
+
+Only one process at a time may open an archive; this is enforced by locking file LockFileName
+in the archive directory (the lock is released by the operating system if the process dies).
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Bug fix: startIndex ignored entries in segments written this session until they were read,
+                    so the oldest entries of a new archive could not be paged back in. Added a self-test.
+"""
+import glob
+import mmap
+import os
+import struct
+import sys
+import time
+
+import numpy
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+import opscore.protocols.messages
+import opscore.protocols.parser
+import TUI.Models.LogSource
+
+__all__ = ["LogArchive", "ArchiveEntry", "ArchiveSegment"]
+
+DataSuffix = ".tuilog"
+IndexSuffix = ".tuiidx"
+ActorsSuffix = ".tuiact"
+LockFileName = "archive.lock"
+SegmentPrefix = "seg"
+DefaultSegmentMaxBytes = 32 * 1024 * 1024 # start a new segment when the data file reaches this size
+DefaultMaxAgeDays = 30 # delete segments older than this many days when the archive is opened
+
+# data record header: index, unixTime, severity, flags, cmdID, actor len, cmdr len, cmdInfo len, msgStr len
+# followed by actor, cmdr, cmdInfo and msgStr as utf-8 strings (cmdInfo is encoded by _encodeCmdInfo)
+RecordHeader = struct.Struct("<qdbBiHHHI")
+IndexDType = numpy.dtype([("index", "<i8"), ("unixTime", "<f8"), ("offset", "<i8")])
+CmdInfoSep = "\0"
+
+
+class ArchiveEntry(object):
+    """A log entry read from the archive
+
+    Has the same fields as TUI.Models.LogSource.LogEntry, plus index.
+    """
+    __slots__ = ("index", "unixTime", "msgStr", "actor", "severity", "cmdr", "cmdID",
+        "cmdInfo", "isKeys", "hasKeywords")
+
+    def __init__(self, index, unixTime, msgStr, actor, severity, cmdr, cmdID, cmdInfo, isKeys, hasKeywords):
+        self.index = index
+        self.unixTime = unixTime
+        self.msgStr = msgStr
+        self.actor = actor
+        self.severity = severity
+        self.cmdr = cmdr
+        self.cmdID = cmdID
+        self.cmdInfo = cmdInfo
+        self.isKeys = isKeys
+        self.hasKeywords = hasKeywords
+
+    @property
+    def taiTimeStr(self):
+        return TUI.Models.LogSource.taiTimeStrFromUnixTime(self.unixTime)
+
+    @property
+    def keywords(self):
+        if not self.hasKeywords:
+            return opscore.protocols.messages.Keywords()
+        try:
+            return opscore.protocols.parser.ReplyParser().parse(self.msgStr).keywords
+        except Exception:
+            return opscore.protocols.messages.Keywords()
+
+    @property
+    def tags(self):
+        tags = []
+        if self.cmdr:
+            tags.append(TUI.Models.LogSource.LogEntryStore.CmdrTagPrefix + self.cmdr.lower())
+        if self.actor:
+            tags.append(TUI.Models.LogSource.LogEntryStore.ActorTagPrefix + self.actor.lower())
+        return tags
+
+    def getStr(self):
+        """Return log entry formatted for log window
+        """
+        return "%s %s\n" % (self.taiTimeStr, self.msgStr)
+
+    def __repr__(self):
+        return "ArchiveEntry(index=%r, msgStr=%r, severity=%r, actor=%r, cmdr=%r, cmdID=%r, cmdInfo=%r)" % \
+            (self.index, self.msgStr, self.severity, self.actor, self.cmdr, self.cmdID, self.cmdInfo)
+
+
+class ArchiveSegment(object):
+    """One segment of a log archive, read using mmap
+
+    Fields include:
+    - basePath: path of the segment files, without suffix
+    - actorSet: set of actors in this segment
+    """
+    def __init__(self, basePath):
+        self.basePath = basePath
+        self.actorSet = set()
+        self._actorsSize = 0
+        self._dataFile = None
+        self._dataMap = None
+        self._indexFile = None
+        self._indexMap = None
+        self._indexArr = numpy.zeros(0, dtype=IndexDType)
+        self.refresh()
+
+    @property
+    def startIndex(self):
+        """Index of the first entry in this segment; None if the segment is empty
+        """
+        if len(self._indexArr) == 0:
+            return None
+        return int(self._indexArr["index"][0])
+
+    @property
+    def endIndex(self):
+        """Index of the last entry in this segment + 1; None if the segment is empty
+        """
+        if len(self._indexArr) == 0:
+            return None
+        return int(self._indexArr["index"][-1]) + 1
+
+    @property
+    def startTime(self):
+        """Unix time of the first entry in this segment; None if the segment is empty
+        """
+        if len(self._indexArr) == 0:
+            return None
+        return float(self._indexArr["unixTime"][0])
+
+    def close(self):
+        """Release the memory maps and close the files
+        """
+        self._indexArr = numpy.zeros(0, dtype=IndexDType)
+        for attrName in ("_dataMap", "_indexMap", "_dataFile", "_indexFile"):
+            obj = getattr(self, attrName)
+            if obj is not None:
+                obj.close()
+                setattr(self, attrName, None)
+
+    def findIndexForTime(self, unixTime):
+        """Return the index of the first entry whose time >= unixTime, or None if no such entry
+        """
+        pos = numpy.searchsorted(self._indexArr["unixTime"], unixTime)
+        if pos >= len(self._indexArr):
+            return None
+        return int(self._indexArr["index"][pos])
+
+    def getEntry(self, index):
+        """Return the ArchiveEntry with the specified index
+
+        Raise IndexError if not found.
+        """
+        if len(self._indexArr) == 0 or index >= self.endIndex:
+            self.refresh()
+        indexArr = self._indexArr["index"]
+        pos = numpy.searchsorted(indexArr, index)
+        if pos >= len(indexArr) or indexArr[pos] != index:
+            raise IndexError("log entry %s is not in archive segment %s" % (index, self.basePath))
+        return self._readEntry(int(self._indexArr["offset"][pos]))
+
+    def getIndices(self):
+        """Return the indices of all entries in this segment as a numpy array
+
+        Warning: the array is only valid until the next call to refresh or close.
+        """
+        return self._indexArr["index"]
+
+    def refresh(self):
+        """Map the current contents of the files; call if the segment has grown
+        """
+        dataSize = self._getSize(DataSuffix)
+        indexSize = self._getSize(IndexSuffix)
+        numEntries = indexSize // IndexDType.itemsize
+        if numEntries == len(self._indexArr) and self._dataMap is not None:
+            return
+        self.close()
+        if numEntries > 0 and dataSize > 0:
+            self._indexFile = open(self.basePath + IndexSuffix, "rb")
+            self._indexMap = mmap.mmap(self._indexFile.fileno(), numEntries * IndexDType.itemsize,
+                access=mmap.ACCESS_READ)
+            self._indexArr = numpy.frombuffer(self._indexMap, dtype=IndexDType, count=numEntries)
+            self._dataFile = open(self.basePath + DataSuffix, "rb")
+            self._dataMap = mmap.mmap(self._dataFile.fileno(), dataSize, access=mmap.ACCESS_READ)
+
+        actorsSize = self._getSize(ActorsSuffix)
+        if actorsSize != self._actorsSize:
+            with open(self.basePath + ActorsSuffix, "rb") as actorsFile:
+                self.actorSet = set(line.rstrip("\n").decode("utf-8") for line in actorsFile)
+            self._actorsSize = actorsSize
+
+    def _getSize(self, suffix):
+        """Return the size of the segment file with the specified suffix; 0 if the file does not exist
+        """
+        try:
+            return os.path.getsize(self.basePath + suffix)
+        except OSError:
+            return 0
+
+    def _readEntry(self, offset):
+        """Read the record at the specified offset in the data file and return it as an ArchiveEntry
+        """
+        index, unixTime, severity, flags, cmdID, actorLen, cmdrLen, cmdInfoLen, msgLen \
+            = RecordHeader.unpack_from(self._dataMap, offset)
+        offset += RecordHeader.size
+        actor = self._dataMap[offset:offset + actorLen].decode("utf-8")
+        offset += actorLen
+        cmdr = self._dataMap[offset:offset + cmdrLen].decode("utf-8")
+        offset += cmdrLen
+        cmdInfo = _decodeCmdInfo(self._dataMap[offset:offset + cmdInfoLen])
+        offset += cmdInfoLen
+        msgStr = self._dataMap[offset:offset + msgLen]
+        if flags & TUI.Models.LogSource.LogEntryStore.IsUnicodeFlag:
+            msgStr = msgStr.decode("utf-8")
+        return ArchiveEntry(
+            index = index,
+            unixTime = unixTime,
+            msgStr = msgStr,
+            actor = _asStr(actor),
+            severity = severity,
+            cmdr = _asStr(cmdr),
+            cmdID = cmdID,
+            cmdInfo = cmdInfo,
+            isKeys = bool(flags & TUI.Models.LogSource.LogEntryStore.IsKeysFlag),
+            hasKeywords = bool(flags & TUI.Models.LogSource.LogEntryStore.HasKeywordsFlag),
+        )
+
+    def __len__(self):
+        return len(self._indexArr)
+
+
+class LogArchive(object):
+    """An append-only, segmented on-disk archive of log entries
+
+    Designed to be fed by LogSource: register logSourceBatchCallback as a LogSource batch callback.
+    The archive is also readable while it is being written.
+
+    Fields include:
+    - dirPath: path to the archive directory
+    - endIndex: index of the next entry to be written
+    """
+    def __init__(self,
+        dirPath,
+        segmentMaxBytes = DefaultSegmentMaxBytes,
+        maxAgeDays = DefaultMaxAgeDays,
+    ):
+        """Open (creating if necessary) a log archive
+
+        Inputs:
+        - dirPath: path to the archive directory; created if it does not exist
+        - segmentMaxBytes: start a new segment when the data file reaches this size (bytes)
+        - maxAgeDays: delete segments that started more than this many days ago; if None then keep all segments
+
+        Raise RuntimeError if the archive is in use by another process.
+        """
+        self.dirPath = dirPath
+        self.segmentMaxBytes = int(segmentMaxBytes)
+        if not os.path.isdir(dirPath):
+            os.makedirs(dirPath)
+        self._lockFile = _lockFile(os.path.join(dirPath, LockFileName))
+
+        self.segmentList = [] # list of ArchiveSegment, in order of increasing index
+        self.endIndex = 0
+        basePathList = sorted(path[:-len(DataSuffix)]
+            for path in glob.glob(os.path.join(dirPath, "%s*%s" % (SegmentPrefix, DataSuffix))))
+        if maxAgeDays is not None:
+            minTime = time.time() - (maxAgeDays * 24 * 3600)
+        for basePath in basePathList:
+            segment = ArchiveSegment(basePath)
+            if len(segment) == 0 or (maxAgeDays is not None and segment.startTime < minTime):
+                segment.close()
+                self._deleteSegmentFiles(basePath)
+                continue
+            self.segmentList.append(segment)
+            self.endIndex = max(self.endIndex, segment.endIndex)
+        self.segmentList.sort(key=lambda seg: seg.startIndex)
+
+        self._writeSegment = None
+        self._writeStartIndex = None # index of the first entry in the write segment
+        self._dataFile = None
+        self._indexFile = None
+        self._actorsFile = None
+        self._writeActorSet = set()
+
+    @property
+    def startIndex(self):
+        """Index of the oldest entry in the archive; endIndex if the archive is empty
+        """
+        for segment in self.segmentList:
+            if len(segment) > 0:
+                return segment.startIndex
+            if segment is self._writeSegment:
+                # the write segment is only refreshed when it is read, but its first index is known
+                return self._writeStartIndex
+        return self.endIndex
+
+    def appendEntry(self, logEntry):
+        """Append a log entry (a LogEntryView or anything with the same fields, including index)
+
+        The entry's index must be >= endIndex. Data is buffered; call flush to write it to disk.
+        """
+        if self._lockFile is None:
+            raise RuntimeError("Cannot archive log entry %s; archive %r is closed" % (logEntry.index, self.dirPath))
+        if logEntry.index < self.endIndex:
+            raise RuntimeError("Cannot archive log entry %s; archive already has entries up to %s" % \
+                (logEntry.index, self.endIndex - 1))
+        if self._dataFile is None or self._dataFile.tell() >= self.segmentMaxBytes:
+            self._startSegment(logEntry.index)
+
+        flags = 0
+        msgStr = logEntry.msgStr
+        if isinstance(msgStr, unicode):
+            msgStr = msgStr.encode("utf-8")
+            flags |= TUI.Models.LogSource.LogEntryStore.IsUnicodeFlag
+        if logEntry.isKeys:
+            flags |= TUI.Models.LogSource.LogEntryStore.IsKeysFlag
+        if logEntry.hasKeywords:
+            flags |= TUI.Models.LogSource.LogEntryStore.HasKeywordsFlag
+        actor = _asUTF8(logEntry.actor)
+        cmdr = _asUTF8(logEntry.cmdr)
+        cmdInfoStr = _encodeCmdInfo(logEntry.cmdInfo)
+
+        offset = self._dataFile.tell()
+        self._dataFile.write(RecordHeader.pack(
+            logEntry.index,
+            logEntry.unixTime,
+            logEntry.severity,
+            flags,
+            logEntry.cmdID,
+            len(actor),
+            len(cmdr),
+            len(cmdInfoStr),
+            len(msgStr),
+        ))
+        self._dataFile.write(actor)
+        self._dataFile.write(cmdr)
+        self._dataFile.write(cmdInfoStr)
+        self._dataFile.write(msgStr)
+        indexRec = numpy.array([(logEntry.index, logEntry.unixTime, offset)], dtype=IndexDType)
+        self._indexFile.write(indexRec.tostring())
+        if logEntry.actor not in self._writeActorSet:
+            self._writeActorSet.add(logEntry.actor)
+            self._actorsFile.write(actor + "\n")
+        self.endIndex = logEntry.index + 1
+
+    def close(self):
+        """Flush and close all files and release the lock on the archive
+
+        The archive may not be written after it is closed.
+        """
+        self.flush()
+        for attrName in ("_dataFile", "_indexFile", "_actorsFile"):
+            fileObj = getattr(self, attrName)
+            if fileObj is not None:
+                fileObj.close()
+                setattr(self, attrName, None)
+        for segment in self.segmentList:
+            segment.close()
+        self._writeSegment = None
+        if self._lockFile is not None:
+            _unlockFile(self._lockFile)
+            self._lockFile = None
+
+    def findIndexForTime(self, unixTime):
+        """Return the index of the first archived entry whose time >= unixTime, or None if none
+        """
+        for segment in self.segmentList:
+            index = segment.findIndexForTime(unixTime)
+            if index is not None:
+                return index
+        return None
+
+    def findIndices(self, filterFunc, endIndex, maxNum, maxScan=None, actors=None):
+        """Search backwards from endIndex for entries that pass a filter
+
+        Inputs:
+        - filterFunc: a function that takes an ArchiveEntry and returns True if it passes
+        - endIndex: search entries with index < endIndex
+        - maxNum: maximum number of matching entries to return
+        - maxScan: maximum number of entries to test; if None then no limit
+        - actors: if not None, a collection of actors; segments that contain none of these actors are skipped
+
+        Returns two items:
+        - a list of indices of matching entries, in increasing order
+        - the index of the oldest entry tested (the next search should use this as endIndex);
+            this is startIndex if the search reached the start of the archive
+        """
+        self.flush()
+        indexList = []
+        numScanned = 0
+        scanIndex = endIndex
+        actorSet = set(actors) if actors is not None else None
+        for segment in reversed(self.segmentList):
+            segment.refresh()
+            if len(segment) == 0 or segment.startIndex >= endIndex:
+                continue
+            if actorSet is not None and not (actorSet & segment.actorSet):
+                scanIndex = min(scanIndex, segment.startIndex)
+                continue
+            segIndices = segment.getIndices()
+            endPos = numpy.searchsorted(segIndices, endIndex)
+            for pos in xrange(endPos - 1, -1, -1):
+                index = int(segIndices[pos])
+                scanIndex = index
+                numScanned += 1
+                if filterFunc(segment.getEntry(index)):
+                    indexList.append(index)
+                    if len(indexList) >= maxNum:
+                        return list(reversed(indexList)), scanIndex
+                if maxScan is not None and numScanned >= maxScan:
+                    return list(reversed(indexList)), scanIndex
+        return list(reversed(indexList)), min(scanIndex, self.startIndex)
+
+    def flush(self):
+        """Write buffered data to disk
+        """
+        for fileObj in (self._dataFile, self._indexFile, self._actorsFile):
+            if fileObj is not None:
+                fileObj.flush()
+
+    def getEntry(self, index):
+        """Return the ArchiveEntry with the specified index
+
+        Raise IndexError if not found.
+        """
+        for segment in reversed(self.segmentList):
+            if len(segment) == 0:
+                segment.refresh()
+            startIndex = segment.startIndex
+            if startIndex is not None and index >= startIndex:
+                if segment is self._writeSegment:
+                    self.flush()
+                return segment.getEntry(index)
+        raise IndexError("log entry %s is not in the archive" % (index,))
+
+    def logSourceBatchCallback(self, logSource, logEntryList):
+        """Archive new log entries; a LogSource batch callback
+        """
+        try:
+            for logEntry in logEntryList:
+                self.appendEntry(logEntry)
+            self.flush()
+        except Exception as e:
+            sys.stderr.write("Could not write to log archive %r: %s\n" % (self.dirPath, e))
+
+    def _deleteSegmentFiles(self, basePath):
+        """Delete the files for a segment
+        """
+        for suffix in (DataSuffix, IndexSuffix, ActorsSuffix):
+            try:
+                os.remove(basePath + suffix)
+            except OSError:
+                pass
+
+    def _startSegment(self, startIndex):
+        """Close the current segment (if any) and start a new one
+        """
+        self.flush()
+        for attrName in ("_dataFile", "_indexFile", "_actorsFile"):
+            fileObj = getattr(self, attrName)
+            if fileObj is not None:
+                fileObj.close()
+        if self._writeSegment is not None:
+            # the old write segment is complete; map its contents so it reports its entries
+            self._writeSegment.refresh()
+        timeStr = time.strftime("%Y%m%dT%H%M%S", time.gmtime())
+        basePath = os.path.join(self.dirPath, "%s%012d_%s" % (SegmentPrefix, startIndex, timeStr))
+        self._dataFile = open(basePath + DataSuffix, "ab")
+        self._indexFile = open(basePath + IndexSuffix, "ab")
+        self._actorsFile = open(basePath + ActorsSuffix, "ab")
+        self._writeActorSet = set()
+        self._writeSegment = ArchiveSegment(basePath)
+        self._writeStartIndex = startIndex
+        self.segmentList.append(self._writeSegment)
+
+
+def _asStr(val):
+    """Return a unicode string as str if it is pure ASCII
+    """
+    try:
+        return str(val)
+    except UnicodeError:
+        return val
+
+def _asUTF8(val):
+    """Return a string (or None) as a utf-8 encoded str; None is returned as ""
+    """
+    if val is None:
+        return ""
+    if isinstance(val, unicode):
+        return val.encode("utf-8")
+    return str(val)
+
+def _lockFile(lockPath):
+    """Open and lock a lock file; return the open file
+
+    Raise RuntimeError if the file is locked by another process.
+    """
+    lockFile = open(lockPath, "a+")
+    try:
+        if fcntl:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lockFile.seek(0)
+            msvcrt.locking(lockFile.fileno(), msvcrt.LK_NBLCK, 1)
+    except IOError:
+        lockFile.close()
+        raise RuntimeError("%r is locked; the log archive is in use by another copy of TUI" % (lockPath,))
+    return lockFile
+
+def _unlockFile(lockFile):
+    """Unlock and close a lock file opened by _lockFile
+    """
+    try:
+        if fcntl:
+            fcntl.flock(lockFile.fileno(), fcntl.LOCK_UN)
+        else:
+            lockFile.seek(0)
+            msvcrt.locking(lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        lockFile.close()
+
+def _decodeCmdInfo(cmdInfoStr):
+    """Decode a TUI.Models.LogSource.CmdInfo encoded by _encodeCmdInfo; return None if cmdInfoStr is empty
+    """
+    if not cmdInfoStr:
+        return None
+    uniqueCmdID, cmdr, cmdID, actor, isMine, cmdStr = cmdInfoStr.decode("utf-8").split(CmdInfoSep, 5)
+    try:
+        uniqueCmdID = int(uniqueCmdID)
+    except ValueError:
+        pass
+    cmdr = _asStr(cmdr)
+    return TUI.Models.LogSource.CmdInfo(
+        uniqueCmdID = uniqueCmdID,
+        cmdr = cmdr,
+        cmdID = int(cmdID),
+        actor = _asStr(actor),
+        cmdStr = _asStr(cmdStr),
+        myCmdr = cmdr if isMine == "1" else None,
+    )
+
+def _encodeCmdInfo(cmdInfo):
+    """Encode a TUI.Models.LogSource.CmdInfo as a utf-8 str; return "" if cmdInfo is None
+    """
+    if cmdInfo is None:
+        return ""
+    return CmdInfoSep.join((
+        _asUTF8(unicode(cmdInfo.uniqueCmdID)),
+        _asUTF8(cmdInfo.cmdr),
+        str(int(cmdInfo.cmdID)),
+        _asUTF8(cmdInfo.actor),
+        "1" if cmdInfo.isMine else "0",
+        _asUTF8(cmdInfo.cmdStr),
+    ))
+
+
+if __name__ == "__main__":
+    import shutil
+    import tempfile
+    print "Testing LogArchive"
+    nFailures = 0
+
+    def makeEntry(index):
+        return ArchiveEntry(
+            index = index,
+            unixTime = time.time(),
+            msgStr = "msg %d" % (index,),
+            actor = "tcc",
+            severity = 0,
+            cmdr = "me.me",
+            cmdID = index,
+            cmdInfo = None,
+            isKeys = False,
+            hasKeywords = True,
+        )
+
+    dirPath = tempfile.mkdtemp()
+    try:
+        archive = LogArchive(dirPath, segmentMaxBytes=300) # several segments
+        for index in range(80, 100):
+            archive.appendEntry(makeEntry(index))
+            if archive.startIndex != 80:
+                print "after writing entry %d: startIndex=%s != 80" % (index, archive.startIndex)
+                nFailures += 1
+        archive.flush()
+        for index in (80, 91, 99):
+            msgStr = archive.getEntry(index).msgStr
+            if msgStr != "msg %d" % (index,):
+                print "getEntry(%d).msgStr = %r" % (index, msgStr)
+                nFailures += 1
+        archive.close()
+
+        archive = LogArchive(dirPath)
+        if (archive.startIndex, archive.endIndex) != (80, 100):
+            print "reopened archive: startIndex, endIndex = %s, %s != 80, 100" % (archive.startIndex, archive.endIndex)
+            nFailures += 1
+        archive.close()
+    finally:
+        shutil.rmtree(dirPath)
+
+    if nFailures == 0:
+        print "No failures"
+    else:
+        print "%s failures" % (nFailures,)
@@ -20,21 +20,50 @@ History:
 2014-03-24 ROwen    Implemented enhancement request #2020 by increasing maxEntries from 40000 to 100000.
 2015-09-22 ROwen    Added __repr__ to LogEntry, for debugging purposes .
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Store log entries in a columnar ring buffer (LogEntryStore) to reduce memory use:
+                    actor and cmdr are interned, time, severity and cmdID are kept in numpy arrays
+                    and message strings are packed into a shared string arena.
+                    LogSource.entryList and lastEntry now hold LogEntryView objects, which have the same
+                    fields as LogEntry. Keywords are no longer stored; they are re-parsed on demand.
+                    Removed LogSource.logEntryFromLogMsg; logMsg adds the entry directly to the store.
+2026-10-18          LogEntryStore maintains posting lists (IndexList) of entries by actor, command actor,
+                    cmdr and severity, plus lists of keys and command entries, so filters can be computed
+                    as set operations on sorted index arrays; added getEntries and getXIndices methods.
+2026-10-18          Added batch callbacks (addBatchCallback, removeBatchCallback): new entries are collected
+                    and reported at most once per batchInterval, as a list of LogEntryView.
+2026-10-18          Added optional on-disk archive (see LogArchive) via the archiveDir argument;
+                    entry indices continue from the end of the archive.
+                    Added getEntry, getEntries and getOldestIndex methods to access archived as well as in-memory entries.
+                    Added hasKeywords field to LogEntry and LogEntryView.
+                    The archive is closed at exit, and pending entries are reported to batch callbacks early
+                    if the oldest of them would otherwise be discarded before being archived.
+2026-10-18          LogEntry.taiTimeStr is computed on demand from unixTime, instead of when the entry is created.
+                    taiTimeStrFromUnixTime caches the string for the most recent second, so formatting
+                    a run of entries from the same second only calls time.gmtime and time.strftime once.
+                    Added taiTimeStrListFromUnixTimes and getStrList to format many entries at once.
 """
+import atexit
+import math
+import sys
 import time
-import collections
+import traceback
+
+import numpy
 
 import opscore.protocols.messages
+import opscore.protocols.parser
 import opscore.actor.keyvar
+import opscore.utility.timer
 import RO.AddCallback
 import RO.Astro.Tm
 import RO.Constants
 import TUI.Models
 import TUI.Version
 
-__all__ = ["LogEntry", "LogSource"]
+__all__ = ["LogEntry", "LogEntryView", "LogEntryStore", "LogSource"]
 
 DefaultMaxEntries = 100000 # default # of max entries in LogSource
+DefaultBatchInterval = 0.05 # default interval between batch callbacks (sec)
 
 class CmdInfo(object):
     """Data for synthesized command messages
@@ -75,6 +104,48 @@ class CmdInfo(object):
         return "%s %d %s %s" % (self.cmdr, self.cmdID, self.actor, self.cmdStr)
 
 
+# cache for taiTimeStrFromUnixTime: [TAI time (integer seconds), TAI time string]
+_TAITimeStrCache = [None, None]
+
+def _getTAIMinusUnixTime():
+    """Return TAI - unix time (sec), corrected for the user's clock error (see RO.Astro.Tm.getCurrPySec)
+    """
+    return RO.Astro.Tm.getCurrPySec(0.0) - RO.Astro.Tm.getUTCMinusTAI()
+
+def taiTimeStrFromUnixTime(unixTime):
+    """Return TAI time as a string HH:MM:SS, given a unix time
+
+    The result is corrected for the user's clock error (see RO.Astro.Tm.getCurrPySec).
+    The string for the most recent second is cached, since log entries tend to arrive in bursts.
+    To format many times use taiTimeStrListFromUnixTimes, which is faster.
+    """
+    taiSec = int(math.floor(unixTime + _getTAIMinusUnixTime()))
+    if taiSec != _TAITimeStrCache[0]:
+        _TAITimeStrCache[:] = [taiSec, time.strftime("%H:%M:%S", time.gmtime(taiSec))]
+    return _TAITimeStrCache[1]
+
+def taiTimeStrListFromUnixTimes(unixTimes):
+    """Return a list of TAI time strings HH:MM:SS, given a sequence of unix times
+
+    Like taiTimeStrFromUnixTime, but the clock correction is computed once for the whole sequence
+    and the times are split into hours, minutes and seconds using numpy.
+    """
+    if len(unixTimes) == 0:
+        return []
+    taiSecArr = numpy.floor(numpy.asarray(unixTimes, dtype=float) + _getTAIMinusUnixTime()).astype(numpy.int64)
+    hourArr, secOfHourArr = divmod(taiSecArr % (24 * 3600), 3600)
+    minArr, secArr = divmod(secOfHourArr, 60)
+    return ["%02d:%02d:%02d" % hms for hms in zip(hourArr.tolist(), minArr.tolist(), secArr.tolist())]
+
+def getStrList(logEntryList):
+    """Return a list of log entries formatted for a log window (as by LogEntry.getStr)
+
+    Faster than calling getStr for each entry; see taiTimeStrListFromUnixTimes.
+    """
+    taiTimeStrList = taiTimeStrListFromUnixTimes([logEntry.unixTime for logEntry in logEntryList])
+    return ["%s %s\n" % (taiTimeStr, logEntry.msgStr) for taiTimeStr, logEntry in zip(taiTimeStrList, logEntryList)]
+
+
 class LogEntry(object):
     """Data for one log entry
     
@@ -88,6 +159,7 @@ class LogEntry(object):
     - cmdID: command ID (an integer)
     - keywords: parsed keywords (an opscore.protocols.messages.Keywords);
         warning: this is not KeyVars from the model; it is lower-level data
+    - hasKeywords: True if keywords is not empty
     - tags: a list of strings used as tags in a Tk Text widget; see LogSource for the standard tags
     """
     def __init__(self,
@@ -101,19 +173,21 @@ class LogEntry(object):
         cmdInfo = None,
     ):
         self.unixTime = time.time()
-        currPythonSeconds = RO.Astro.Tm.getCurrPySec(self.unixTime)
-        currTAITuple= time.gmtime(currPythonSeconds - RO.Astro.Tm.getUTCMinusTAI())
-        self.taiTimeStr = time.strftime("%H:%M:%S", currTAITuple)
         self.msgStr = msgStr
         self.actor = actor
         self.severity = severity
         self.cmdr = cmdr
         self.cmdID = int(cmdID)
         self.keywords = keywords
+        self.hasKeywords = bool(keywords)
         self.tags = tags
         self.cmdInfo = cmdInfo
         self.isKeys = self.actor.startswith("keys") or (self.cmdInfo and self.cmdInfo.actor.startswith("keys"))
 
+    @property
+    def taiTimeStr(self):
+        return taiTimeStrFromUnixTime(self.unixTime)
+
     def getStr(self):
         """Return log entry formatted for log window
         """
@@ -124,53 +198,676 @@ class LogEntry(object):
             (self.msgStr, self.severity, self.actor, self.cmdr, self.cmdID, self.keywords, self.tags, self.cmdInfo)
 
 
+class LogEntryView(object):
+    """A lightweight view of one entry in a LogEntryStore
+
+    Has the same fields as LogEntry, but the data is read from the store on demand.
+    Fields raise IndexError if the entry has been discarded from the store.
+
+    Fields are documented in LogEntry; in addition:
+    - index: absolute index of this entry in the store (the number of entries logged before it)
+    """
+    __slots__ = ("_store", "index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self.index = index
+
+    @property
+    def unixTime(self):
+        return float(self._store._unixTimeArr[self._store._getPos(self.index)])
+
+    @property
+    def taiTimeStr(self):
+        return taiTimeStrFromUnixTime(self.unixTime)
+
+    @property
+    def msgStr(self):
+        return self._store._getMsgStr(self._store._getPos(self.index))
+
+    @property
+    def actor(self):
+        return self._store.actorInterner.getStr(self._store._actorIDArr[self._store._getPos(self.index)])
+
+    @property
+    def severity(self):
+        return int(self._store._severityArr[self._store._getPos(self.index)])
+
+    @property
+    def cmdr(self):
+        return self._store.cmdrInterner.getStr(self._store._cmdrIDArr[self._store._getPos(self.index)])
+
+    @property
+    def cmdID(self):
+        return int(self._store._cmdIDArr[self._store._getPos(self.index)])
+
+    @property
+    def keywords(self):
+        return self._store._getKeywords(self._store._getPos(self.index))
+
+    @property
+    def hasKeywords(self):
+        return bool(self._store._flagsArr[self._store._getPos(self.index)] & LogEntryStore.HasKeywordsFlag)
+
+    @property
+    def tags(self):
+        return self._store._getTags(self._store._getPos(self.index))
+
+    @property
+    def cmdInfo(self):
+        self._store._getPos(self.index) # check that the entry still exists
+        return self._store._cmdInfoDict.get(self.index)
+
+    @property
+    def isKeys(self):
+        return bool(self._store._flagsArr[self._store._getPos(self.index)] & LogEntryStore.IsKeysFlag)
+
+    def getStr(self):
+        """Return log entry formatted for log window
+        """
+        return "%s %s\n" % (self.taiTimeStr, self.msgStr)
+
+    def __repr__(self):
+        return "LogEntryView(index=%r, msgStr=%r, severity=%r, actor=%r, cmdr=%r, cmdID=%r, tags=%r, cmdInfo=%r)" % \
+            (self.index, self.msgStr, self.severity, self.actor, self.cmdr, self.cmdID, self.tags, self.cmdInfo)
+
+
+class StrInterner(object):
+    """Map strings to small integer IDs and back
+
+    Used for values such as actor and commander names, of which there are few distinct values.
+    None is a valid value.
+    """
+    def __init__(self):
+        self.strList = []
+        self.idDict = {}
+
+    def getID(self, val):
+        """Return the ID for a string, adding it if new
+        """
+        strID = self.idDict.get(val)
+        if strID is None:
+            strID = len(self.strList)
+            self.strList.append(val)
+            self.idDict[val] = strID
+        return strID
+
+    def getStr(self, strID):
+        """Return the string for a given ID
+        """
+        return self.strList[strID]
+
+    def __len__(self):
+        return len(self.strList)
+
+
+class StrArena(object):
+    """Storage for many short strings packed into large shared chunks
+
+    Strings are added sequentially and freed in the same order (oldest first),
+    which is all a ring buffer needs. Each string is identified by (chunk number, offset, length).
+    """
+    def __init__(self, chunkSize=1 << 20):
+        """Inputs:
+        - chunkSize: nominal size of each chunk (bytes); a longer string gets its own chunk
+        """
+        self.chunkSize = int(chunkSize)
+        self.chunkDict = {} # dict of chunk number: bytearray
+        self.currChunkNum = -1
+        self.currChunk = None
+        self._newChunk()
+
+    def add(self, byteStr):
+        """Add a byte string; return (chunkNum, offset, length)
+        """
+        strLen = len(byteStr)
+        if len(self.currChunk) + strLen > self.chunkSize:
+            self._newChunk()
+        offset = len(self.currChunk)
+        self.currChunk.extend(byteStr)
+        return (self.currChunkNum, offset, strLen)
+
+    def get(self, chunkNum, offset, strLen):
+        """Return the byte string at the specified location
+        """
+        return str(self.chunkDict[chunkNum][offset:offset + strLen])
+
+    def freeBefore(self, chunkNum):
+        """Free all chunks whose number is less than chunkNum
+        """
+        for oldChunkNum in [cn for cn in self.chunkDict.iterkeys() if cn < chunkNum]:
+            del self.chunkDict[oldChunkNum]
+
+    def getNumBytes(self):
+        """Return the number of bytes used by strings in all chunks
+        """
+        return sum(len(chunk) for chunk in self.chunkDict.itervalues())
+
+    def _newChunk(self):
+        self.currChunkNum += 1
+        self.currChunk = bytearray()
+        self.chunkDict[self.currChunkNum] = self.currChunk
+
+
+class IndexList(object):
+    """A sorted list of absolute log entry indices (a posting list)
+
+    Indices must be appended in increasing order and are discarded from the front.
+    """
+    def __init__(self):
+        self._arr = numpy.zeros(16, dtype=numpy.int64)
+        self._start = 0
+        self._end = 0
+
+    def append(self, index):
+        """Append an index (which must be larger than all indices already present)
+        """
+        if self._end >= len(self._arr):
+            numIndices = self._end - self._start
+            if numIndices * 2 > len(self._arr):
+                newArr = numpy.zeros(len(self._arr) * 2, dtype=numpy.int64)
+            else:
+                newArr = self._arr
+            newArr[0:numIndices] = self._arr[self._start:self._end]
+            self._arr = newArr
+            self._start = 0
+            self._end = numIndices
+        self._arr[self._end] = index
+        self._end += 1
+
+    def discardBefore(self, startIndex):
+        """Discard all indices less than startIndex
+        """
+        while self._start < self._end and self._arr[self._start] < startIndex:
+            self._start += 1
+
+    def getArray(self):
+        """Return the indices as a numpy array; the array is only valid until the next append
+        """
+        return self._arr[self._start:self._end]
+
+    def __len__(self):
+        return self._end - self._start
+
+
+def unionIndices(indArrList):
+    """Return the sorted union of a collection of sorted index arrays
+    """
+    indArrList = [indArr for indArr in indArrList if len(indArr) > 0]
+    if not indArrList:
+        return numpy.zeros(0, dtype=numpy.int64)
+    if len(indArrList) == 1:
+        return numpy.array(indArrList[0])
+    return numpy.unique(numpy.concatenate(indArrList))
+
+
+class LogEntryStore(object):
+    """A fixed-capacity, columnar ring buffer of log entries
+
+    Acts as a read-only sequence of LogEntryView objects (oldest first), supporting
+    len, iteration and indexing (including negative indices).
+
+    Entries are identified by an absolute index: the number of entries appended before them.
+    Absolute indices of entries in the store run from startIndex to endIndex - 1.
+
+    Storage:
+    - actor and cmdr are interned (see actorInterner and cmdrInterner)
+    - unix time, severity, cmdID, actor ID, cmdr ID and flags are stored in numpy arrays
+    - message strings are stored in a shared StrArena (unicode is stored as utf-8)
+    - cmdInfo is stored in a dict (few entries have it)
+    - keywords are not stored; if an entry was logged with keywords they are re-parsed from msgStr on demand
+    - tags are computed from actor and cmdr on demand
+
+    Filtering:
+    The store maintains posting lists (IndexList objects) of entries by actor, by command actor
+    (the actor of the command described by cmdInfo), by cmdr and by severity,
+    plus posting lists of keys entries (isKeys true) and command entries (cmdInfo not None).
+    The getXIndices methods return sorted numpy arrays of absolute indices, which may be combined
+    using numpy set operations (e.g. numpy.union1d, numpy.intersect1d and numpy.setdiff1d)
+    and turned into entries with getEntries.
+    """
+    IsKeysFlag = 0x01
+    IsUnicodeFlag = 0x02
+    HasKeywordsFlag = 0x04
+    ActorTagPrefix = "act_"
+    CmdrTagPrefix = "cmdr_"
+    def __init__(self, maxEntries=DefaultMaxEntries, startIndex=0):
+        """Inputs:
+        - maxEntries: the maximum number of entries saved (older entries are discarded)
+        - startIndex: absolute index of the first entry to be appended
+        """
+        self.maxEntries = int(maxEntries)
+        if self.maxEntries < 1:
+            raise RuntimeError("maxEntries=%s; must be positive" % (maxEntries,))
+        self.startIndex = int(startIndex)
+        self.endIndex = self.startIndex
+
+        self._unixTimeArr = numpy.zeros(self.maxEntries, dtype=numpy.float64)
+        self._severityArr = numpy.zeros(self.maxEntries, dtype=numpy.int8)
+        self._cmdIDArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._actorIDArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._cmdrIDArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._flagsArr = numpy.zeros(self.maxEntries, dtype=numpy.uint8)
+        self._msgChunkArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._msgOffsetArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._msgLenArr = numpy.zeros(self.maxEntries, dtype=numpy.int32)
+        self._cmdInfoDict = {} # dict of absolute index: CmdInfo
+
+        self.actorInterner = StrInterner()
+        self.cmdrInterner = StrInterner()
+        self._strArena = StrArena()
+        self._tagsDict = {} # dict of (actor ID, cmdr ID): tuple of tags
+        self._replyParser = None
+        self._initIndexLists()
+
+    def append(self,
+        msgStr,
+        severity,
+        actor,
+        cmdr,
+        cmdID,
+        keywords = None,
+        cmdInfo = None,
+        unixTime = None,
+    ):
+        """Append a new entry, discarding the oldest entry if full; return the absolute index of the new entry
+
+        Inputs are as for LogEntry, plus:
+        - unixTime: unix time at which the entry was created; if None then use the current time
+        """
+        if unixTime is None:
+            unixTime = time.time()
+        if self.endIndex - self.startIndex >= self.maxEntries:
+            self._discardOldest()
+
+        index = self.endIndex
+        pos = index % self.maxEntries
+        flags = 0
+        if isinstance(msgStr, unicode):
+            msgStr = msgStr.encode("utf-8")
+            flags |= self.IsUnicodeFlag
+        if (actor and actor.startswith("keys")) or (cmdInfo and cmdInfo.actor.startswith("keys")):
+            flags |= self.IsKeysFlag
+        if keywords:
+            flags |= self.HasKeywordsFlag
+
+        msgChunk, msgOffset, msgLen = self._strArena.add(msgStr)
+        actorID = self.actorInterner.getID(actor)
+        cmdrID = self.cmdrInterner.getID(cmdr)
+        self._unixTimeArr[pos] = unixTime
+        self._severityArr[pos] = severity
+        self._cmdIDArr[pos] = int(cmdID)
+        self._actorIDArr[pos] = actorID
+        self._cmdrIDArr[pos] = cmdrID
+        self._flagsArr[pos] = flags
+        self._msgChunkArr[pos] = msgChunk
+        self._msgOffsetArr[pos] = msgOffset
+        self._msgLenArr[pos] = msgLen
+        self._getIndexList(self._actorIndexDict, actorID).append(index)
+        self._getIndexList(self._cmdrIndexDict, cmdrID).append(index)
+        self._getIndexList(self._severityIndexDict, int(severity)).append(index)
+        if flags & self.IsKeysFlag:
+            self._keysIndexList.append(index)
+        if cmdInfo is not None:
+            self._cmdInfoDict[index] = cmdInfo
+            self._cmdInfoIndexList.append(index)
+            cmdActorID = self.actorInterner.getID(cmdInfo.actor)
+            self._getIndexList(self._cmdActorIndexDict, cmdActorID).append(index)
+        self.endIndex += 1
+        return index
+
+    def clear(self):
+        """Discard all entries
+        """
+        self.startIndex = self.endIndex
+        self._cmdInfoDict = {}
+        self._strArena.freeBefore(self._strArena.currChunkNum)
+        self._initIndexLists()
+
+    def getActorIndices(self, actors):
+        """Return indices of entries whose actor or command actor is in actors
+
+        Inputs:
+        - actors: a collection of actor names (matched exactly)
+        """
+        indArrList = []
+        for actor in actors:
+            actorID = self.actorInterner.idDict.get(actor)
+            if actorID is None:
+                continue
+            for indexDict in (self._actorIndexDict, self._cmdActorIndexDict):
+                indexList = indexDict.get(actorID)
+                if indexList is not None:
+                    indArrList.append(indexList.getArray())
+        return unionIndices(indArrList)
+
+    def getAllIndices(self):
+        """Return indices of all entries
+        """
+        return numpy.arange(self.startIndex, self.endIndex, dtype=numpy.int64)
+
+    def getCmdInfoIndices(self, func=None):
+        """Return indices of entries that have cmdInfo
+
+        Inputs:
+        - func: if not None then only include entries for which func(cmdInfo) is true
+        """
+        indArr = self._cmdInfoIndexList.getArray()
+        if func is None:
+            return numpy.array(indArr)
+        return numpy.array([ind for ind in indArr if func(self._cmdInfoDict[ind])], dtype=numpy.int64)
+
+    def getCmdrIndices(self, func):
+        """Return indices of entries whose cmdr satisfies func(cmdr)
+
+        func is called once per distinct cmdr, not once per entry.
+        """
+        indArrList = []
+        for cmdrID, indexList in self._cmdrIndexDict.iteritems():
+            if func(self.cmdrInterner.getStr(cmdrID)):
+                indArrList.append(indexList.getArray())
+        return unionIndices(indArrList)
+
+    def getEntries(self, indices):
+        """Return a list of LogEntryView for a sequence of absolute indices
+        """
+        return [LogEntryView(self, int(index)) for index in indices]
+
+    def getKeysIndices(self):
+        """Return indices of keys entries (entries for which isKeys is true)
+        """
+        return numpy.array(self._keysIndexList.getArray())
+
+    def getSeverityIndices(self, minSeverity):
+        """Return indices of entries whose severity >= minSeverity
+        """
+        return unionIndices(indexList.getArray() for severity, indexList in self._severityIndexDict.iteritems()
+            if severity >= minSeverity)
+
+    def getEntry(self, index):
+        """Return a LogEntryView for the specified absolute index
+
+        Raise IndexError if the entry is not in the store.
+        """
+        self._getPos(index)
+        return LogEntryView(self, index)
+
+    def getNumBytes(self):
+        """Return the approximate number of bytes of memory used by this store
+        """
+        arrBytes = sum(arr.nbytes for arr in (
+            self._unixTimeArr, self._severityArr, self._cmdIDArr, self._actorIDArr, self._cmdrIDArr,
+            self._flagsArr, self._msgChunkArr, self._msgOffsetArr, self._msgLenArr,
+        ))
+        return arrBytes + self._strArena.getNumBytes()
+
+    def _discardOldest(self):
+        """Discard the oldest entry (which must exist)
+        """
+        oldIndex = self.startIndex
+        oldPos = oldIndex % self.maxEntries
+        self.startIndex += 1
+        self._actorIndexDict[int(self._actorIDArr[oldPos])].discardBefore(self.startIndex)
+        self._cmdrIndexDict[int(self._cmdrIDArr[oldPos])].discardBefore(self.startIndex)
+        self._severityIndexDict[int(self._severityArr[oldPos])].discardBefore(self.startIndex)
+        if self._flagsArr[oldPos] & self.IsKeysFlag:
+            self._keysIndexList.discardBefore(self.startIndex)
+        cmdInfo = self._cmdInfoDict.pop(oldIndex, None)
+        if cmdInfo is not None:
+            self._cmdInfoIndexList.discardBefore(self.startIndex)
+            self._cmdActorIndexDict[self.actorInterner.getID(cmdInfo.actor)].discardBefore(self.startIndex)
+        if self.startIndex < self.endIndex:
+            oldChunk = self._msgChunkArr[oldIndex % self.maxEntries]
+            newChunk = self._msgChunkArr[self.startIndex % self.maxEntries]
+            if newChunk != oldChunk:
+                self._strArena.freeBefore(newChunk)
+
+    def _getIndexList(self, indexDict, key):
+        """Return the IndexList for the specified key in indexDict, adding a new one if necessary
+        """
+        indexList = indexDict.get(key)
+        if indexList is None:
+            indexList = IndexList()
+            indexDict[key] = indexList
+        return indexList
+
+    def _initIndexLists(self):
+        """Create empty posting lists
+        """
+        self._actorIndexDict = {} # dict of actor ID: IndexList
+        self._cmdActorIndexDict = {} # dict of cmdInfo.actor ID: IndexList
+        self._cmdrIndexDict = {} # dict of cmdr ID: IndexList
+        self._severityIndexDict = {} # dict of severity: IndexList
+        self._keysIndexList = IndexList()
+        self._cmdInfoIndexList = IndexList()
+
+    def _getKeywords(self, pos):
+        """Return keywords for the entry at the specified position; re-parse msgStr if necessary
+        """
+        if not self._flagsArr[pos] & self.HasKeywordsFlag:
+            return opscore.protocols.messages.Keywords()
+        if self._replyParser is None:
+            self._replyParser = opscore.protocols.parser.ReplyParser()
+        try:
+            return self._replyParser.parse(self._getMsgStr(pos)).keywords
+        except Exception:
+            return opscore.protocols.messages.Keywords()
+
+    def _getMsgStr(self, pos):
+        """Return msgStr for the entry at the specified position
+        """
+        msgStr = self._strArena.get(self._msgChunkArr[pos], self._msgOffsetArr[pos], self._msgLenArr[pos])
+        if self._flagsArr[pos] & self.IsUnicodeFlag:
+            return msgStr.decode("utf-8")
+        return msgStr
+
+    def _getPos(self, index):
+        """Return the array position of the specified absolute index
+
+        Raise IndexError if the entry is not in the store.
+        """
+        if not self.startIndex <= index < self.endIndex:
+            raise IndexError("log entry %s is not in the store (which has entries %s-%s)" % \
+                (index, self.startIndex, self.endIndex - 1))
+        return index % self.maxEntries
+
+    def _getTags(self, pos):
+        """Return a list of tags for the entry at the specified position
+        """
+        idKey = (self._actorIDArr[pos], self._cmdrIDArr[pos])
+        tags = self._tagsDict.get(idKey)
+        if tags is None:
+            actor = self.actorInterner.getStr(idKey[0])
+            cmdr = self.cmdrInterner.getStr(idKey[1])
+            tagList = []
+            if cmdr:
+                tagList.append(self.CmdrTagPrefix + cmdr.lower())
+            if actor:
+                tagList.append(self.ActorTagPrefix + actor.lower())
+            tags = tuple(tagList)
+            self._tagsDict[idKey] = tags
+        return list(tags)
+
+    def __getitem__(self, ind):
+        """Return a LogEntryView given a relative index (0 is the oldest entry, -1 the newest)
+        """
+        numEntries = len(self)
+        if ind < 0:
+            ind += numEntries
+        if not 0 <= ind < numEntries:
+            raise IndexError("index %s out of range" % (ind,))
+        return LogEntryView(self, self.startIndex + ind)
+
+    def __iter__(self):
+        for index in xrange(self.startIndex, self.endIndex):
+            yield LogEntryView(self, index)
+
+    def __len__(self):
+        return self.endIndex - self.startIndex
+
+
 class LogSource(RO.AddCallback.BaseMixin):
     """Repository of messages from the dispatcher, designed for logging. A singleton.
     
     Supports callbacks via the standard interface (RO.AddCallback), including:
     - addCallback(func, callNow): register a callback function;
       whenever a log entry is added the function will be called with this LogSource as the sole argument
+
+    Also supports batch callbacks, which are much more efficient when messages arrive in bursts:
+    - addBatchCallback(func): register a batch callback function;
+      at most once every batchInterval seconds, if log entries have been added, the function is called
+      with two arguments: this LogSource and a list of the new entries (LogEntryView objects), oldest first.
     
     Useful attributes:
-    - entryList: an ordered collection of LogEntry objects
-    - lastEntry: the last entry added; None until the first entry is added
+    - entryList: an ordered collection of LogEntryView objects (a LogEntryStore)
+    - lastEntry: the last entry added (a LogEntryView); None until the first entry is added
+    - archive: the on-disk archive of log entries (a TUI.Models.LogArchive.LogArchive), or None if not archiving;
+        the archive holds all entries that have been discarded from entryList (and most that have not),
+        so use getEntry or getEntries to read old entries by index
     
     Each LogEntry has the following tags:
     - act_<LogEntry.actor>
     - cmdr_<LogEntry.cmdr>
     """
-    ActorTagPrefix = "act_"
-    CmdrTagPrefix = "cmdr_"
-    def __new__(cls, dispatcher, maxEntries=DefaultMaxEntries):
+    ActorTagPrefix = LogEntryStore.ActorTagPrefix
+    CmdrTagPrefix = LogEntryStore.CmdrTagPrefix
+    def __new__(cls, dispatcher, maxEntries=DefaultMaxEntries, batchInterval=DefaultBatchInterval, archiveDir=None):
         """Construct the singleton LogSource if not already constructed
         
         Inputs:
         - dispatcher: message dispatcher; an instance of opscore.actor.cmdkeydispatcher.CmdKeyVarDispatcher
-        - maxEntries: the maximum number of entries saved (older entries are removed)
+        - maxEntries: the maximum number of entries saved in memory (older entries are removed)
+        - batchInterval: minimum interval between calls to batch callback functions (sec)
+        - archiveDir: directory for the on-disk archive of log entries; if None then entries are not archived
         """
         if hasattr(cls, 'self'):
             return cls.self
 
+        # open the archive first, so if that fails the singleton is not created
+        archive = None
+        if archiveDir is not None:
+            # import here because LogArchive imports this module
+            from TUI.Models.LogArchive import LogArchive
+            archive = LogArchive(archiveDir)
+
         cls.self = object.__new__(cls)
         self = cls.self
 
         RO.AddCallback.BaseMixin.__init__(self)
-        self.entryList = collections.deque()
+        self.archive = archive
+        startIndex = self.archive.endIndex if self.archive else 0
+        self.entryList = LogEntryStore(maxEntries, startIndex=startIndex)
         # dictionary of hub unique command ID: CmdInfo
         # used to keep track of running commands so I can turn cmds.CmdDone into real information
         self.cmdDict = {}
         self.lastEntry = None
         self.maxEntries = int(maxEntries)
+        self.batchInterval = float(batchInterval)
+        self._batchCallbacks = []
+        self._batchEndIndex = 0 # index of the next entry to report to batch callbacks
+        # dict of batch callback function: index of the first entry to report to it,
+        # for callbacks registered since the last batch (they must not be told about older entries)
+        self._batchFirstIndexDict = {}
+        self._batchTimer = opscore.utility.timer.Timer()
         self.dispatcher = dispatcher
         self.dispatcher.setLogFunc(self.logMsg)
         self.cmdsModel = TUI.Models.getModel("cmds")
         self.cmdsModel.CmdQueued.addCallback(self._cmdQueuedCallback)
         self.cmdsModel.CmdDone.addCallback(self._cmdDoneCallback)
+        if self.archive:
+            self.addBatchCallback(self.archive.logSourceBatchCallback)
+            atexit.register(self._exitHandler)
         return self
         
     def __init__(self, *args, **kargs):
         pass
 
+    def addBatchCallback(self, callFunc):
+        """Add a batch callback function
+
+        Inputs:
+        - callFunc: function to call with two arguments: this LogSource and a list of new entries;
+            it will only be told about entries added after it was registered
+        """
+        if callFunc in self._batchCallbacks:
+            return
+        if not self._batchCallbacks:
+            self._batchEndIndex = self.entryList.endIndex
+        elif self.entryList.endIndex > self._batchEndIndex:
+            self._batchFirstIndexDict[callFunc] = self.entryList.endIndex
+        self._batchCallbacks.append(callFunc)
+
+    def getEntry(self, index):
+        """Return the entry with the specified absolute index, from memory if possible, else from the archive
+
+        Raise IndexError if the entry is not available.
+        """
+        if index >= self.entryList.startIndex or not self.archive:
+            return self.entryList.getEntry(index)
+        return self.archive.getEntry(index)
+
+    def getEntries(self, indices):
+        """Return a list of entries for a sequence of absolute indices (in increasing order)
+
+        Entries that are no longer in memory are read from the archive (if any).
+        """
+        if len(indices) == 0 or indices[0] >= self.entryList.startIndex or not self.archive:
+            return self.entryList.getEntries(indices)
+        return [self.getEntry(int(index)) for index in indices]
+
+    def getOldestIndex(self):
+        """Return the absolute index of the oldest entry available from getEntry
+        """
+        if self.archive:
+            return min(self.archive.startIndex, self.entryList.startIndex)
+        return self.entryList.startIndex
+
+    def removeBatchCallback(self, callFunc, doRaise=True):
+        """Remove a batch callback function
+
+        Inputs:
+        - callFunc: batch callback function to remove
+        - doRaise: raise ValueError if callFunc is not registered?
+        """
+        if callFunc in self._batchCallbacks:
+            self._batchCallbacks.remove(callFunc)
+            self._batchFirstIndexDict.pop(callFunc, None)
+            if not self._batchCallbacks:
+                self._batchTimer.cancel()
+        elif doRaise:
+            raise ValueError("Callback %r not found" % (callFunc,))
+
+    def _doBatchCallbacks(self):
+        """Call batch callback functions with the entries added since the last call
+        """
+        startIndex = max(self._batchEndIndex, self.entryList.startIndex)
+        self._batchEndIndex = self.entryList.endIndex
+        firstIndexDict = self._batchFirstIndexDict
+        self._batchFirstIndexDict = {}
+        if startIndex >= self._batchEndIndex:
+            return
+        logEntryList = self.entryList.getEntries(xrange(startIndex, self._batchEndIndex))
+        for callFunc in self._batchCallbacks[:]:
+            firstIndex = firstIndexDict.get(callFunc)
+            if firstIndex is None:
+                callEntryList = logEntryList
+            else:
+                callEntryList = logEntryList[max(firstIndex - startIndex, 0):]
+                if not callEntryList:
+                    continue
+            try:
+                callFunc(self, callEntryList)
+            except Exception:
+                sys.stderr.write("Batch callback %r failed\n" % (callFunc,))
+                traceback.print_exc(file=sys.stderr)
+
+    def _exitHandler(self):
+        """Archive entries that have not yet been archived and close the archive
+        """
+        startIndex = max(self.archive.endIndex, self.entryList.startIndex)
+        self.archive.logSourceBatchCallback(self, self.entryList.getEntries(xrange(startIndex, self.entryList.endIndex)))
+        self.archive.close()
+
     def _cmdDoneCallback(self, keyVar):
         """Handle cmds cmdDone keyword
 
@@ -222,7 +919,7 @@ class LogSource(RO.AddCallback.BaseMixin):
             cmdInfo = cmdInfo,
         )
 
-    def logEntryFromLogMsg(self,
+    def logMsg(self,
         msgStr,
         severity=RO.Constants.sevNormal,
         actor = TUI.Version.ApplicationName,
@@ -231,7 +928,10 @@ class LogSource(RO.AddCallback.BaseMixin):
         keywords = None,
         cmdInfo = None,
     ):
-        """Create a LogEntry from log message information.
+        """Add a log message to the repository.
+        
+        Warning: this function is designed as a callback from the dispatcher and only affects LogSource
+        and its clients (mostly log windows). The public function to log messages is tuiModel.logMsg.
         
         Inputs:
         - msgStr: message to display; a final \n is appended
@@ -243,10 +943,6 @@ class LogSource(RO.AddCallback.BaseMixin):
             warning: this is not KeyVars from the model; it is lower-level data
         - cmdInfo: CmdInfo object (only for synthesized command log entries)
         """
-        # strip keys. from keys.<actor>
-#         if actor and actor.startswith("keys."):
-#             actor = actor[5:]
-
         # demote severity of normal messages from cmds actor to debug
         if actor == "cmds" and severity == RO.Constants.sevNormal:
             severity = RO.Constants.sevDebug
@@ -255,50 +951,13 @@ class LogSource(RO.AddCallback.BaseMixin):
         if cmdr is None:
             cmdr = self.dispatcher.connection.getCmdr()
 
-        if keywords is None:
-            keywords = opscore.protocols.messages.Keywords()
+        if self._batchCallbacks and len(self.entryList) >= self.maxEntries \
+            and self._batchEndIndex <= self.entryList.startIndex:
+            # the oldest entry is about to be discarded but has not been reported to the batch callbacks
+            # (e.g. the archive); report pending entries now instead of waiting for the batch timer
+            self._doBatchCallbacks()
 
-        tags = []
-        if cmdr:
-            tags.append(self.CmdrTagPrefix + cmdr.lower())
-        if actor:
-            tags.append(self.ActorTagPrefix + actor.lower())
-        return LogEntry(
-            msgStr = msgStr,
-            severity = severity,
-            actor = actor,
-            cmdr = cmdr,
-            cmdID = cmdID,
-            tags = tags,
-            keywords = keywords,
-            cmdInfo = cmdInfo,
-        )
-
-    def logMsg(self,
-        msgStr,
-        severity=RO.Constants.sevNormal,
-        actor = TUI.Version.ApplicationName,
-        cmdr = None,
-        cmdID = 0,
-        keywords = None,
-        cmdInfo = None,
-    ):
-        """Add a log message to the repository.
-        
-        Warning: this function is designed as a callback from the dispatcher and only affects LogSource
-        and its clients (mostly log windows). The public function to log messages is tuiModel.logMsg.
-        
-        Inputs:
-        - msgStr: message to display; a final \n is appended
-        - severity: message severity (an RO.Constants.sevX constant)
-        - actor: name of actor; defaults to TUI
-        - cmdr: commander; defaults to self
-        - cmdID: command ID (an integer)
-        - keywords: parsed keywords (an opscore.protocols.messages.Keywords);
-            warning: this is not KeyVars from the model; it is lower-level data
-        - cmdInfo: CmdInfo object (only for synthesized command log entries)
-        """
-        self.lastEntry = self.logEntryFromLogMsg(
+        index = self.entryList.append(
             msgStr = msgStr,
             severity = severity,
             actor = actor,
@@ -307,7 +966,7 @@ class LogSource(RO.AddCallback.BaseMixin):
             keywords = keywords,
             cmdInfo = cmdInfo,
         )
-        self.entryList.append(self.lastEntry)
-        if len(self.entryList) > self.maxEntries:
-            self.entryList.popleft()
+        self.lastEntry = LogEntryView(self.entryList, index)
         self._doCallbacks()
+        if self._batchCallbacks and not self._batchTimer.isActive:
+            self._batchTimer.start(self.batchInterval, self._doBatchCallbacks)
@@ -4,7 +4,7 @@ Includes the following items:
 - dispatcher: the keyword dispatcher (opscore.actor.CmdKeyVarDispatcher)
     note: the network connection is dispatcher.connection
 - prefs: the application preferences (TUI.TUIPrefs.TUIPrefs)
-- tlSet: the set of toplevels (windows) (RO.Wdg.ToplevelSet)
+- tlSet: the set of toplevels (windows) (TUI.Base.DeferredToplevelSet.DeferredToplevelSet)
 - root: the root application window (Tkinter.Toplevel);
     mostly used when one to execute some Tkinter command
     (all of which require an arbitrary Tkinter object)
@@ -63,12 +63,17 @@ History:
 2011-08-16 ROwen    Added logFunc.
 2013-07-19 ROwen    Replaced getLoginExtra function with getPlatform.
 2013-10-22 ROwen    Implement ticket #1802: increase # of log windows from 5 to 10.
+2026-10-18          Archive log messages to disk (see TUI.Models.LogArchive), except in test mode.
+                    Use TUI.Base.DeferredToplevelSet for tlSet, so window modules can be loaded on demand.
+2026-10-18          Added headless mode, which does not use Tk (see TUI.Headless):
+                    added headless argument to Model and instance variable "headless".
 """
 import platform
 import sys
 import traceback
 import twisted.internet.tksupport
 import RO.Comm
+import RO.Comm.Generic
 import RO.Comm.HubConnection
 import RO.Constants
 import RO.OS
@@ -77,6 +82,8 @@ import RO.Wdg
 import opscore.actor.model
 import opscore.actor.cmdkeydispatcher
 import Tkinter
+import TUI.Base.DeferredToplevelSet
+import TUI.Headless
 import TUI.TUIPaths
 import TUI.TUIPrefs
 import TUI.Version
@@ -85,16 +92,33 @@ import LogSource
 MaxLogWindows = 10
 
 class Model(object):
-    def __new__(cls, testMode=False):
+    def __new__(cls, testMode=False, headless=None):
+        """Create or return the TUI model
+
+        Inputs (ignored if the model already exists):
+        - testMode: if True, use a null connection and log to stdout
+        - headless: if True, run without Tk (see TUI.Headless);
+            if None then use TUI.Headless.isHeadless()
+        """
         if hasattr(cls, 'self'):
             return cls.self
 
         cls.self = object.__new__(cls)
         self = cls.self
 
-        self.tkRoot = Tkinter.Frame().winfo_toplevel()
-        twisted.internet.tksupport.install(self.tkRoot)
-        self.reactor = twisted.internet.reactor
+        if headless is None:
+            headless = TUI.Headless.isHeadless()
+        self.headless = bool(headless)
+        if self.headless:
+            TUI.Headless.setHeadless(True)
+            if RO.Comm.Generic.getFramework() is None:
+                RO.Comm.Generic.setFramework("twisted")
+            self.reactor = twisted.internet.reactor
+            self.tkRoot = TUI.Headless.NullTkRoot(self.reactor)
+        else:
+            self.tkRoot = Tkinter.Frame().winfo_toplevel()
+            twisted.internet.tksupport.install(self.tkRoot)
+            self.reactor = twisted.internet.reactor
     
         platformStr = getPlatform()
         loginExtraStr = "type=%r version=%r platform=%r" % \
@@ -119,7 +143,17 @@ class Model(object):
         opscore.actor.model.Model.setDispatcher(self.dispatcher)
         
         # log source
-        self.logSource = LogSource.LogSource(self.dispatcher)
+        archiveDir = None
+        if not testMode:
+            try:
+                archiveDir = TUI.TUIPaths.getLogArchiveDir()
+            except Exception as e:
+                sys.stderr.write("Cannot archive log messages: %s\n" % (e,))
+        try:
+            self.logSource = LogSource.LogSource(self.dispatcher, archiveDir=archiveDir)
+        except Exception as e:
+            sys.stderr.write("Cannot open log archive %r: %s\n" % (archiveDir, e))
+            self.logSource = LogSource.LogSource(self.dispatcher)
         if testMode:
             def logToStdOut(logSource):
                 print logSource.lastEntry.getStr(), # final comma prevents extra newlines
@@ -129,17 +163,21 @@ class Model(object):
         self.logFunc = self.logSource.logMsg
     
         # TUI preferences
-        self.prefs = TUI.TUIPrefs.TUIPrefs()
+        self.prefs = TUI.TUIPrefs.TUIPrefs(headless=self.headless)
         
         # TUI window (topLevel) set;
         # this starts out empty; others add windows to it
-        self.tlSet = RO.Wdg.ToplevelSet(
-            fileName = TUI.TUIPaths.getGeomFile(),
-            createFile = True,  # create file if it doesn't exist
-        )
+        if self.headless:
+            self.tlSet = TUI.Base.DeferredToplevelSet.NullToplevelSet(logFunc=self.logFunc)
+        else:
+            self.tlSet = TUI.Base.DeferredToplevelSet.DeferredToplevelSet(
+                fileName = TUI.TUIPaths.getGeomFile(),
+                createFile = True,  # create file if it doesn't exist
+                logFunc = self.logFunc,
+            )
 
-        # set up standard bindings (since the defaults are poor)
-        RO.Wdg.stdBindings(self.tkRoot)
+            # set up standard bindings (since the defaults are poor)
+            RO.Wdg.stdBindings(self.tkRoot)
 
         # set up the base URL for TUI help
         RO.Constants._setHelpURLBase (getBaseHelpURL())
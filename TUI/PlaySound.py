@@ -22,14 +22,16 @@ Gets the sounds from TUI preferences.
                     Also changed the sound for invalid keys to Serious Alert from Critical Alert.
 2010-03-12 ROwen    Changed to use Models.getModel.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Play nothing when running without Tk (see TUI.Headless).
 """
+import TUI.Headless
 import TUI.Models
 
 _Prefs = None
 _PlaySoundsPref = None
 
 def _playSound(name):
-    if name is None:
+    if name is None or TUI.Headless.isHeadless():
         return
     global _Prefs, _PlaySoundsPref
     if _Prefs is None:
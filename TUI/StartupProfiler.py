@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+"""Measure where the time goes while TUI starts up.
+
+To use, set environment variable TUI_STARTUP_PROFILE before starting TUI:
+- TUI_STARTUP_PROFILE: path of report file, or "-" to write the report to stdout
+- TUI_STARTUP_BUDGET (optional): time budget, in seconds, as a comma-separated list of category=sec;
+    the special category "total" is the wall time from the start of profiling until the report;
+    for example: "total=8,import=4,window=2".
+    If any budget is exceeded then TUI reports the problem and quits with exit status 1.
+
+Categories are:
+- import: importing a module (only the first import of a module is recorded)
+- model: creating a model (see TUI.Models.getModel)
+- window: creating a window, including its widget (see RO.Wdg.ToplevelSet.createToplevel)
+- script: reopening a script window (see TUI.Base.ScriptLoader.reopenScriptWindows)
+- startup: other startup steps (see TUI.Main)
+
+Each item records total time and self time (total time minus the time of items nested within it,
+e.g. the modules imported by a module). Category times are sums of self time,
+so nothing is counted twice.
+
+This module must only import from the standard library, because it is started
+before the expensive imports.
+
+History:
+2026-10-18          Initial version.
+"""
+import __builtin__
+import os
+import sys
+import time
+
+__all__ = ["start", "startFromEnviron", "timeIt", "finish", "StartupProfiler"]
+
+ReportEnvVar = "TUI_STARTUP_PROFILE"
+BudgetEnvVar = "TUI_STARTUP_BUDGET"
+
+_profiler = None
+
+class _NullTimer(object):
+    """A context manager that does nothing; used when not profiling
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+_nullTimer = _NullTimer()
+
+class _ItemTimer(object):
+    """A context manager that times one item for a StartupProfiler
+    """
+    def __init__(self, profiler, category, name):
+        self.profiler = profiler
+        self.category = category
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._beginItem()
+        return self
+
+    def __exit__(self, *args):
+        self.profiler._endItem(self.category, self.name)
+        return False
+
+
+class StartupProfiler(object):
+    """Record the wall time of startup steps and imports
+    """
+    def __init__(self, reportPath=None, budgetDict=None):
+        """Inputs:
+        - reportPath: path of report file; None or "-" for stdout
+        - budgetDict: dict of category: maximum time (sec); "total" is the budget for all of startup
+        """
+        self.reportPath = reportPath
+        self.budgetDict = dict(budgetDict or {})
+        self.startTime = time.time()
+        self.itemList = [] # list of (self time, total time, category, name)
+        self._stack = [] # for each item in progress: [start time, time spent in nested items]
+        self._origImport = None
+
+    def installImportHook(self):
+        """Start recording import times
+        """
+        if self._origImport is not None:
+            return
+        self._origImport = __builtin__.__import__
+        __builtin__.__import__ = self._import
+
+    def removeImportHook(self):
+        """Stop recording import times
+        """
+        if self._origImport is None:
+            return
+        if __builtin__.__import__ == self._import:
+            __builtin__.__import__ = self._origImport
+        self._origImport = None
+
+    def timeIt(self, category, name):
+        """Return a context manager that records the time taken by the enclosed code
+        """
+        return _ItemTimer(self, category, name)
+
+    def getCategoryTimes(self):
+        """Return a dict of category: (number of items, sum of self time)
+        """
+        catDict = {}
+        for selfTime, totalTime, category, name in self.itemList:
+            num, catTime = catDict.get(category, (0, 0.0))
+            catDict[category] = (num + 1, catTime + selfTime)
+        return catDict
+
+    def getBudgetErrors(self, totalTime):
+        """Return a list of strings describing exceeded budgets (empty if none)
+        """
+        catDict = self.getCategoryTimes()
+        errList = []
+        for category, budget in sorted(self.budgetDict.iteritems()):
+            if category == "total":
+                catTime = totalTime
+            else:
+                catTime = catDict.get(category, (0, 0.0))[1]
+            if catTime > budget:
+                errList.append("%s startup time %0.2f sec > budget %0.2f sec" % (category, catTime, budget))
+        return errList
+
+    def getReport(self, totalTime):
+        """Return the report as a list of lines (without trailing newlines)
+        """
+        lineList = ["Startup profile: %0.3f sec total" % (totalTime,)]
+        lineList.append("")
+        lineList.append("%-10s %6s %10s" % ("category", "count", "self sec"))
+        catDict = self.getCategoryTimes()
+        for category, (num, catTime) in sorted(catDict.iteritems(), key=lambda item: -item[1][1]):
+            lineList.append("%-10s %6d %10.3f" % (category, num, catTime))
+        otherTime = totalTime - sum(catTime for num, catTime in catDict.itervalues())
+        lineList.append("%-10s %6s %10.3f" % ("(other)", "", otherTime))
+
+        lineList.append("")
+        lineList.append("%10s %10s %-10s %s" % ("self sec", "total sec", "category", "name"))
+        for selfTime, totalItemTime, category, name in sorted(self.itemList, reverse=True):
+            lineList.append("%10.4f %10.4f %-10s %s" % (selfTime, totalItemTime, category, name))
+
+        budgetErrList = self.getBudgetErrors(totalTime)
+        if budgetErrList:
+            lineList.append("")
+            lineList += ["Budget exceeded: %s" % (errMsg,) for errMsg in budgetErrList]
+        return lineList
+
+    def writeReport(self, totalTime):
+        """Write the report
+        """
+        reportStr = "\n".join(self.getReport(totalTime)) + "\n"
+        if self.reportPath in (None, "-"):
+            sys.stdout.write(reportStr)
+        else:
+            with open(self.reportPath, "w") as outFile:
+                outFile.write(reportStr)
+
+    def _beginItem(self):
+        self._stack.append([time.time(), 0.0])
+
+    def _endItem(self, category, name):
+        startTime, nestedTime = self._stack.pop()
+        totalTime = time.time() - startTime
+        if self._stack:
+            self._stack[-1][1] += totalTime
+        self.itemList.append((totalTime - nestedTime, totalTime, category, name))
+
+    def _import(self, name, globals=None, locals=None, fromlist=None, level=-1):
+        """Replacement for __builtin__.__import__ that records the time of first imports
+        """
+        numModules = len(sys.modules)
+        self._stack.append([time.time(), 0.0])
+        try:
+            return self._origImport(name, globals, locals, fromlist, level)
+        finally:
+            startTime, nestedTime = self._stack.pop()
+            if len(sys.modules) > numModules:
+                totalTime = time.time() - startTime
+                if self._stack:
+                    self._stack[-1][1] += totalTime
+                self.itemList.append((totalTime - nestedTime, totalTime, "import", self._getModName(name, globals)))
+
+    def _getModName(self, name, globals):
+        """Return the full name of an imported module (name may be relative to the importing module)
+        """
+        if globals and globals.get("__name__"):
+            if "__path__" in globals:
+                pkgName = globals["__name__"]
+            else:
+                pkgName = globals["__name__"].rpartition(".")[0]
+            if pkgName:
+                # python 2 records failed implicit relative imports as None
+                relName = "%s.%s" % (pkgName, name)
+                if sys.modules.get(relName) is not None:
+                    return relName
+        return name
+
+
+def start(reportPath=None, budgetDict=None):
+    """Start profiling startup (if not already started) and return the StartupProfiler
+
+    Inputs: see StartupProfiler
+    """
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler(reportPath=reportPath, budgetDict=budgetDict)
+        _profiler.installImportHook()
+    return _profiler
+
+def startFromEnviron():
+    """Start profiling startup if environment variable TUI_STARTUP_PROFILE is set
+
+    Return the StartupProfiler, or None if not profiling.
+    Raise RuntimeError if TUI_STARTUP_BUDGET cannot be parsed.
+    """
+    reportPath = os.environ.get(ReportEnvVar)
+    if not reportPath:
+        return None
+    budgetDict = {}
+    budgetStr = os.environ.get(BudgetEnvVar, "")
+    for budgetItem in budgetStr.split(","):
+        if not budgetItem.strip():
+            continue
+        try:
+            category, budget = budgetItem.split("=")
+            budgetDict[category.strip()] = float(budget)
+        except ValueError:
+            raise RuntimeError("Could not parse %s=%r: item %r is not category=sec" % (BudgetEnvVar, budgetStr, budgetItem))
+    return start(reportPath=reportPath, budgetDict=budgetDict)
+
+def timeIt(category, name):
+    """Return a context manager that records the time taken by the enclosed code, if profiling
+
+    If not profiling then the context manager does nothing.
+    """
+    if _profiler is None:
+        return _nullTimer
+    return _profiler.timeIt(category, name)
+
+def finish():
+    """Stop profiling and write the report
+
+    Return True if not profiling or startup is within budget, False if any budget was exceeded.
+    Budget errors are also written to stderr.
+    """
+    global _profiler
+    if _profiler is None:
+        return True
+    profiler = _profiler
+    _profiler = None
+    profiler.removeImportHook()
+    totalTime = time.time() - profiler.startTime
+    profiler.writeReport(totalTime)
+    budgetErrList = profiler.getBudgetErrors(totalTime)
+    for errMsg in budgetErrList:
+        sys.stderr.write("Startup budget exceeded: %s\n" % (errMsg,))
+    return not budgetErrList
@@ -26,6 +26,8 @@ History:
 2012-07-10 ROwen    Removed use of update_idletasks.
 2015-11-05 ROwen    Ditched obsolete "except (SystemExit, KeyboardInterrupt): raise" code.
                     Modernized "except" syntax.
+2026-10-18          Menu entries are labelled without creating a TelTarget for each catalog object
+                    (if the catalog's objList supports getLabel); the TelTarget is created when selected.
 """
 import os
 import sys
@@ -124,7 +126,8 @@ class CatalogMenuWdg(Tkinter.Frame):
             del catDict[catName]
             self.userCatDict.set(catDict)
     
-    def _doMenu(self, obj):
+    def _doMenu(self, objCat, ind):
+        obj = objCat.objList[ind]
 #       print "_doMenu(%r)" % (obj,)
         if self.callFunc:
             self.callFunc(obj)          
@@ -173,6 +176,10 @@ class CatalogMenuWdg(Tkinter.Frame):
         """
         catName = objCat.name
         objList = objCat.objList
+        if hasattr(objList, "getLabel"):
+            getLabel = objList.getLabel
+        else:
+            getLabel = lambda ind: str(objList[ind])
         
         # create new menu(s)
         begInd = 0
@@ -192,11 +199,10 @@ class CatalogMenuWdg(Tkinter.Frame):
                 master = self.menu,
                 tearoff = False,
             )
-            for obj in objList[begInd:endInd]:
-                item = str(obj)
+            for ind in range(begInd, endInd):
                 menu.add_command(
-                    label = item,
-                    command = RO.Alg.GenericCallback(self._doMenu, obj),
+                    label = getLabel(ind),
+                    command = RO.Alg.GenericCallback(self._doMenu, objCat, ind),
                 )
                 
             menu.add_separator()
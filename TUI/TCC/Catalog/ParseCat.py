@@ -21,8 +21,16 @@ History:
 2012-08-29 ROwen    Ditched obsolete "except (SystemExit, KeyboardInterrupt): raise" code
                     Removed use of deprecated dict.has_key method.
 2015-11-05 ROwen    Modernized "except" syntax.
+2026-10-18          Made parseCat much faster for large catalogs:
+                    - The objects are stored as a TUI.TCC.TelTarget.TargetList, which creates
+                      each TelTarget when it is first needed.
+                    - The parsed catalog is cached in a file next to the catalog (see cachePathFromCatPath)
+                      and reused if the catalog file has not changed; use parseCat(useCache=False) to disable.
+                    - Identical option strings are only parsed once.
+                    Bug fix: catalog options (doDisplay and dispColor) leaked from one catalog to the next.
 """
-import os.path
+import marshal
+import os
 import re
 import Tkinter
 import GetString
@@ -53,6 +61,15 @@ _CatOptionDict = {
     "dispColor": "black",
 }
 
+# version of parsed catalog cache file format; increment if the format or parsing changes
+_CacheVersion = 1
+
+def cachePathFromCatPath(filePath):
+    """Return the path of the parsed catalog cache file for a catalog file
+    """
+    dirName, baseName = os.path.split(filePath)
+    return os.path.join(dirName, ".%s.tuicache" % (baseName,))
+
 class CatalogParser(object):
     """Object that will read in object catalogs, expand abbreviations,
     correct case and check limits.
@@ -84,9 +101,15 @@ class CatalogParser(object):
         )
         self._catOptions = _CatOptionDict
     
-    def parseCat(self, filePath):
+    def parseCat(self, filePath, useCache=True):
         """Parse a catalog given its full file path.
         
+        Inputs:
+        - filePath: path to catalog file
+        - useCache: if True then use the cached parsed catalog, if the cache is current,
+            else parse the catalog and try to write a new cache file (see cachePathFromCatPath);
+            failure to read or write the cache file is silently ignored
+
         Returns two items:
         - objCat: the catalog as a TUI.TCC.TelTarget.Catalog
         - errList: a list of (line, errMsg) tuples, one per rejected line of object data
@@ -96,17 +119,67 @@ class CatalogParser(object):
         Uses universal newline support (new in Python 2.3) if possible.
         """
 #       print "parseCat(%r)" % (filePath,)
-        fp = RO.OS.openUniv(filePath)
         catName = os.path.basename(filePath)
+        try:
+            fileStat = os.stat(filePath)
+        except OSError as e:
+            raise RuntimeError(RO.StringUtil.strFromException(e))
+        fileKey = (fileStat.st_mtime, fileStat.st_size)
+
+        catData = None
+        if useCache:
+            catData = self._readCache(filePath, fileKey)
+        if catData is None:
+            catData = self._parseFile(filePath)
+            if useCache:
+                self._writeCache(filePath, fileKey, catData)
+
+        # create catalog
+        catOptions = dict(catData["catOptions"])
+        catOptions["doDisplay"] = RO.CnvUtil.asBool(catOptions["doDisplay"])
+#       print "parseCat: catOptions =", catOptions
+        objList = TUI.TCC.TelTarget.TargetList(
+            nameList = catData["nameList"],
+            posStrList = catData["posStrList"],
+            optIndList = catData["optIndList"],
+            optDictList = catData["optDictList"],
+        )
+        objCat = TUI.TCC.TelTarget.Catalog (
+            name = catName,
+            objList = objList,
+        **catOptions)
+        errList = list(catData["errList"])
+#       print "parseCat returning (%r, %r)" % (objCat, errList)
+        return objCat, errList
+
+    def _parseFile(self, filePath):
+        """Parse a catalog file, one line at a time.
+
+        Returns a dict containing:
+        - catOptions: catalog options (see _CatOptionDict)
+        - nameList, posStrList, optIndList, optDictList: object data; see TUI.TCC.TelTarget.TargetList
+        - errList: a list of (line, errMsg) tuples, one per rejected line of object data
+
+        Raises RuntimeError if the file cannot be read or a default is invalid.
+        """
+        try:
+            fp = RO.OS.openUniv(filePath)
+        except (IOError, OSError) as e:
+            raise RuntimeError(RO.StringUtil.strFromException(e))
 
+        self._catOptions = _CatOptionDict.copy()
         defOptionDict = self._keyMatcher.matchKeys({
             "CSys": "FK5",
             "RotType": "Object",
         })
         errList = []
-        objList = []
+        nameList = []
+        posStrList = []
+        optIndList = []
+        optDictList = []
+        optIndDict = {} # dict of repr(sorted value dict items): index in optDictList
+        parsedOptDict = {} # dict of option string: parsed options
         
-        # save checkWdg data, then use try/finally to restore no matter what
         ii = 0
         for line in fp:
             ii += 1
@@ -137,7 +210,10 @@ class CatalogParser(object):
                         optionStr = line
         
                 if optionStr:
-                    optDict = ParseData.parseKeyValueData(optionStr)
+                    optDict = parsedOptDict.get(optionStr)
+                    if optDict is None:
+                        optDict = ParseData.parseKeyValueData(optionStr)
+                        parsedOptDict[optionStr] = optDict
                 else:
                     optDict = {}
                 
@@ -162,24 +238,73 @@ class CatalogParser(object):
                     # and check the result
                     self._combineDicts(dataDict, optDict)
                     
-                    objList.append(TUI.TCC.TelTarget.TelTarget(dataDict))
+                    # save the name and position separately and the remaining data only once
+                    nameList.append(dataDict.pop("Name"))
+                    posStrList.append(tuple(dataDict.pop("ObjPos")))
+                    dataDict = dict(dataDict)
+                    optKey = repr(sorted(dataDict.iteritems()))
+                    optInd = optIndDict.get(optKey)
+                    if optInd is None:
+                        optInd = len(optDictList)
+                        optDictList.append(dataDict)
+                        optIndDict[optKey] = optInd
+                    optIndList.append(optInd)
             except Exception as e:
                 if isDefault:
                     raise RuntimeError(RO.StringUtil.strFromException(e))
                 else:
                     errList.append((line, RO.StringUtil.strFromException(e)))
+        fp.close()
         
-        # convert catalog options as appropriate
-        self._catOptions["doDisplay"] = RO.CnvUtil.asBool(self._catOptions["doDisplay"])
+        return dict(
+            catOptions = self._catOptions,
+            nameList = nameList,
+            posStrList = posStrList,
+            optIndList = optIndList,
+            optDictList = optDictList,
+            errList = errList,
+        )
 
-        # create catalog
-#       print "parseCat: catOptions =", self._catOptions
-        objCat = TUI.TCC.TelTarget.Catalog (
-            name = catName,
-            objList = objList,
-        **self._catOptions)
-#       print "parseCat returning (%r, %r)" % (objCat, errList)
-        return objCat, errList
+    def _readCache(self, filePath, fileKey):
+        """Return cached parsed catalog data (see _parseFile), or None if unavailable or out of date
+
+        Inputs:
+        - filePath: path to catalog file
+        - fileKey: (modification time, size) of catalog file
+        """
+        try:
+            with open(cachePathFromCatPath(filePath), "rb") as cacheFile:
+                cacheDict = marshal.load(cacheFile)
+            if cacheDict.get("version") != _CacheVersion or cacheDict.get("fileKey") != fileKey:
+                return None
+            return cacheDict["catData"]
+        except Exception:
+            return None
+
+    def _writeCache(self, filePath, fileKey, catData):
+        """Write parsed catalog data to the cache file; silently give up on failure
+
+        Inputs:
+        - filePath: path to catalog file
+        - fileKey: (modification time, size) of catalog file
+        - catData: parsed catalog data (see _parseFile)
+        """
+        cachePath = cachePathFromCatPath(filePath)
+        tempPath = cachePath + ".tmp"
+        cacheDict = dict(
+            version = _CacheVersion,
+            fileKey = fileKey,
+            catData = catData,
+        )
+        try:
+            with open(tempPath, "wb") as cacheFile:
+                marshal.dump(cacheDict, cacheFile)
+            os.rename(tempPath, cachePath)
+        except Exception:
+            try:
+                os.remove(tempPath)
+            except Exception:
+                pass
     
     def _combineDicts(self, defDict, newDict):
         """Combine a new dictionary into an existing default dictionary.
@@ -255,8 +380,8 @@ if __name__ == "__main__":
     print "Catalog name = %r, doDisplay = %r, dispColor = %r" % \
         (objCat.name, objCat.getDoDisplay(), objCat.getDispColor())
     print "The catalog contains the following objects:"
-    for item in objCat.objList:
-        print item
+    for ind in range(len(objCat.objList)):
+        print objCat.objList.getLabel(ind)
     
     if errList:
         print "The following items could not be parsed:"
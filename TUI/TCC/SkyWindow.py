@@ -47,8 +47,17 @@ History:
 2012-07-09 ROwen    Modified to use RO.TkUtil.Timer.
 2012-08-31 ROwen    Bug fix: change sr.isExecuting() to sr.isExecuting.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Sped up display of large catalogs:
+                    - Compute the pixel positions of all objects in a catalog at once, using numpy
+                      and TUI.TCC.TelTarget.Catalog.getAzAltArr.
+                    - findNearestStar uses a TUI.Base.GridIndex for each catalog instead of a linear search.
+                    Replaced catPixPosObjDict with catIndexDict.
+2026-10-18          By default catalog objects are drawn as dots on a single PhotoImage (see _CatDotImage),
+                    which is updated in place, instead of as one canvas oval per object.
+                    Added useCatImage argument to SkyWdg.
 """
 import math
+import numpy
 import Tkinter
 import RO.CanvasUtil
 import RO.CnvUtil
@@ -56,6 +65,7 @@ import RO.MathUtil
 from RO.TkUtil import Timer
 import RO.Wdg
 from opscore.actor import ScriptRunner
+import TUI.Base.GridIndex
 import TUI.Base.Wdg
 import TUI.Models
 import TUI.TCC.UserModel
@@ -125,7 +135,15 @@ class SkyWdg (Tkinter.Frame):
     AzWrapItemRad = 3
     AzWrapMargin = 5
     AzAltMargin = 10
-    def __init__(self, master, width=201, height=201):
+    def __init__(self, master, width=201, height=201, useCatImage=True):
+        """Create a SkyWdg
+
+        Inputs:
+        - master: master widget
+        - width, height: initial size of canvas (pixels)
+        - useCatImage: if True, draw catalog objects as dots on one image, which is much faster
+            for large catalogs; if False, draw each catalog object as a canvas oval
+        """
         Tkinter.Frame.__init__(self, master)
         
         self.tuiModel = TUI.Models.getModel("tui")
@@ -154,6 +172,10 @@ class SkyWdg (Tkinter.Frame):
 #           background='black',
             selectborderwidth=0, highlightthickness=0)
         self.cnv.grid(row=0, column=0, sticky="nsew")
+        if useCatImage:
+            self.catImage = _CatDotImage(self.cnv)
+        else:
+            self.catImage = None
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
         RO.Wdg.addCtxMenu(
@@ -182,11 +204,11 @@ class SkyWdg (Tkinter.Frame):
         
         # various dictionaries whose keys are catalog name
         # note: if a catalog is deleted, it is removed from catDict
-        # and catPixPosObjDict, but not necessarily the others
+        # and catIndexDict, but not necessarily the others
         self.catDict = {}   # key=catalog name, value = catalog
         self.catRedrawTimerDict = {}    # key=catalog name, value = tk after id
         self.catColorDict = {}  # key=catalog name, value = color
-        self.catPixPosObjDict = {}  # key=catalog name, value = list of (pix pos, obj) pairs
+        self.catIndexDict = {}  # key=catalog name, value = _CatPixIndex of displayed objects
         self.catSRDict = {} # key=catalog name, value = scriptrunner script to redisplay catalog
 
         self.telCurrent = None
@@ -357,7 +379,7 @@ class SkyWdg (Tkinter.Frame):
             self.removeCatalogByName(catName)
         
         self.catDict[catName] = catalog
-        self.catPixPosObjDict[catName] = []
+        self.catIndexDict[catName] = _CatPixIndex.Empty
         self.catRedrawTimerDict[catName] = Timer()
         self.catColorDict[catName] = catalog.getDispColor()
         
@@ -367,8 +389,10 @@ class SkyWdg (Tkinter.Frame):
             catTag = "cat_%s" % (catName,)
             
             if not catalog.getDoDisplay():
-                self.catPixPosObjDict[catName] = []
+                self.catIndexDict[catName] = _CatPixIndex.Empty
                 self.cnv.delete(catTag)
+                if self.catImage:
+                    self.catImage.removeCatalog(catName)
                 return
     
             # if color has changed, update it
@@ -379,27 +403,28 @@ class SkyWdg (Tkinter.Frame):
                 self.catColorDict[catName] = color
                 
 #           print "compute %s thread starting" % catName
-            yield sr.waitThread(_UpdateCatalog, catalog.objList, self.center, self.azAltScale)
-            pixPosObjList = sr.value
+            yield sr.waitThread(_UpdateCatalog, catalog, self.center, self.azAltScale)
+            catIndex = sr.value
 #           print "compute %s thread done" % catName
 
             catName = catalog.name
             catTag = "cat_%s" % (catName,)
     
-            self.catPixPosObjDict[catName] = []
-            self.cnv.delete(catTag)
-    
             color = catalog.getDispColor()      
-            rad = 2 # for now, eventually may wish to vary by magnitude or window size or...?
-            for pixPos, obj in pixPosObjList:
-                self.cnv.create_oval(
-                    pixPos[0] - rad,     pixPos[1] - rad,
-                    pixPos[0] + rad + 1, pixPos[1] + rad + 1,
-                    tag = (SkyWdg.CATOBJECT, catTag),
-                    fill = color,
-                    outline = color,
-                )
-            self.catPixPosObjDict[catName] = pixPosObjList
+            if self.catImage:
+                self.catImage.setDots(catName, color, catIndex.xArr, catIndex.yArr)
+            else:
+                self.cnv.delete(catTag)
+                rad = 2 # for now, eventually may wish to vary by magnitude or window size or...?
+                for x, y in zip(catIndex.xArr.tolist(), catIndex.yArr.tolist()):
+                    self.cnv.create_oval(
+                        x - rad,     y - rad,
+                        x + rad + 1, y + rad + 1,
+                        tag = (SkyWdg.CATOBJECT, catTag),
+                        fill = color,
+                        outline = color,
+                    )
+            self.catIndexDict[catName] = catIndex
             
             self.catRedrawTimerDict[catName].start(_CatRedrawDelay, self._drawCatalog, catalog)
         
@@ -423,6 +448,8 @@ class SkyWdg (Tkinter.Frame):
         cat.removeCallback(self._drawCatalog, doRaise=False)
         catTag = "cat_%s" % (catName,)
         self.cnv.delete(catTag)
+        if self.catImage:
+            self.catImage.removeCatalog(catName)
         
         # cancel script runner and delete entry
         try:
@@ -440,24 +467,23 @@ class SkyWdg (Tkinter.Frame):
         timer.cancel()
         
         # delete entry in other catalog dictionaries
-        for catDict in self.catPixPosObjDict, self.catColorDict:
+        for catDict in self.catIndexDict, self.catColorDict:
             try:
                 del catDict[catName]
             except KeyError:
                 pass
 
     def findNearestStar(self, xyPix, maxDistSq=9.0e99):
-        """Finds the catalog object nearest to xyPix, but only if
-        the squared distance is within maxDistSq deg^2
+        """Finds the displayed catalog object nearest to xyPix, but only if
+        the squared distance is within maxDistSq pixels^2
         Returns the catalog object, or None if none found"""
         minStar = None
-        minDistSq = maxDistSq
-        for pixPosCatObjList in self.catPixPosObjDict.itervalues():
-            for objPixPos, catObj in pixPosCatObjList:
-                distSq = (objPixPos[0] - xyPix[0])**2 + (objPixPos[1] - xyPix[1])**2
-                if distSq < minDistSq:
-                    minStar = catObj
-                    minDistSq = distSq
+        minDist = math.sqrt(maxDistSq)
+        for catIndex in self.catIndexDict.itervalues():
+            catObj, dist = catIndex.findNearest(xyPix, minDist)
+            if catObj is not None and dist < minDist:
+                minStar = catObj
+                minDist = dist
         return minStar
     
     def pixFromAzAlt(self, azAlt):
@@ -521,6 +547,8 @@ class SkyWdg (Tkinter.Frame):
         self.cnv.delete('all')
         
         # draw everything
+        if self.catImage:
+            self.catImage.reset()
         self._drawGrid()
         self._drawLabels()
         self.azWrapGauge.draw()
@@ -531,8 +559,10 @@ class SkyWdg (Tkinter.Frame):
     def _drawAllCatalogs(self):
         """Draw all objects in all catalogs, erasing all stars first.
         """
-        self.catPixPosObjDict = {}
+        self.catIndexDict = dict((catName, _CatPixIndex.Empty) for catName in self.catDict)
         self.cnv.delete(SkyWdg.CATOBJECT)
+        if self.catImage:
+            self.catImage.clear()
         for catalog in self.catDict.itervalues():
             self._drawCatalog(catalog)
             
@@ -652,25 +682,183 @@ class SkyWdg (Tkinter.Frame):
         self._telPotentialAnimTimer.start(_CatRedrawDelay, self._drawTelPotential)
 
 
-def _UpdateCatalog(objList, center, azAltScale):
-    """Returns a list of [pixPos, obj] for the specified catalog.
-    Can be run as a background thread.
+class _CatDotImage(object):
+    """Catalog objects drawn as dots on one Tk PhotoImage, displayed as a single canvas item
+    
+    The image is updated in place: when a catalog is updated, only the dots that have moved
+    are erased and drawn, so the cost is proportional to the number of changed dots
+    rather than the number of catalog objects (objects move about a pixel every few minutes).
+    The image is opaque (filled with the canvas background color) and lies below all other canvas items.
     """
-    pixPosObjList = []
-    for catObj in objList:
-        azAlt = catObj.getAzAlt()
-        if azAlt[1] < 0:
-            continue
-        
-        xyDeg = xyDegFromAzAlt(azAlt)
-        pixPos = (
-            center[0] - (xyDeg[0] * azAltScale),
-            center[1] - (xyDeg[1] * azAltScale),
-        )
+    DotRad = 2
+    # if more than this fraction of the dots have changed, redraw the whole image
+    MaxChangedFrac = 0.5
 
-        pixPosObjList.append((pixPos, catObj))
+    def __init__(self, cnv):
+        """Inputs:
+        - cnv: the Tkinter.Canvas on which to display the image
+        """
+        self.cnv = cnv
+        self.image = None
+        self.imageSize = (0, 0)
+        self.bgColor = self._hexColor(cnv["background"])
+        self.catNameList = [] # names of catalogs, in order drawn (last is on top)
+        self.catDotDict = {} # catalog name: (#rrggbb color, set of dot centers as integer (x, y) pixel tuples)
+        # offsets of dots that overlap a dot at (0, 0)
+        overlapRange = range(-2 * self.DotRad, 2 * self.DotRad + 1)
+        self._overlapOffsetList = [(dx, dy) for dx in overlapRange for dy in overlapRange]
+
+    def reset(self):
+        """Create a new image the size of the canvas and display it; call after deleting all canvas items
+        """
+        self.imageSize = (self.cnv.winfo_width(), self.cnv.winfo_height())
+        self.image = Tkinter.PhotoImage(width=self.imageSize[0], height=self.imageSize[1])
+        self.cnv.create_image(0, 0, image=self.image, anchor="nw")
+        self.clear()
+
+    def clear(self):
+        """Remove all dots
+        """
+        self.catNameList = []
+        self.catDotDict = {}
+        self._drawAll()
+
+    def removeCatalog(self, catName):
+        """Remove all dots for the named catalog (if any)
+        """
+        if catName not in self.catDotDict:
+            return
+        self.setDots(catName, None, [], [])
+        self.catNameList.remove(catName)
+        del self.catDotDict[catName]
+
+    def setDots(self, catName, color, xArr, yArr):
+        """Set the dots for one catalog, replacing any existing dots for that catalog
 
-    return pixPosObjList
+        Inputs:
+        - catName: catalog name
+        - color: color of dots
+        - xArr, yArr: x, y pixel position of each dot (numpy arrays)
+        """
+        if self.image is None:
+            return
+        if color is not None:
+            color = self._hexColor(color)
+        newDotSet = set(zip(
+            numpy.round(xArr).astype(int).tolist(),
+            numpy.round(yArr).astype(int).tolist(),
+        ))
+        oldColor, oldDotSet = self.catDotDict.get(catName, (None, set()))
+        if catName not in self.catDotDict:
+            self.catNameList.append(catName)
+        self.catDotDict[catName] = (color, newDotSet)
+
+        if color != oldColor and oldDotSet and newDotSet:
+            self._drawAll()
+            return
+        removedDotSet = oldDotSet - newDotSet
+        addedDotSet = newDotSet - oldDotSet
+        numDots = sum(len(dotSet) for dotColor, dotSet in self.catDotDict.itervalues())
+        if len(removedDotSet) + len(addedDotSet) > self.MaxChangedFrac * max(numDots, 1):
+            self._drawAll()
+            return
+
+        for dotPos in removedDotSet:
+            self._drawDot(dotPos, self.bgColor)
+        # draw the new dots and redraw all dots that overlap an erased or redrawn dot,
+        # so that dots from different catalogs overlap in the correct order
+        touchedDotSet = removedDotSet | addedDotSet
+        for drawCatName in self.catNameList:
+            dotColor, dotSet = self.catDotDict[drawCatName]
+            redrawDotSet = self._getOverlappingDots(dotSet, touchedDotSet)
+            for dotPos in redrawDotSet:
+                self._drawDot(dotPos, dotColor)
+            touchedDotSet |= redrawDotSet
+
+    def _drawAll(self):
+        """Erase the image and draw all dots
+        """
+        if self.image is None:
+            return
+        self.image.put(self.bgColor, to=(0, 0) + self.imageSize)
+        for catName in self.catNameList:
+            dotColor, dotSet = self.catDotDict[catName]
+            for dotPos in dotSet:
+                self._drawDot(dotPos, dotColor)
+
+    def _drawDot(self, dotPos, color):
+        """Draw one round dot (a union of two rectangles), clipped to the image
+        """
+        x, y = dotPos
+        rad = self.DotRad
+        for x0, y0, x1, y1 in (
+            (x - rad + 1, y - rad, x + rad, y + rad + 1),
+            (x - rad, y - rad + 1, x + rad + 1, y + rad),
+        ):
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, self.imageSize[0]), min(y1, self.imageSize[1])
+            if x1 > x0 and y1 > y0:
+                self.image.put(color, to=(x0, y0, x1, y1))
+
+    def _getOverlappingDots(self, dotSet, posSet):
+        """Return the dots in dotSet that overlap a dot at any position in posSet
+        """
+        overlapSet = set()
+        for x, y in posSet:
+            for dx, dy in self._overlapOffsetList:
+                dotPos = (x + dx, y + dy)
+                if dotPos in dotSet:
+                    overlapSet.add(dotPos)
+        return overlapSet
+
+    def _hexColor(self, color):
+        """Return a Tk color as #rrggbb (PhotoImage data cannot contain color names with spaces)
+        """
+        return "#%02x%02x%02x" % tuple(val >> 8 for val in self.cnv.winfo_rgb(color))
+
+
+class _CatPixIndex(object):
+    """Pixel positions of the displayed objects of a catalog, with a spatial index
+    """
+    def __init__(self, catalog, xArr, yArr, objIndArr):
+        """Inputs:
+        - catalog: the catalog (a TUI.TCC.TelTarget.Catalog)
+        - xArr, yArr: x, y pixel position of each displayed object (numpy arrays)
+        - objIndArr: index of each displayed object in catalog.objList (numpy array)
+        """
+        self.catalog = catalog
+        self.xArr = xArr
+        self.yArr = yArr
+        self.objIndArr = objIndArr
+        self.gridIndex = TUI.Base.GridIndex.GridIndex(xArr, yArr)
+
+    def findNearest(self, xyPix, maxDist=None):
+        """Return (catalog object, distance in pixels) of the displayed object nearest xyPix,
+        or (None, None) if none within maxDist pixels.
+        """
+        ind, dist = self.gridIndex.findNearest(xyPix, maxDist)
+        if ind is None:
+            return (None, None)
+        return (self.catalog.objList[self.objIndArr[ind]], dist)
+
+    def __len__(self):
+        return len(self.xArr)
+
+_CatPixIndex.Empty = _CatPixIndex(None, numpy.zeros(0), numpy.zeros(0), numpy.zeros(0, dtype=int))
+
+def _UpdateCatalog(catalog, center, azAltScale):
+    """Returns a _CatPixIndex of the objects in the catalog that are above the horizon.
+    Can be run as a background thread.
+    """
+    azArr, altArr = catalog.getAzAltArr()
+    with numpy.errstate(invalid="ignore"):
+        objIndArr = numpy.flatnonzero(altArr >= 0)
+    # vectorized version of pixFromDeg(xyDegFromAzAlt(azAlt))
+    thetaRadArr = numpy.radians(azArr[objIndArr] - 90.0)
+    rArr = 90.0 - altArr[objIndArr]
+    xArr = center[0] - (rArr * numpy.cos(thetaRadArr) * azAltScale)
+    yArr = center[1] - (rArr * numpy.sin(thetaRadArr) * azAltScale)
+    return _CatPixIndex(catalog, xArr, yArr, objIndArr)
 
 if __name__ == '__main__':
     import random
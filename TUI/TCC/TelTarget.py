@@ -15,13 +15,24 @@ History:
 2005-06-08 ROwen    Changed TelTarget to a new-style class.
 2005-07-07 ROwen    Modified for moved RO.TkUtil.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Added TelTarget.getAppGeoPos and Catalog.getAzAltArr, which computes
+                    the az/alt of all objects in a catalog at once.
+2026-10-18          Added TargetList, a compact sequence of targets that creates each TelTarget
+                    when it is first accessed, and strFromValueDict.
+2026-10-18          Catalog.getAzAltArr no longer creates a TelTarget for every object in a TargetList;
+                    TargetList.getPosArrs computes positions from the catalog columns.
 """
+import itertools
 import sys
+import threading
+import time
+import numpy
 import RO.AddCallback
 import RO.SeqUtil
 import RO.StringUtil
 import RO.Astro.Cnv
 import RO.Astro.Sph
+import RO.Astro.Tm
 import RO.CoordSys
 import RO.MathUtil
 import RO.TkUtil
@@ -42,6 +53,7 @@ class TelTarget(object):
         TelConst.Longitude, TelConst.Latitude, TelConst.Elevation,
     )
     TopoConst = RO.CoordSys.getSysConst(RO.CoordSys.Topocentric)
+    GeoConst = RO.CoordSys.getSysConst(RO.CoordSys.Geocentric)
 
     def __init__(self, valueDict=None):
         self.setValueDict(valueDict)
@@ -50,13 +62,28 @@ class TelTarget(object):
         """Returns the current (az, alt) of the object, in degrees"""
         if self.csysConst is None:
             return None
-            
+        return self._convPos(self.posDeg, self.TopoConst, None)
+
+    def getAppGeoPos(self):
+        """Returns the current apparent geocentric (RA, Dec) of the object, in degrees,
+        or None if the position is unknown or is az/alt (approximate coordinate system is Topocentric)
+        """
+        if self.csysConst is None or self.approxCSys == RO.CoordSys.Topocentric:
+            return None
+        return self._convPos(self.posDeg, self.GeoConst, self.TopoConst.currDefaultDate()) # current UT1 (MJD)
+
+    def _convPos(self, posDeg, toConst, toDate):
+        """Convert a position (deg) in this object's coordinate system, using this object's
+        date, proper motion, parallax and radial velocity; return the converted position (deg).
+
+        posDeg is an argument so TargetList can convert many positions that share the other data.
+        """
         toPos, toPM, toParlax, toRadVel, toDir, scaleChange, atInf, atPole = RO.Astro.Sph.coordConv(
-            fromPos = self.posDeg,
+            fromPos = posDeg,
             fromSys = self.csysConst.name(),
             fromDate = self.dateFloat,
-            toSys = self.TopoConst.name(),
-            toDate = None,
+            toSys = toConst.name(),
+            toDate = toDate,
             obsData = self.ObsData,
             fromPM = self.pm,
             fromParlax = self.parlax,
@@ -153,17 +180,109 @@ class TelTarget(object):
     def __str__(self):
         """Return a string representation for this object.
         """
-        csysStr = self.csysStr
-        if self.dateStr:
-            csysStr = "=".join((csysStr, self.dateStr))
-        return "%r %s, %s %s" % (self.name, self.posStr[0], self.posStr[1], csysStr)
+        return strFromValueDict(self.valueDict)
+
+def strFromValueDict(valueDict):
+    """Return str(TelTarget(valueDict)) without creating a TelTarget
+    """
+    csysStr = valueDict.get("CSys")
+    dateStr = valueDict.get("Date")
+    if dateStr not in (None, ""):
+        csysStr = "=".join((csysStr, dateStr))
+    posStr = valueDict.get("ObjPos")
+    return "%r %s, %s %s" % (valueDict.get("Name"), posStr[0], posStr[1], csysStr)
+
+class TargetList(object):
+    """A read-only sequence of TelTarget objects that are created as they are needed.
+
+    The data is stored as columns: name and position strings for each object,
+    plus an index into a list of value dictionaries for the remaining data
+    (many objects in a catalog usually share the same options).
+
+    Inputs:
+    - nameList: name of each object
+    - posStrList: position of each object as a pair of strings (see TelTarget.setValueDict ObjPos)
+    - optIndList: for each object: index into optDictList
+    - optDictList: a list of value dictionaries, excluding Name and ObjPos
+    """
+    def __init__(self, nameList, posStrList, optIndList, optDictList):
+        if not (len(nameList) == len(posStrList) == len(optIndList)):
+            raise RuntimeError("nameList, posStrList and optIndList must have the same length")
+        self.nameList = nameList
+        self.posStrList = posStrList
+        self.optIndList = optIndList
+        self.optDictList = optDictList
+        self._targetList = [None]*len(nameList)
+
+    def getPosArrs(self):
+        """Return the position of every object, without creating TelTargets.
+
+        Returns:
+        - isFixedArr: a bool array that is True for objects whose position is a fixed az/alt
+        - fixedAzAltArr: az, alt (deg) of fixed objects as a 2xN array (NaN for other objects)
+        - appGeoArr: apparent geocentric RA, Dec (deg) as a 2xN array
+            (NaN for fixed objects and objects whose position is unknown)
+
+        Objects that share option data are converted using one TelTarget made from those options.
+        """
+        numObj = len(self)
+        isFixedArr = numpy.zeros(numObj, dtype=bool)
+        fixedAzAltArr = numpy.empty((2, numObj), dtype=float)
+        fixedAzAltArr[:] = numpy.nan
+        appGeoArr = numpy.empty((2, numObj), dtype=float)
+        appGeoArr[:] = numpy.nan
+        optTargetDict = {} # dict of index into optDictList: TelTarget made from those options
+        appGeoDate = TelTarget.TopoConst.currDefaultDate()
+        for ind, (posStr, optInd) in enumerate(itertools.izip(self.posStrList, self.optIndList)):
+            optTarget = optTargetDict.get(optInd)
+            if optTarget is None:
+                optTarget = TelTarget(self.getValueDict(ind))
+                optTargetDict[optInd] = optTarget
+            if optTarget.csysConst is None:
+                continue
+            posDeg = optTarget.csysConst.posDegFromDispStr(*posStr)
+            if optTarget.approxCSys == RO.CoordSys.Topocentric:
+                isFixedArr[ind] = True
+                fixedAzAltArr[:, ind] = optTarget._convPos(posDeg, TelTarget.TopoConst, None)[0:2]
+            else:
+                appGeoArr[:, ind] = optTarget._convPos(posDeg, TelTarget.GeoConst, appGeoDate)
+        return isFixedArr, fixedAzAltArr, appGeoArr
+
+    def getLabel(self, ind):
+        """Return str(self[ind]) without creating a TelTarget
+        """
+        return strFromValueDict(self.getValueDict(ind))
+
+    def getValueDict(self, ind):
+        """Return the value dictionary for the specified object
+        """
+        valueDict = self.optDictList[self.optIndList[ind]].copy()
+        valueDict["Name"] = self.nameList[ind]
+        valueDict["ObjPos"] = self.posStrList[ind]
+        return valueDict
+
+    def __getitem__(self, ind):
+        if isinstance(ind, slice):
+            return [self[i] for i in xrange(*ind.indices(len(self)))]
+        target = self._targetList[ind]
+        if target is None:
+            target = TelTarget(self.getValueDict(ind))
+            self._targetList[ind] = target
+        return target
+
+    def __iter__(self):
+        for ind in xrange(len(self)):
+            yield self[ind]
+
+    def __len__(self):
+        return len(self._targetList)
 
 class Catalog(RO.AddCallback.BaseMixin):
     """A catalog of TelTarget objects.
     
     Inputs:
     - name      name of catalog
-    - objList   a sequence of TelTarget objects
+    - objList   a sequence of TelTarget objects (e.g. a list or TargetList)
     - doDisplay display the catalog objects on the sky display?
     - dispColor color in which to display the items on the sky display;
                 if None a default is used
@@ -173,6 +292,10 @@ class Catalog(RO.AddCallback.BaseMixin):
 
     _TestFrame = None
 
+    # apparent geocentric positions change slowly (mostly due to annual aberration),
+    # so getAzAltArr caches them for this long (sec)
+    AppGeoCacheTime = 3600.0
+
     def __init__(self,
         name,
         objList,
@@ -186,6 +309,8 @@ class Catalog(RO.AddCallback.BaseMixin):
         if not RO.SeqUtil.isSequence(objList):
             raise RuntimeError("objList=%r; must be a sequence" % objList)
         self.objList = objList
+        self._posCache = None # see _getPosCache
+        self._posCacheLock = threading.Lock()
 
         self.setDoDisplay(doDisplay)
         self.setDispColor(dispColor)
@@ -203,6 +328,36 @@ class Catalog(RO.AddCallback.BaseMixin):
         """
         return self._doDisplay
     
+    def getAzAltArr(self):
+        """Return the current az, alt (deg) of all objects, as a tuple of two numpy arrays
+
+        Unknown positions are NaN. This gives nearly the same answer as calling getAzAlt
+        on every object, but is much faster, because it rotates cached apparent geocentric positions
+        into az/alt for all objects at once. The difference is diurnal parallax and diurnal aberration,
+        both of which are negligible for a sky display (except for the Moon).
+
+        Objects that are not TelTargets are assumed to have fixed az/alt (see SkyWindow.AzAltTarget).
+        Safe to call from a background thread.
+        """
+        isFixedArr, fixedAzAltArr, appGeoCartArr = self._getPosCache()
+
+        last = RO.Astro.Tm.lastFromUT1(TelTarget.TopoConst.currDefaultDate(), TelConst.Longitude)
+        sinLAST = RO.MathUtil.sind(last)
+        cosLAST = RO.MathUtil.cosd(last)
+        # rotate to (-ha)/Dec and then to az/alt
+        haDecCartArr = numpy.array((
+             cosLAST * appGeoCartArr[0] + sinLAST * appGeoCartArr[1],
+            -sinLAST * appGeoCartArr[0] + cosLAST * appGeoCartArr[1],
+             appGeoCartArr[2],
+        ))
+        azAltCartArr = RO.Astro.Cnv.azAltFromHADec(haDecCartArr, TelConst.Latitude)
+        azArr = numpy.degrees(numpy.arctan2(azAltCartArr[1], azAltCartArr[0]))
+        altArr = numpy.degrees(numpy.arctan2(azAltCartArr[2], numpy.hypot(azAltCartArr[0], azAltCartArr[1])))
+
+        azArr[isFixedArr] = fixedAzAltArr[0][isFixedArr]
+        altArr[isFixedArr] = fixedAzAltArr[1][isFixedArr]
+        return azArr, altArr
+
     def getObjList(self):
         """Return the object list.
 
@@ -210,6 +365,51 @@ class Catalog(RO.AddCallback.BaseMixin):
         """
         return self.objList
 
+    def _getPosCache(self):
+        """Return cached position data, recomputing it if it is missing or stale.
+
+        Returns:
+        - isFixedArr: a bool array that is True for objects whose position is a fixed az/alt
+        - fixedAzAltArr: az, alt (deg) of fixed objects as a 2xN array (NaN for other objects)
+        - appGeoCartArr: apparent geocentric RA/Dec unit vectors as a 3xN array
+            (NaN for fixed objects and objects whose position is unknown)
+        """
+        with self._posCacheLock:
+            if self._posCache is not None:
+                cacheTime, numObj, posData = self._posCache
+                if numObj == len(self.objList) and time.time() - cacheTime < self.AppGeoCacheTime:
+                    return posData
+
+            cacheTime = time.time()
+            numObj = len(self.objList)
+            if isinstance(self.objList, TargetList):
+                isFixedArr, fixedAzAltArr, appGeoArr = self.objList.getPosArrs()
+            else:
+                isFixedArr = numpy.zeros(numObj, dtype=bool)
+                fixedAzAltArr = numpy.empty((2, numObj), dtype=float)
+                fixedAzAltArr[:] = numpy.nan
+                appGeoArr = numpy.empty((2, numObj), dtype=float)
+                appGeoArr[:] = numpy.nan
+                for ind, obj in enumerate(self.objList):
+                    if isinstance(obj, TelTarget) and obj.csysConst is not None \
+                        and obj.approxCSys != RO.CoordSys.Topocentric:
+                        appGeoArr[:, ind] = obj.getAppGeoPos()
+                    else:
+                        azAlt = obj.getAzAlt()
+                        if azAlt is not None:
+                            isFixedArr[ind] = True
+                            fixedAzAltArr[:, ind] = azAlt[0:2]
+            raRadArr = numpy.radians(appGeoArr[0])
+            decRadArr = numpy.radians(appGeoArr[1])
+            appGeoCartArr = numpy.array((
+                numpy.cos(decRadArr) * numpy.cos(raRadArr),
+                numpy.cos(decRadArr) * numpy.sin(raRadArr),
+                numpy.sin(decRadArr),
+            ))
+            posData = (isFixedArr, fixedAzAltArr, appGeoCartArr)
+            self._posCache = (cacheTime, numObj, posData)
+            return posData
+
     def setDispColor(self, color=None):
         """Set the color with which to display objects on a sky grid.
         If None, uses default color.
@@ -4,12 +4,6 @@
 To do:
 - Use automatic pink background for entry widgets to indicate if the value has been applied.
 
-Known Issues:
-- This log may hold more data than logSource (because it truncates excess data separately from logSource),
-  but that extra data is fragile: you will lose it if you change the filter.
-- Uses Python to check regular expressions for highlighting, even though tcl implements them;
-  thus differences in Python and tcl's implementation of regular expression may result in subtle bugs.
-
 History:
 History:
 2003-12-17 ROwen    Added addWindow and renamed to UsersWindow.py.
@@ -81,10 +75,28 @@ History:
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
 2015-11-05 ROwen    Ditched obsolete "except (SystemExit, KeyboardInterrupt): raise" code.
                     Modernized "except" syntax.
+2026-10-18          Filter functions may have a getIndices attribute that returns the sorted indices
+                    of matching entries from the log source's posting lists; applyFilter uses these
+                    (via getFilteredEntries) and only calls filter functions on the remaining entries.
+2026-10-18          Virtualized the log display: the filtered entries are kept as a list of log source indices
+                    and only a window of at most RenderMaxEntries entries is inserted into the text widget.
+                    The window is paged as the user scrolls and the scrollbar shows position in all filtered entries.
+                    Searches that fail in the rendered window continue through the other filtered entries.
+                    maxLines is now the maximum number of filtered entries.
+2026-10-18          Use LogSource batch callbacks: new entries arrive in a list (at most once per frame interval)
+                    and are rendered with a single addOutputList call by appendLogEntryList.
+                    highlightLastFunc now accepts the number of new lines to highlight.
+2026-10-18          If the log source has an on-disk archive, scrolling to the top of the filtered entries
+                    loads older matching entries from the archive, one page at a time.
+2026-10-18          Highlighting is computed in Python by a Highlighter, once per log entry, with the result cached;
+                    only the tag ranges for rendered entries are sent to the text widget (one tag_add per tag).
+                    Show next/previous highlight searches all filtered entries, not just the rendered ones.
+                    Removed highlightAllFunc, highlightLastFunc and findRegExp.
 """
 import bisect
 import re
 import Tkinter
+import numpy
 import RO.Alg
 import RO.StringUtil
 import RO.TkUtil
@@ -92,6 +104,7 @@ import RO.Wdg
 import opscore.actor.keyvar
 import TUI.Base.Wdg
 import TUI.Models
+import TUI.Models.LogSource
 import TUI.PlaySound
 import TUI.Version
 
@@ -126,6 +139,31 @@ ShowTag = "showtag"
 ActorTagPrefix = "act_"
 CmdrTagPrefix = "cmdr_"
 
+# Virtual display: only a window of the filtered entries is rendered in the text widget
+RenderMaxEntries = 600 # maximum number of entries rendered
+RenderPageEntries = 200 # number of entries to add when scrolling past either edge of the rendered window
+RenderMaxLines = 1000000 # maximum # of lines for the underlying RO.Wdg.LogWdg; large so it never truncates
+TrimSlack = 1000 # number of discarded entries tolerated before trimming them from the filtered list
+HistoryMaxScan = 20000 # maximum number of archived entries to test each time more history is wanted
+
+def getNoIndices(entryList):
+    """Return an empty array of entry indices; getIndices for filters that show nothing
+    """
+    return numpy.zeros(0, dtype=numpy.int64)
+
+def getCmdsAndRepliesIndices(entryList):
+    """Return indices of entries for most commands and replies
+
+    This is getIndices for the "Commands and Replies" filter: entries whose commander is not
+    internal (starts with ".") or apo.apo, whose severity > debug and are not keys entries.
+    """
+    indices = numpy.intersect1d(
+        entryList.getCmdrIndices(lambda cmdr: cmdr and cmdr[0] != "." and cmdr != "apo.apo"),
+        entryList.getSeverityIndices(RO.Constants.sevNormal),
+        assume_unique=True,
+    )
+    return numpy.setdiff1d(indices, entryList.getKeysIndices(), assume_unique=True)
+
 class RegExpInfo(object):
     """Object holding a regular expression
     and associated tags.
@@ -145,6 +183,57 @@ class RegExpInfo(object):
         return "RegExpInfo(regExp=%r, tag=%r, lineTag=%r)" % \
             (self.regExp, self.tag, self.lineTag)
 
+class Highlighter(object):
+    """Determine which log entries to highlight, and which text within them
+
+    Highlighting is computed once per log entry (using its log source index as a key)
+    and the result is cached, so rendering and re-rendering entries is cheap.
+    """
+    def __init__(self, actors=(), regExpList=(), textTag=None, maxCacheSize=50000):
+        """Inputs:
+        - actors: highlight entries from these actors (case is ignored)
+        - regExpList: highlight entries whose text matches any of these regular expressions (case is ignored);
+            each expression is compiled separately, so groups and backreferences work as expected
+        - textTag: tag for the text that matches a regular expression; if None the matched text is not tagged
+        - maxCacheSize: maximum number of cached results; when exceeded the cache is cleared
+        """
+        self.actorTagSet = set(ActorTagPrefix + actor.lower() for actor in actors)
+        self.compiledRegExpList = [re.compile(regExp, re.I | re.M) for regExp in regExpList]
+        self.textTag = textTag
+        self.maxCacheSize = int(maxCacheSize)
+        self._cacheDict = {}
+
+    def getHighlight(self, logEntry):
+        """Return highlight information for a log entry
+
+        Return None if the entry is not highlighted, else a list of (begChar, endChar)
+        for each region of text that matches (an empty list if the entry is highlighted by actor).
+        """
+        try:
+            return self._cacheDict[logEntry.index]
+        except KeyError:
+            pass
+        if len(self._cacheDict) >= self.maxCacheSize:
+            self._cacheDict.clear()
+        charRangeList = None
+        if self.actorTagSet and not self.actorTagSet.isdisjoint(logEntry.tags):
+            charRangeList = []
+        if self.compiledRegExpList:
+            entryStr = logEntry.getStr()
+            matchRangeList = sorted(match.span() for compiledRegExp in self.compiledRegExpList \
+                for match in compiledRegExp.finditer(entryStr) if match.end() > match.start())
+            if matchRangeList:
+                # merge overlapping ranges (which occur if more than one expression matches)
+                charRangeList = [list(matchRangeList[0])]
+                for begChar, endChar in matchRangeList[1:]:
+                    if begChar <= charRangeList[-1][1]:
+                        charRangeList[-1][1] = max(charRangeList[-1][1], endChar)
+                    else:
+                        charRangeList.append([begChar, endChar])
+                charRangeList = [tuple(charRange) for charRange in charRangeList]
+        self._cacheDict[logEntry.index] = charRangeList
+        return charRangeList
+
 class TUILogWdg(Tkinter.Frame):
     """A log widget that displays messages from the hub
 
@@ -156,6 +245,10 @@ class TUILogWdg(Tkinter.Frame):
     and return True if the entry is to be shown, False otherwise.
     The doc string may be None or a brief one-line description of the filter
     (long or multi-line doc strings will result in garbage in the status bar).
+    A filter function may also have a getIndices attribute: a function that takes
+    a TUI.Models.LogSource.LogEntryStore and returns a sorted numpy array of the indices
+    of all entries that pass the filter. This is much faster than calling the filter function
+    on every entry when the filter is changed.
     """
     def __init__(self,
         master,
@@ -166,7 +259,7 @@ class TUILogWdg(Tkinter.Frame):
         Inputs:
         - master: master widget
         - maxCmds: maximun # of commands
-        - maxLines: the max number of lines to display, ignoring wrapping
+        - maxLines: the max number of log entries to display
         - height: height of text area, in lines
         - width: width of text area, in characters
         - **kargs: additional keyword arguments for Frame
@@ -179,6 +272,20 @@ class TUILogWdg(Tkinter.Frame):
         self.highlightRegExpInfo = None
         self.highlightTag = None
         self.isConnected = False
+        self.maxLines = int(maxLines)
+
+        # virtual display state:
+        # - filteredIndices: log source indices of all entries that pass the filter, in increasing order
+        # - the text widget shows entries filteredIndices[renderStart:renderEnd]
+        # - renderNumLines: number of text lines for each rendered entry
+        self.filteredIndices = []
+        self.renderStart = 0
+        self.renderEnd = 0
+        self.renderNumLines = []
+        self._pagePending = False
+        # log source index of the oldest entry tested by the filter; older entries are only in the log archive
+        # and are tested a page at a time, as the user scrolls back
+        self.historyScanIndex = 0
         self._stateTracker = RO.Wdg.StateTracker(logFunc = tuiModel.logFunc)
 
         # severity filter function: return True if severity filter criteria are met
@@ -186,10 +293,8 @@ class TUILogWdg(Tkinter.Frame):
         self.sevFilterFunc = lambda x: False
         # miscellaneous filter function: return True if non-severity filter criteria are met
         self.miscFilterFunc = lambda x: False
-        # highlightAllFunc(): clear existing highlighting and apply desired highlighting to all existing text
-        self.highlightAllFunc = lambda: None
-        # highlightLastFunc(): apply highlighting to last line of text and play sound if appropriate
-        self.highlightLastFunc = lambda: None
+        # highlighter: a Highlighter, or None if no highlighting
+        self.highlighter = None
 
         row = 0
 
@@ -430,9 +535,12 @@ class TUILogWdg(Tkinter.Frame):
 
         self.logWdg = RO.Wdg.LogWdg(
             self,
-            maxLines = maxLines,
+            maxLines = RenderMaxLines,
             helpURL = HelpURL,
         )
+        # take over scrolling so the scrollbar represents all filtered entries, not just the rendered ones
+        self.logWdg.text.configure(yscrollcommand=self._textYScrollCallback)
+        self.logWdg.yscroll.configure(command=self._scrollbarCallback)
         self.logWdg.grid(row=row, column=0, sticky="nwes")
         self.grid_rowconfigure(row, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -499,9 +607,48 @@ class TUILogWdg(Tkinter.Frame):
         self.bind("<Map>", self.mapOrUnmap)
 
     def appendLogEntry(self, logEntry):
-        outStr = logEntry.getStr()
-        self.logWdg.addOutput(outStr, tags=logEntry.tags, severity=logEntry.severity)
-        self.highlightLastFunc()
+        """Append a log entry that passes the filter
+        """
+        self.appendLogEntryList([logEntry])
+
+    def appendLogEntryList(self, logEntryList):
+        """Append a list of log entries that pass the filter
+
+        The entries are only rendered if the display is scrolled to the end of the filtered entries;
+        otherwise they will be rendered when the user scrolls to them.
+        """
+        if self.filteredIndices:
+            # ignore entries already handled by applyFilter
+            lastIndex = self.filteredIndices[-1]
+            logEntryList = [logEntry for logEntry in logEntryList if logEntry.index > lastIndex]
+        if not logEntryList:
+            return
+        isScrolledToEnd = self.isScrolledToEnd()
+        self.filteredIndices += [logEntry.index for logEntry in logEntryList]
+        if len(self.filteredIndices) > self.maxLines + TrimSlack:
+            self._trimFilteredIndices(len(self.filteredIndices) - self.maxLines)
+        elif self.filteredIndices[0] < self.logSource.getOldestIndex() - TrimSlack:
+            self._trimFilteredIndices()
+        if not isScrolledToEnd:
+            self._updateScrollbar()
+            if self.highlighter and self.doPlayHighlightSound():
+                for logEntry in logEntryList:
+                    if self.highlighter.getHighlight(logEntry) is not None:
+                        TUI.PlaySound.logHighlightedText()
+                        break
+            return
+
+        strTagsSevList = [(entryStr, logEntry.tags, logEntry.severity) for entryStr, logEntry
+            in zip(TUI.Models.LogSource.getStrList(logEntryList), logEntryList)]
+        numLinesList = [strTagsSev[0].count("\n") for strTagsSev in strTagsSevList]
+        self.logWdg.addOutputList(strTagsSevList)
+        self.renderEnd += len(strTagsSevList)
+        self.renderNumLines += numLinesList
+        if self.renderEnd - self.renderStart > RenderMaxEntries + RenderPageEntries:
+            self._unrenderTop(self.renderEnd - self.renderStart - RenderMaxEntries)
+        numHighlighted = self._applyHighlight(self.renderEnd - len(strTagsSevList), self.renderEnd)
+        if numHighlighted > 0 and self.doPlayHighlightSound():
+            TUI.PlaySound.logHighlightedText()
 
     def applyFilter(self, wdg=None):
         """Apply current filter settings.
@@ -525,32 +672,24 @@ class TUILogWdg(Tkinter.Frame):
             TUI.PlaySound.cmdFailed()
         self.miscFilterFunc = miscFilterFunc
 
-        retainScrollPos = not self.logWdg.isScrolledToEnd()
-        if retainScrollPos:
+        midEntryIndex = None
+        if not self.isScrolledToEnd():
             # "linestart" helps a problem wereby if the text widget has not been selected
             # then the result is in the middle of a line; the resulting index when this problem occurs
             # may not be perfect but it appears to be good enough
             midLineIndex = self.logWdg.text.index("@0,%d linestart" % (self.logWdg.winfo_height() / 2))
-            midLineDateStr = self.logWdg.text.get(midLineIndex, "%s + 8 chars" % midLineIndex)
-#             print "retainScrollPos: midLineIndex=%s, midLineDateStr=%s" % (midLineIndex, midLineDateStr)
-
-        self.logWdg.clearOutput()
-        # this is inefficient; logWdg does a lot of processing that is unnecessary
-        # when inserting a lot of lines at once; add an insertMany method to avoid this
-        strTagsSevList = [(logEntry.getStr(), logEntry.tags, logEntry.severity)
-            for logEntry in self.logSource.entryList
-            if self.sevFilterFunc(logEntry) or self.miscFilterFunc(logEntry)]
-        self.logWdg.addOutputList(strTagsSevList)
+            midEntryIndex = self._getEntryIndexAtLine(int(midLineIndex.split(".")[0]))
+#             print "retainScrollPos: midLineIndex=%s, midEntryIndex=%s" % (midLineIndex, midEntryIndex)
 
-        if retainScrollPos:
-            strList = [strTagsSev[0] for strTagsSev in strTagsSevList]
-            ind = bisect.bisect(strList, midLineDateStr)
-            # indicate result in "lines from the end" so the reference is valid
-            # even if the data is truncated (as it often will be)
-            linesFromEnd = len(strList) - ind
-            self.logWdg.text.see("end - %d lines" % (linesFromEnd,))
+        self.filteredIndices = self.getFilteredIndices().tolist()
+        self.historyScanIndex = self.logSource.entryList.startIndex
+        if len(self.filteredIndices) > self.maxLines:
+            self.filteredIndices = self.filteredIndices[-self.maxLines:]
 
-        self.highlightAllFunc()
+        if midEntryIndex is not None:
+            self.showPos(bisect.bisect(self.filteredIndices, midEntryIndex), forceRender=True)
+        else:
+            self.showEnd(forceRender=True)
 
     def clearHighlight(self, showMsg=True):
         """Remove all highlighting"""
@@ -559,8 +698,8 @@ class TUILogWdg(Tkinter.Frame):
                 "Removing highlight",
                 isTemp = True,
             )
-        self.logWdg.text.tag_remove(HighlightTag, "0.0", "end")
-        self.logWdg.text.tag_remove(HighlightTextTag, "0.0", "end")
+        self.highlighter = None
+        self._removeHighlightTags()
 
     def compileRegExp(self, regExp, flags):
         """Attempt to compile the regular expression.
@@ -594,6 +733,7 @@ class TUILogWdg(Tkinter.Frame):
 
         def nullFunc(logEntry):
             return False
+        nullFunc.getIndices = getNoIndices
 
         if not filterEnabled:
             return nullFunc
@@ -609,6 +749,7 @@ class TUILogWdg(Tkinter.Frame):
                 return (logEntry.actor == actor) \
                     or (logEntry.cmdInfo and (logEntry.cmdInfo.actor == actor))
             filterFunc.__doc__ = "actor=%s" % (actor,)
+            filterFunc.getIndices = lambda entryList, actor=actor: entryList.getActorIndices([actor])
             return filterFunc
 
         elif filterCat == "Actors":
@@ -621,6 +762,7 @@ class TUILogWdg(Tkinter.Frame):
                 return (logEntry.actor in actorSet) \
                     or (logEntry.cmdInfo and (logEntry.cmdInfo.actor in actorSet))
             filterFunc.__doc__ = "actor in %s" % (actorSet,)
+            filterFunc.getIndices = lambda entryList, actorSet=actorSet: entryList.getActorIndices(actorSet)
             return filterFunc
 
         elif filterCat == "Text":
@@ -644,6 +786,10 @@ class TUILogWdg(Tkinter.Frame):
                     and logEntry.cmdInfo \
                     and not logEntry.isKeys
             filterFunc.__doc__ = "most commands"
+            def getIndices(entryList):
+                indices = getCmdsAndRepliesIndices(entryList)
+                return numpy.intersect1d(indices, entryList.getCmdInfoIndices(), assume_unique=True)
+            filterFunc.getIndices = getIndices
             return filterFunc
 
         elif filterCat == "Commands and Replies":
@@ -652,6 +798,7 @@ class TUILogWdg(Tkinter.Frame):
                     and (logEntry.severity > RO.Constants.sevDebug) \
                     and not logEntry.isKeys
             filterFunc.__doc__ = "most commands and replies"
+            filterFunc.getIndices = getCmdsAndRepliesIndices
             return filterFunc
 
         elif filterCat == "My Commands and Replies":
@@ -663,6 +810,18 @@ class TUILogWdg(Tkinter.Frame):
                     and not logEntry.isKeys \
                     and ((logEntry.cmdInfo is None) or (logEntry.cmdInfo.isMine))
             filterFunc.__doc__ = "my commands and replies"
+            def getIndices(entryList, cmdr=cmdr):
+                indices = numpy.intersect1d(
+                    entryList.getCmdrIndices(lambda entryCmdr: entryCmdr == cmdr),
+                    entryList.getSeverityIndices(RO.Constants.sevNormal),
+                    assume_unique=True,
+                )
+                excludeIndices = numpy.union1d(
+                    entryList.getKeysIndices(),
+                    entryList.getCmdInfoIndices(lambda cmdInfo: not cmdInfo.isMine),
+                )
+                return numpy.setdiff1d(indices, excludeIndices, assume_unique=True)
+            filterFunc.getIndices = getIndices
             return filterFunc
 
         elif filterCat == "Custom":
@@ -722,7 +881,7 @@ class TUILogWdg(Tkinter.Frame):
         Note that dispatching the command automatically logs it.
         """
         self.dispatchCmd(cmdStr)
-        self.logWdg.text.see("end")
+        self.showEnd()
 
         defActor = self.defActorWdg.getString()
         if not defActor:
@@ -778,8 +937,6 @@ class TUILogWdg(Tkinter.Frame):
     def doHighlight(self, wdg=None):
         """Show appropriate highlight widgets and apply appropriate function
         """
-        self.highlightAllFunc = lambda: None
-        self.highlightLastFunc = lambda: None
         highlightCat = self.highlightMenu.getString()
         highlightEnabled = self.highlightOnOffWdg.getBool()
         #print "doHighlight; cat=%r; enabled=%r" % (highlightCat, highlightEnabled)
@@ -886,13 +1043,11 @@ class TUILogWdg(Tkinter.Frame):
 
     def doSearchBackwards(self, evt=None):
         """Search backwards for search string"""
-        searchStr = self.findEntry.get()
-        self.logWdg.search(searchStr, backwards=True, noCase=True, regExp=True)
+        self.search(backwards=True)
 
     def doSearchForwards(self, evt=None):
-        """Search backwards for search string"""
-        searchStr = self.findEntry.get()
-        self.logWdg.search(searchStr, backwards=False, noCase=True, regExp=True)
+        """Search forwards for search string"""
+        self.search(backwards=False)
 
     def doShowHideAdvanced(self, wdg=None):
         if self.highlightOnOffWdg.getBool():
@@ -903,33 +1058,10 @@ class TUILogWdg(Tkinter.Frame):
             self.doHighlight()
 
     def doShowNextHighlight(self, wdg=None):
-        self.logWdg.findTag(HighlightTag, backwards=False, doWrap=False)
+        self.showHighlight(backwards=False)
 
     def doShowPrevHighlight(self, wdg=None):
-        self.logWdg.findTag(HighlightTag, backwards=True, doWrap=False)
-
-    def findRegExp(self, regExpInfo, removeTags=True, elide=False, startInd="1.0"):
-        """Find and tag all lines containing text that matches regExp.
-
-        Returns the number of matches.
-
-        This is just self.text.findAll with a particular set of options.
-        """
-        #print "findRegExp(regExpInfo=%r, removeTags=%r, elide=%r, startInd=%r)" % (regExpInfo, removeTags, elide, startInd)
-
-        # Warning: you must modify this to call findAll from "after"
-        # if this function is called from a variable trace (e.g. an Entry callFunc).
-        # Otherwise the count variable is not updated
-        # and the routine raises RuntimeError.
-        return self.logWdg.findAll(
-            searchStr = regExpInfo.regExp,
-            tag = regExpInfo.tag,
-            lineTag = regExpInfo.lineTag,
-            removeTags = removeTags,
-            noCase = True,
-            regExp = True,
-            startInd = startInd,
-        )
+        self.showHighlight(backwards=True)
 
     def getActors(self, regExpList):
         """Return a sorted list of actor based on a set of actor name regular expressions.
@@ -982,6 +1114,35 @@ class TUILogWdg(Tkinter.Frame):
         else:
             return "severity >= %s" % (sevName,)
 
+    def getFilteredEntries(self):
+        """Return a list of the entries in the log source that pass the current filter
+        """
+        return self.logSource.entryList.getEntries(self.getFilteredIndices())
+
+    def getFilteredIndices(self):
+        """Return a sorted numpy array of the indices of entries in the log source that pass the current filter
+
+        Filter functions that have a getIndices attribute are evaluated using the log source's
+        posting lists; any other filter function is only called on entries that have not already passed.
+        """
+        entryList = self.logSource.entryList
+        indArrList = []
+        otherFuncList = []
+        for filterFunc in (self.sevFilterFunc, self.miscFilterFunc):
+            getIndices = getattr(filterFunc, "getIndices", None)
+            if getIndices:
+                indArrList.append(getIndices(entryList))
+            else:
+                otherFuncList.append(filterFunc)
+        indices = TUI.Models.LogSource.unionIndices(indArrList)
+
+        if otherFuncList:
+            otherIndices = numpy.setdiff1d(entryList.getAllIndices(), indices, assume_unique=True)
+            extraIndices = [logEntry.index for logEntry in entryList.getEntries(otherIndices)
+                if any(filterFunc(logEntry) for filterFunc in otherFuncList)]
+            indices = TUI.Models.LogSource.unionIndices((indices, extraIndices))
+        return indices
+
     def getSeverityTags(self):
         """Return a list of severity tags that should be displayed
         based on the current setting of the severity menu.
@@ -997,8 +1158,7 @@ class TUILogWdg(Tkinter.Frame):
         return self._stateTracker
 
     def highlightActors(self, actors):
-        """Create highlight functions to highlight the supplied actors
-        and apply highlighting to all existing text.
+        """Highlight entries from the supplied actors
         """
         if len(actors) == 1:
             self.statusBar.setMsg(
@@ -1011,56 +1171,27 @@ class TUILogWdg(Tkinter.Frame):
                 isTemp = True,
             )
 
-        tags = [ActorTagPrefix + actor.lower() for actor in actors]
-
-        def highlightAllFunc(tags=tags):
-            self.clearHighlight()
-            for tag in tags:
-                tagRanges = self.logWdg.text.tag_ranges(tag)
-                if len(tagRanges) > 1:
-                    self.logWdg.text.tag_add(HighlightTag, *tagRanges)
-
-        def highlightLastFunc(tags=tags):
-            for tag in tags:
-                tagRanges = self.logWdg.text.tag_prevrange(tag, "end")
-                if tagRanges:
-                    self.logWdg.text.tag_add(HighlightTag, *tagRanges)
-                    if self.doPlayHighlightSound():
-                        TUI.PlaySound.logHighlightedText()
-                    return # no need to test more tags and must not play the sound again
-
-        self.highlightAllFunc = highlightAllFunc
-        self.highlightLastFunc = highlightLastFunc
-        self.highlightAllFunc()
+        self.setHighlighter(Highlighter(actors=actors))
 
     def highlightRegExp(self, regExpInfo):
-        """Create highlight functions based on a RegExpInfo object
-        and apply highlighting to all existing text.
+        """Highlight entries whose text matches the regular expression in a RegExpInfo object
         """
-        def highlightAllFunc(regExpInfo=regExpInfo):
-            self.clearHighlight()
-            self.findRegExp(regExpInfo, removeTags=False)
+        self.setHighlighter(Highlighter(regExpList=[regExpInfo.regExp], textTag=regExpInfo.tag))
 
-        def highlightLastFunc(regExpInfo=regExpInfo):
-            nFound = self.findRegExp(regExpInfo, removeTags = False, startInd = "end - 2 lines")
-            if nFound > 0 and self.doPlayHighlightSound():
-                TUI.PlaySound.logHighlightedText()
-
-        self.highlightAllFunc = highlightAllFunc
-        self.highlightLastFunc = highlightLastFunc
-        self.highlightAllFunc()
+    def isScrolledToEnd(self):
+        """Return True if the last filtered entry is rendered and scrolled into view
+        """
+        return (self.renderEnd == len(self.filteredIndices)) and (self.logWdg.text.yview()[1] >= 1.0)
 
-    def logSourceCallback(self, logSource):
-        """Log a message from the log source
+    def logSourceBatchCallback(self, logSource, logEntryList):
+        """Log new messages from the log source (a batch callback)
 
         Inputs:
-        - logEntry: a TUI.Models.LogSource.LogEntry object
+        - logSource: the log source (TUI.Models.LogSource.LogSource)
+        - logEntryList: a list of new log entries (TUI.Models.LogSource.LogEntryView)
         """
-        logEntry = logSource.lastEntry
-        if not logEntry:
-            return
-        if self.sevFilterFunc(logEntry) or self.miscFilterFunc(logEntry):
-            self.appendLogEntry(logEntry)
+        self.appendLogEntryList([logEntry for logEntry in logEntryList
+            if self.sevFilterFunc(logEntry) or self.miscFilterFunc(logEntry)])
 
     def mapOrUnmap(self, evt=None):
         """Called when the window is mapped or unmapped
@@ -1070,14 +1201,141 @@ class TUILogWdg(Tkinter.Frame):
         wantConnection = self.winfo_toplevel().wm_state() != "withdrawn"
 #        print "mapOrUnmap: wantConnect=%s; isConnected=%s" % (wantConnection, self.isConnected)
         if self.isConnected and not wantConnection:
-            self.logSource.removeCallback(self.logSourceCallback)
+            self.logSource.removeBatchCallback(self.logSourceBatchCallback)
             self.isConnected=False
-            self.logWdg.clearOutput()
+            self.filteredIndices = []
+            self._renderWindow(0, 0)
         elif wantConnection and not self.isConnected:
-            self.logSource.addCallback(self.logSourceCallback)
+            self.logSource.addBatchCallback(self.logSourceBatchCallback)
             self.isConnected=True
             self.applyFilter()
 
+    def search(self, backwards):
+        """Search all filtered entries for the regular expression in the find entry and select the match
+
+        The search starts from the current selection, if any, else from the end (if backwards)
+        or beginning (if forwards). Entries that are not rendered are searched as well;
+        if the match is in such an entry then the display is moved to show it.
+        """
+        searchStr = self.findEntry.get()
+        if not searchStr:
+            return
+        compiledRegExp = self.compileRegExp(searchStr, re.I)
+        if not compiledRegExp:
+            return
+        self._trimFilteredIndices()
+        numEntries = len(self.filteredIndices)
+        if numEntries == 0:
+            self.bell()
+            return
+        # find the starting position (index into filteredIndices) and character offset in that entry
+        startPos = None
+        selRange = self.logWdg.text.tag_ranges("sel")
+        if selRange:
+            startPos = self._getPosAtLine(int(str(self.logWdg.text.index(selRange[0])).split(".")[0]))
+        if startPos is None:
+            startPos = numEntries - 1 if backwards else 0
+            startChar = None
+        else:
+            entryStartInd = "%d.0" % (self._getLineForPos(startPos),)
+            startChar = len(self.logWdg.text.get(entryStartInd, selRange[0]))
+
+        if backwards:
+            for pos in xrange(startPos, -1, -1):
+                entryStr = self.logSource.getEntry(self.filteredIndices[pos]).getStr()
+                endChar = startChar if (pos == startPos and startChar is not None) else len(entryStr)
+                matchList = list(compiledRegExp.finditer(entryStr, 0, endChar))
+                if matchList:
+                    self._selectText(pos, matchList[-1].start(), matchList[-1].end())
+                    return
+        else:
+            for pos in xrange(startPos, numEntries):
+                entryStr = self.logSource.getEntry(self.filteredIndices[pos]).getStr()
+                begChar = startChar + 1 if (pos == startPos and startChar is not None) else 0
+                match = compiledRegExp.search(entryStr, begChar)
+                if match:
+                    self._selectText(pos, match.start(), match.end())
+                    return
+        self.bell()
+
+    def setHighlighter(self, highlighter):
+        """Set the highlighter and apply it to the rendered entries
+
+        Inputs:
+        - highlighter: a Highlighter, or None for no highlighting
+        """
+        self._removeHighlightTags()
+        self.highlighter = highlighter
+        self._applyHighlight(self.renderStart, self.renderEnd)
+
+    def showEnd(self, forceRender=False):
+        """Render the last entries and scroll to the end
+
+        Inputs:
+        - forceRender: render the entries even if they are already rendered
+        """
+        if forceRender or self.renderEnd < len(self.filteredIndices):
+            self._trimFilteredIndices()
+            numEntries = len(self.filteredIndices)
+            self._renderWindow(max(0, numEntries - RenderMaxEntries), numEntries)
+        self.logWdg.text.see("end")
+
+    def showHighlight(self, backwards):
+        """Show and select the next (or previous) highlighted entry
+
+        The search starts from the current selection, if any, else from the first visible entry
+        (if forwards) or last visible entry (if backwards). Entries that are not rendered are searched as well.
+        """
+        if not self.highlighter:
+            return
+        self._trimFilteredIndices()
+        numEntries = len(self.filteredIndices)
+        if numEntries == 0:
+            self.bell()
+            return
+        selRange = self.logWdg.text.tag_ranges("sel")
+        if selRange:
+            currPos = self._getPosAtLine(int(str(self.logWdg.text.index(selRange[0])).split(".")[0]))
+        elif backwards:
+            currPos = self._getPosAtLine(int(self.logWdg.text.index("@0,%d" % (self.logWdg.text.winfo_height(),)).split(".")[0]))
+            if currPos is not None:
+                currPos += 1
+        else:
+            currPos = self._getPosAtLine(int(self.logWdg.text.index("@0,0").split(".")[0]))
+            if currPos is not None:
+                currPos -= 1
+        if currPos is None:
+            currPos = numEntries if backwards else -1
+
+        posIter = xrange(currPos - 1, -1, -1) if backwards else xrange(currPos + 1, numEntries)
+        for pos in posIter:
+            logEntry = self.logSource.getEntry(self.filteredIndices[pos])
+            charRangeList = self.highlighter.getHighlight(logEntry)
+            if charRangeList is None:
+                continue
+            if charRangeList:
+                self._selectText(pos, *charRangeList[0])
+            else:
+                self._selectText(pos, 0, len(logEntry.getStr().rstrip("\n")))
+            return
+        self.bell()
+
+    def showPos(self, pos, forceRender=False):
+        """Render the entries around a given position in filteredIndices and show that entry
+
+        Inputs:
+        - pos: position in filteredIndices
+        - forceRender: render the entries even if the specified entry is already rendered
+        """
+        self._trimFilteredIndices()
+        numEntries = len(self.filteredIndices)
+        pos = max(0, min(pos, numEntries - 1))
+        if forceRender or not (self.renderStart <= pos < self.renderEnd):
+            start = max(0, min(pos - RenderMaxEntries // 2, numEntries - RenderMaxEntries))
+            self._renderWindow(start, min(numEntries, start + RenderMaxEntries))
+        if self.renderStart <= pos < self.renderEnd:
+            self.logWdg.text.see("%d.0" % (self._getLineForPos(pos),))
+
     def updHighlightColor(self, newColor, colorPrefVar=None):
         """Update highlight color and highlight line color"""
 
@@ -1092,14 +1350,228 @@ class TUILogWdg(Tkinter.Frame):
         if sevName == "none":
             def filterFunc(logEntry):
                 return False
+            filterFunc.getIndices = getNoIndices
         else:
             minSeverity = RO.Constants.NameSevDict[sevName]
             def filterFunc(logEntry, minSeverity=minSeverity):
                 return logEntry.severity >= minSeverity
             filterFunc.__doc__ = "severity >= %s" % (sevName,)
+            filterFunc.getIndices = lambda entryList, minSeverity=minSeverity: \
+                entryList.getSeverityIndices(minSeverity)
         self.sevFilterFunc = filterFunc
         self.applyFilter()
 
+    def _applyHighlight(self, start, end):
+        """Apply highlighting to rendered entries filteredIndices[start:end]
+
+        Return the number of highlighted entries.
+        """
+        if not self.highlighter:
+            return 0
+        start = max(start, self.renderStart)
+        end = min(end, self.renderEnd)
+        if start >= end:
+            return 0
+        lineRangeList = []
+        textRangeList = []
+        lineNum = self._getLineForPos(start)
+        logEntryList = self.logSource.getEntries(self.filteredIndices[start:end])
+        for logEntry, numLines in zip(logEntryList, self.renderNumLines[start - self.renderStart:end - self.renderStart]):
+            charRangeList = self.highlighter.getHighlight(logEntry)
+            if charRangeList is not None:
+                lineRangeList += ["%d.0" % (lineNum,), "%d.0" % (lineNum + numLines,)]
+                for begChar, endChar in charRangeList:
+                    textRangeList += ["%d.0 + %d chars" % (lineNum, begChar), "%d.0 + %d chars" % (lineNum, endChar)]
+            lineNum += numLines
+        if lineRangeList:
+            self.logWdg.text.tag_add(HighlightTag, *lineRangeList)
+        if textRangeList and self.highlighter.textTag:
+            self.logWdg.text.tag_add(self.highlighter.textTag, *textRangeList)
+        return len(lineRangeList) // 2
+
+    def _getEntryIndexAtLine(self, lineNum):
+        """Return the log source index of the entry rendered at the specified text line (1-based)
+
+        Return None if no entry is rendered at that line.
+        """
+        pos = self._getPosAtLine(lineNum)
+        if pos is None:
+            return None
+        return self.filteredIndices[pos]
+
+    def _getLineForPos(self, pos):
+        """Return the first text line (1-based) of the rendered entry at the specified position in filteredIndices
+        """
+        return 1 + sum(self.renderNumLines[0:pos - self.renderStart])
+
+    def _getPosAtLine(self, lineNum):
+        """Return the position in filteredIndices of the entry rendered at the specified text line (1-based)
+
+        Return None if no entry is rendered at that line.
+        """
+        endLine = 1
+        for pos, numLines in enumerate(self.renderNumLines, self.renderStart):
+            endLine += numLines
+            if lineNum < endLine:
+                return pos
+        return None
+
+    def _hasMoreHistory(self):
+        """Return True if the log archive may have older entries that pass the filter
+        """
+        archive = self.logSource.archive
+        return bool(archive) and self.isConnected and (self.historyScanIndex > archive.startIndex)
+
+    def _loadHistory(self):
+        """Search the log archive for a page of older entries that pass the filter and add them to filteredIndices
+        """
+        sevFilterFunc = self.sevFilterFunc
+        miscFilterFunc = self.miscFilterFunc
+        indexList, self.historyScanIndex = self.logSource.archive.findIndices(
+            filterFunc = lambda logEntry: sevFilterFunc(logEntry) or miscFilterFunc(logEntry),
+            endIndex = self.historyScanIndex,
+            maxNum = RenderPageEntries,
+            maxScan = HistoryMaxScan,
+        )
+        self.filteredIndices[0:0] = indexList
+        self.renderStart += len(indexList)
+        self.renderEnd += len(indexList)
+
+    def _pageRenderWindow(self):
+        """Extend the rendered window if scrolled to its top or bottom edge (and there are more entries)
+        """
+        self._pagePending = False
+        firstFrac, lastFrac = self.logWdg.text.yview()
+        if firstFrac <= 0.0 and self.renderStart == 0 and self._hasMoreHistory():
+            self._loadHistory()
+        if firstFrac <= 0.0 and self.renderStart > 0:
+            self._trimFilteredIndices()
+            topPos = self.renderStart
+            start = max(0, self.renderStart - RenderPageEntries)
+            self._renderWindow(start, min(len(self.filteredIndices), start + RenderMaxEntries))
+            self.logWdg.text.yview("%d.0" % (self._getLineForPos(topPos),))
+        elif lastFrac >= 1.0 and self.renderEnd < len(self.filteredIndices):
+            self._trimFilteredIndices()
+            topPos = self._getPosAtLine(int(self.logWdg.text.index("@0,0").split(".")[0]))
+            end = min(len(self.filteredIndices), self.renderEnd + RenderPageEntries)
+            self._renderWindow(max(0, end - RenderMaxEntries), end)
+            if topPos is not None and topPos >= self.renderStart:
+                self.logWdg.text.yview("%d.0" % (self._getLineForPos(topPos),))
+
+    def _removeHighlightTags(self):
+        """Remove all highlight tags from the text widget
+        """
+        self.logWdg.text.tag_remove(HighlightTag, "1.0", "end")
+        self.logWdg.text.tag_remove(HighlightTextTag, "1.0", "end")
+
+    def _renderWindow(self, start, end):
+        """Render filtered entries filteredIndices[start:end] in the text widget, replacing existing text
+        """
+        self.logWdg.clearOutput()
+        logEntryList = self.logSource.getEntries(self.filteredIndices[start:end])
+        strTagsSevList = [(entryStr, logEntry.tags, logEntry.severity) for entryStr, logEntry
+            in zip(TUI.Models.LogSource.getStrList(logEntryList), logEntryList)]
+        self.renderStart = start
+        self.renderEnd = start + len(strTagsSevList)
+        self.renderNumLines = [strTagsSev[0].count("\n") for strTagsSev in strTagsSevList]
+        self.logWdg.addOutputList(strTagsSevList)
+        self._applyHighlight(start, end)
+
+    def _scrollbarCallback(self, *args):
+        """Handle a scroll command from the scrollbar
+
+        Translate "moveto" commands from a position in all filtered entries to a position in the rendered entries,
+        rendering a new window if necessary.
+        """
+        if args[0] != "moveto":
+            self.logWdg.text.yview(*args)
+            return
+
+        numEntries = len(self.filteredIndices)
+        numRendered = self.renderEnd - self.renderStart
+        if numRendered == 0:
+            return
+        pos = int(float(args[1]) * numEntries)
+        firstFrac, lastFrac = self.logWdg.text.yview()
+        numVisible = int((lastFrac - firstFrac) * numRendered)
+        if pos < self.renderStart or pos + numVisible > self.renderEnd:
+            self._trimFilteredIndices()
+            numEntries = len(self.filteredIndices)
+            start = max(0, min(pos - RenderMaxEntries // 2, numEntries - RenderMaxEntries))
+            self._renderWindow(start, min(numEntries, start + RenderMaxEntries))
+            numRendered = self.renderEnd - self.renderStart
+        self.logWdg.text.yview("moveto", float(pos - self.renderStart) / max(1, numRendered))
+
+    def _selectText(self, pos, begChar, endChar):
+        """Show and select text in a filtered entry
+
+        Inputs:
+        - pos: position in filteredIndices
+        - begChar, endChar: range of characters to select in the entry's string (as returned by getStr)
+        """
+        self.showPos(pos)
+        entryStartInd = "%d.0" % (self._getLineForPos(pos),)
+        begInd = "%s + %d chars" % (entryStartInd, begChar)
+        self.logWdg.text.tag_remove("sel", "1.0", "end")
+        self.logWdg.text.tag_add("sel", begInd, "%s + %d chars" % (entryStartInd, endChar))
+        self.logWdg.text.see(begInd)
+
+    def _textYScrollCallback(self, firstFrac, lastFrac):
+        """Handle a scroll report from the text widget
+
+        Update the scrollbar to show the position in all filtered entries
+        and page the rendered window if scrolled to its edge.
+        """
+        firstFrac = float(firstFrac)
+        lastFrac = float(lastFrac)
+        self._updateScrollbar(firstFrac, lastFrac)
+        if self._pagePending:
+            return
+        if (firstFrac <= 0.0 and (self.renderStart > 0 or self._hasMoreHistory())) \
+            or (lastFrac >= 1.0 and self.renderEnd < len(self.filteredIndices)):
+            self._pagePending = True
+            self.after_idle(self._pageRenderWindow)
+
+    def _trimFilteredIndices(self, minCut=0):
+        """Remove entries from the start of filteredIndices that are no longer available from the log source
+
+        Inputs:
+        - minCut: minimum number of entries to remove (e.g. to enforce maxLines)
+        """
+        numCut = max(minCut, bisect.bisect_left(self.filteredIndices, self.logSource.getOldestIndex()))
+        if numCut <= 0:
+            return
+        del self.filteredIndices[0:numCut]
+        if numCut > self.renderStart:
+            self._unrenderTop(min(numCut, self.renderEnd) - self.renderStart)
+        self.renderStart = max(0, self.renderStart - numCut)
+        self.renderEnd = max(0, self.renderEnd - numCut)
+
+    def _unrenderTop(self, numEntries):
+        """Remove the first numEntries rendered entries from the text widget
+        """
+        if numEntries <= 0:
+            return
+        numLines = sum(self.renderNumLines[0:numEntries])
+        self.logWdg.text.delete("1.0", "%d.0" % (numLines + 1,))
+        del self.renderNumLines[0:numEntries]
+        self.renderStart += numEntries
+
+    def _updateScrollbar(self, firstFrac=None, lastFrac=None):
+        """Set the scrollbar to show the visible region as a fraction of all filtered entries
+        """
+        if firstFrac is None:
+            firstFrac, lastFrac = self.logWdg.text.yview()
+        numEntries = len(self.filteredIndices)
+        numRendered = self.renderEnd - self.renderStart
+        if numEntries == 0:
+            self.logWdg.yscroll.set(0.0, 1.0)
+            return
+        self.logWdg.yscroll.set(
+            (self.renderStart + firstFrac * numRendered) / float(numEntries),
+            (self.renderStart + lastFrac * numRendered) / float(numEntries),
+        )
+
     def _actorsCallback(self, keyVar):
         """Actor keyword callback.
         """
@@ -1128,7 +1600,7 @@ class TUILogWdg(Tkinter.Frame):
     def __del__ (self, *args):
         """Going away; remove myself as the dispatcher's logger.
         """
-        self.logSource.removeCallback(self.logSourceCallback)
+        self.logSource.removeBatchCallback(self.logSourceBatchCallback, doRaise=False)
 
 
 if __name__ == '__main__':
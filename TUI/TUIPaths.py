@@ -13,6 +13,7 @@
                     Added ifExists argument to getAddPaths.
                     Added getGeomFile and getPrefsFile.
 2015-11-03 ROwen    Replace "== None" with "is None" and "!= None" with "is not None" to modernize the code.
+2026-10-18          Added getLogArchiveDir.
 """
 import os
 import RO.OS
@@ -63,6 +64,17 @@ def getGeomFile():
     geomName = "%s%sGeom" % (RO.OS.getPrefsPrefix(), TUI.Version.ApplicationName)
     return os.path.join(geomDir, geomName)
 
+def getLogArchiveDir():
+    """Return the directory for the on-disk archive of log messages
+
+    This is a subdirectory of the log directory used by runtuiWithLog.py.
+    The directory may not exist.
+    """
+    docsDir = RO.OS.getDocsDir()
+    if not docsDir:
+        raise RuntimeError("Cannot determine documents dir")
+    return os.path.join(docsDir, "%s_logs" % (TUI.Version.ApplicationName.lower(),), "archive")
+
 def getPrefsFile():
     prefsDir = RO.OS.getPrefsDirs(inclNone=True)[0]
     if prefsDir is None:
@@ -84,5 +96,6 @@ def getResourceDir(*args):
 if __name__ == "__main__":
     print "TUI Prefs =", getPrefsFile()
     print "TUI Geom = ", getGeomFile()
+    print "TUI Log Archive =", getLogArchiveDir()
     print "TUI Additions =", getAddPaths()
     print "TUI Sounds =", getResourceDir("Sounds")
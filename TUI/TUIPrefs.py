@@ -49,6 +49,8 @@ History:
                     where menu items showed up in the "Misc Font"..
 2015-11-05 ROwen    Modernized "except" syntax.
 2016-06-01 EM       Added httpHost and httpPort to connection preferences. 
+2026-10-18          Added "Guide Image Cache" preference.
+2026-10-18          Added headless argument to TUIPrefs, for running without Tk (see TUI.Headless).
 """
 import os
 import sys
@@ -70,20 +72,22 @@ _SoundsDir = RO.OS.getResourceDir(TUI, "Sounds")
 class TUIPrefs(PrefVar.PrefSet):
     def __init__(self,
         defFileName = TUI.TUIPaths.getPrefsFile(),
+        headless = False,
     ):
-        # create Font objects for the various types of widgets we wish to control
-        # and connect them to the widgets via the option database
-        defMiscFontWdg = Tkinter.Button()
-        defDataFontWdg = Tkinter.Entry()
-        defMenuFontWdg = Tkinter.Menu()
-        
+        """Create TUI preferences
+
+        Inputs:
+        - defFileName: default preferences file
+        - headless: if True, omit the preferences that require Tk (fonts, colors and sounds),
+            do not read the preferences file and do not set preferences for RO.Wdg widgets
+        """
         # one must set umask to read it; blecch
         defUMaskInt = os.umask(0)
         os.umask(defUMaskInt)
         defUMaskStr = "%04o" % (defUMaskInt,)
         
         # set up the preference list
-        prefList = (
+        prefList = [
             PrefVar.StrPrefVar(
                 name = "User Name",
                 category = "Connection",
@@ -164,290 +168,306 @@ class TUIPrefs(PrefVar.PrefSet):
             	helpText = "umask for saved images and other files",
             	helpURL = _ExposuresHelpURL,
             ),
-
-            PrefVar.FontPrefVar(
-                name = "Misc Font",
-                category = "Fonts",
-                defWdg = defMiscFontWdg,
-                optionPatterns = ("*font",),
-                helpText = "Font for buttons",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.FontPrefVar(
-                name = "Data Font",
-                category = "Fonts",
-                defWdg = defDataFontWdg,
-                optionPatterns = ("*Entry.font", "*Text.font", "*Label.font",),
-                helpText = "Font for text input and display",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.FontPrefVar(
-                name = "Menu Font",
-                category = "Fonts",
-                defWdg = defMenuFontWdg,
-                optionPatterns = ("*Menu.font",),
-                helpText = "Font for menu items",
-                helpURL = _HelpURL,
-            ),
-            
-            PrefVar.ColorPrefVar(
-                name = "Background Color",
-                category = "Colors",
-                defValue = Tkinter.Label().cget("background"),
-                wdgOption = "background",
-                helpText = "Background color for most widgets",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Foreground Color",
-                category = "Colors",
-                defValue = Tkinter.Label().cget("foreground"),
-                wdgOption = "foreground",
-                helpText = "Color for normal text, etc.",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Debug Color",
-                category = "Colors",
-                defValue = "#006723",
-                helpText = "Color that indicates a debug-level message",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Warning Color",
-                category = "Colors",
-                defValue = "blue2",
-                helpText = "Color that indicates a warning",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Error Color",
-                category = "Colors",
-                defValue = "red",
-                helpText = "Color that indicates an error",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Critical Color",
-                category = "Colors",
-                defValue = "orange",
-                helpText = "Color that indicates a critial error",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Bad Background",
-                category = "Colors",
-                defValue = "pink",
-                helpText = "Background color for invalid data",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Highlight Background",
-                category = "Colors",
-                defValue = "#bdffe0",
-                helpText = "Background color for highlighted text",
-                helpURL = _HelpURL,
-            ),
-            
-            PrefVar.ColorPrefVar(
-                name = "Centroid Color",
-                category = "Guide Colors",
-                defValue = "cyan",
-                helpText = "Color for manually centroided stars",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Found Star Color",
-                category = "Guide Colors",
-                defValue = "green",
-                helpText = "Color for automatically found stars",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Guide Star Color",
-                category = "Guide Colors",
-                defValue = "magenta",
-                helpText = "Color for guide stars",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Boresight Color",
-                category = "Guide Colors",
-                defValue = "cyan",
-                helpText = "Color for boresight",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Saturated Pixel Color",
-                category = "Guide Colors",
-                defValue = "red",
-                helpText = "Color for saturated pixels",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Bad Pixel Color",
-                category = "Guide Colors",
-                defValue = "purple",
-                helpText = "Color for bad pixels",
-                helpURL = _HelpURL,
-            ),
-            PrefVar.ColorPrefVar(
-                name = "Masked Pixel Color",
-                category = "Guide Colors",
-                defValue = "green",
-                helpText = "Color for masked pixels",
-                helpURL = _HelpURL,
-            ),
-            
-            PrefVar.BoolPrefVar(
-                name = "Play Sounds",
-                category = "Sounds",
-                defValue = True,
-                helpText = "Play sound cues?",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Axis Halt",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "AxisHalt.wav"),
-                bellNum = 3,
-                helpText = "Sound cue for axis halt",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Axis Slew",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "AxisSlew.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for start of axis slew",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Axis Track",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "AxisTrack.wav"),
-                bellNum = 2,
-                bellDelay = 150,
-                helpText = "Sound cue for start of axis tracking",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Command Done",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "CommandDone.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for command ended successfully",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Command Failed",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "CommandFailed.wav"),
-                bellNum = 3,
-                bellDelay = 100,
-                helpText = "Sound cue for command failed",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Exposure Begins",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "ExposureBegins.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for start of exposure",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Exposure Ends",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "ExposureEnds.wav"),
-                bellNum = 2,
-                bellDelay = 100,
-                helpText = "Sound cue for end of exposure",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Fiducial Crossing",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "FiducialCrossing.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for fiducial crossing",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Guiding Begins",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "GuidingBegins.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for start of guiding",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Guiding Ends",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "GuidingEnds.wav"),
-                bellNum = 2,
-                bellDelay = 100,
-                helpText = "Sound cue for end of guiding",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Guiding Failed",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "GuidingFailed.wav"),
-                bellNum = 3,
-                bellDelay = 100,
-                helpText = "Sound cue for failure of guiding",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Message Received",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "MessageReceived.wav"),
-                bellNum = 1,
-                helpText = "Sound cue for message received",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "No Guide Star",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "NoGuideStar.wav"),
-                bellNum = 2,
-                helpText = "Sound cue for guiding loop found no stars",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Log Highlighted Text",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "LogHighlightedText.wav"),
-                bellNum = 2,
-                helpText = "Sound when highlighted text is added to log",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Warning Alert",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "Silence.wav"),
-                bellNum = 3,
-                helpText = "Sound cue for a warning alert",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Serious Alert",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "SeriousAlert.wav"),
-                bellNum = 3,
-                helpText = "Sound cue for a serious alert",
-                helpURL = _SoundHelpURL,
-            ),
-            PrefVar.SoundPrefVar(
-                name = "Critical Alert",
-                category = "Sounds",
-                defValue = os.path.join(_SoundsDir, "CriticalAlert.wav"),
-                bellNum = 3,
-                helpText = "Sound cue for a critical alert",
-                helpURL = _SoundHelpURL,
+            PrefVar.IntPrefVar(
+                name = "Guide Image Cache",
+                category = "Exposures",
+                defValue = 200,
+                minValue = 0,
+                maxValue = 10000,
+                helpText = "Memory for guide images prepared for display (MB)",
+                helpURL = _ExposuresHelpURL,
             ),
-        )
+        ]
+        if not headless:
+            # preferences that require Tk;
+            # create widgets whose fonts are the default fonts for the various types of widgets
+            defMiscFontWdg = Tkinter.Button()
+            defDataFontWdg = Tkinter.Entry()
+            defMenuFontWdg = Tkinter.Menu()
+            prefList += [
+                PrefVar.FontPrefVar(
+                    name = "Misc Font",
+                    category = "Fonts",
+                    defWdg = defMiscFontWdg,
+                    optionPatterns = ("*font",),
+                    helpText = "Font for buttons",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.FontPrefVar(
+                    name = "Data Font",
+                    category = "Fonts",
+                    defWdg = defDataFontWdg,
+                    optionPatterns = ("*Entry.font", "*Text.font", "*Label.font",),
+                    helpText = "Font for text input and display",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.FontPrefVar(
+                    name = "Menu Font",
+                    category = "Fonts",
+                    defWdg = defMenuFontWdg,
+                    optionPatterns = ("*Menu.font",),
+                    helpText = "Font for menu items",
+                    helpURL = _HelpURL,
+                ),
+
+                PrefVar.ColorPrefVar(
+                    name = "Background Color",
+                    category = "Colors",
+                    defValue = Tkinter.Label().cget("background"),
+                    wdgOption = "background",
+                    helpText = "Background color for most widgets",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Foreground Color",
+                    category = "Colors",
+                    defValue = Tkinter.Label().cget("foreground"),
+                    wdgOption = "foreground",
+                    helpText = "Color for normal text, etc.",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Debug Color",
+                    category = "Colors",
+                    defValue = "#006723",
+                    helpText = "Color that indicates a debug-level message",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Warning Color",
+                    category = "Colors",
+                    defValue = "blue2",
+                    helpText = "Color that indicates a warning",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Error Color",
+                    category = "Colors",
+                    defValue = "red",
+                    helpText = "Color that indicates an error",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Critical Color",
+                    category = "Colors",
+                    defValue = "orange",
+                    helpText = "Color that indicates a critial error",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Bad Background",
+                    category = "Colors",
+                    defValue = "pink",
+                    helpText = "Background color for invalid data",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Highlight Background",
+                    category = "Colors",
+                    defValue = "#bdffe0",
+                    helpText = "Background color for highlighted text",
+                    helpURL = _HelpURL,
+                ),
+
+                PrefVar.ColorPrefVar(
+                    name = "Centroid Color",
+                    category = "Guide Colors",
+                    defValue = "cyan",
+                    helpText = "Color for manually centroided stars",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Found Star Color",
+                    category = "Guide Colors",
+                    defValue = "green",
+                    helpText = "Color for automatically found stars",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Guide Star Color",
+                    category = "Guide Colors",
+                    defValue = "magenta",
+                    helpText = "Color for guide stars",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Boresight Color",
+                    category = "Guide Colors",
+                    defValue = "cyan",
+                    helpText = "Color for boresight",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Saturated Pixel Color",
+                    category = "Guide Colors",
+                    defValue = "red",
+                    helpText = "Color for saturated pixels",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Bad Pixel Color",
+                    category = "Guide Colors",
+                    defValue = "purple",
+                    helpText = "Color for bad pixels",
+                    helpURL = _HelpURL,
+                ),
+                PrefVar.ColorPrefVar(
+                    name = "Masked Pixel Color",
+                    category = "Guide Colors",
+                    defValue = "green",
+                    helpText = "Color for masked pixels",
+                    helpURL = _HelpURL,
+                ),
+
+                PrefVar.BoolPrefVar(
+                    name = "Play Sounds",
+                    category = "Sounds",
+                    defValue = True,
+                    helpText = "Play sound cues?",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Axis Halt",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "AxisHalt.wav"),
+                    bellNum = 3,
+                    helpText = "Sound cue for axis halt",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Axis Slew",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "AxisSlew.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for start of axis slew",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Axis Track",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "AxisTrack.wav"),
+                    bellNum = 2,
+                    bellDelay = 150,
+                    helpText = "Sound cue for start of axis tracking",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Command Done",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "CommandDone.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for command ended successfully",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Command Failed",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "CommandFailed.wav"),
+                    bellNum = 3,
+                    bellDelay = 100,
+                    helpText = "Sound cue for command failed",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Exposure Begins",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "ExposureBegins.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for start of exposure",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Exposure Ends",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "ExposureEnds.wav"),
+                    bellNum = 2,
+                    bellDelay = 100,
+                    helpText = "Sound cue for end of exposure",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Fiducial Crossing",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "FiducialCrossing.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for fiducial crossing",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Guiding Begins",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "GuidingBegins.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for start of guiding",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Guiding Ends",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "GuidingEnds.wav"),
+                    bellNum = 2,
+                    bellDelay = 100,
+                    helpText = "Sound cue for end of guiding",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Guiding Failed",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "GuidingFailed.wav"),
+                    bellNum = 3,
+                    bellDelay = 100,
+                    helpText = "Sound cue for failure of guiding",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Message Received",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "MessageReceived.wav"),
+                    bellNum = 1,
+                    helpText = "Sound cue for message received",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "No Guide Star",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "NoGuideStar.wav"),
+                    bellNum = 2,
+                    helpText = "Sound cue for guiding loop found no stars",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Log Highlighted Text",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "LogHighlightedText.wav"),
+                    bellNum = 2,
+                    helpText = "Sound when highlighted text is added to log",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Warning Alert",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "Silence.wav"),
+                    bellNum = 3,
+                    helpText = "Sound cue for a warning alert",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Serious Alert",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "SeriousAlert.wav"),
+                    bellNum = 3,
+                    helpText = "Sound cue for a serious alert",
+                    helpURL = _SoundHelpURL,
+                ),
+                PrefVar.SoundPrefVar(
+                    name = "Critical Alert",
+                    category = "Sounds",
+                    defValue = os.path.join(_SoundsDir, "CriticalAlert.wav"),
+                    bellNum = 3,
+                    helpText = "Sound cue for a critical alert",
+                    helpURL = _SoundHelpURL,
+                ),
+            ]
         PrefVar.PrefSet.__init__(self,
             prefList = prefList,
             defFileName = defFileName,
@@ -455,6 +475,9 @@ class TUIPrefs(PrefVar.PrefSet):
             oldPrefInfo = {"Auto FTP": "Auto Get"},
         )
 
+        if headless:
+            return
+
         try:
             self.readFromFile()
         except StandardError as e:
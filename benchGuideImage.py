@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Measure the time and memory needed to load guide images for display.
+
+Usage: benchGuideImage.py gcamFile1 [gcamFile2 ...]
+
+For each file, compares:
+- eager: open the file without memory mapping and read the data of every HDU
+  (roughly what the guide widget used to hold for each image)
+- prepare: TUI.Inst.Guide.GuideImage.prepareImage, which memory-maps the file,
+  reads plane 0 and the mask, assembles the plate view and closes the file
+
+Reports the open latency (msec) and the number of bytes of image data retained in memory,
+summed over all files (as when browsing a history of that many images).
+For prepare, data that is only memory-mapped from the file is reported separately ("mapped"),
+since its pages are only read as they are used and can be discarded by the operating system.
+
+Location is everything:
+This script's directory is automatically added to sys.path,
+so having this script in the same directory as RO and TUI
+makes those packages available without setting PYTHONPATH.
+
+History:
+2026-10-18          Initial version.
+2026-10-18          Bug fix: prepare reported memory-mapped data as retained;
+                    memory-mapped bytes are now reported separately.
+"""
+import sys
+import time
+
+import numpy
+import pyfits
+from opscore.utility import assembleImage
+import TUI.Inst.Guide.GuideImage
+
+NumRepeats = 3 # number of times to load each file; the fastest time is reported
+
+def loadEager(filePath):
+    """Open a FITS file without memory mapping and read all data
+
+    Return (HDUList, number of bytes in memory, number of bytes memory-mapped (always 0))
+    """
+    fitsIm = pyfits.open(filePath, ignore_missing_end=True)
+    numBytes = 0
+    for hdu in fitsIm:
+        if hdu.data is not None:
+            numBytes += hdu.data.nbytes
+    return fitsIm, numBytes, 0
+
+def loadPrepared(filePath, plateViewAssembler):
+    """Prepare a guide image
+
+    Return (PreparedImage, number of bytes in memory, number of bytes memory-mapped)
+    """
+    prepImage = TUI.Inst.Guide.GuideImage.prepareImage(filePath, plateViewAssembler)
+    if prepImage.readErrMsg:
+        raise RuntimeError("Could not read %r: %s" % (filePath, prepImage.readErrMsg))
+    return prepImage, prepImage.getNumBytes(memMapped=False), prepImage.getNumBytes(memMapped=True)
+
+def timeLoad(loadFunc, *args):
+    """Call loadFunc(*args) NumRepeats times
+
+    Return (fastest time in sec, number of bytes in memory, number of bytes memory-mapped)
+    """
+    bestTime = None
+    for i in range(NumRepeats):
+        startTime = time.time()
+        loadedObj, numBytes, numMappedBytes = loadFunc(*args)
+        duration = time.time() - startTime
+        if hasattr(loadedObj, "close"):
+            loadedObj.close()
+        if bestTime is None or duration < bestTime:
+            bestTime = duration
+    return bestTime, numBytes, numMappedBytes
+
+def runBenchmark(filePathList):
+    plateViewAssembler = assembleImage.AssembleImage(relSize=0.5)
+    resultDict = dict(eager=([], [], []), prepare=([], [], []))
+    print "%-40s %12s %12s %12s %12s %12s" % \
+        ("file", "eager msec", "eager MB", "prep msec", "prep MB", "prep map MB")
+    for filePath in filePathList:
+        eagerTime, eagerBytes, eagerMappedBytes = timeLoad(loadEager, filePath)
+        prepTime, prepBytes, prepMappedBytes = timeLoad(loadPrepared, filePath, plateViewAssembler)
+        for name, dur, numBytes, numMappedBytes in (
+            ("eager", eagerTime, eagerBytes, eagerMappedBytes),
+            ("prepare", prepTime, prepBytes, prepMappedBytes),
+        ):
+            resultDict[name][0].append(dur)
+            resultDict[name][1].append(numBytes)
+            resultDict[name][2].append(numMappedBytes)
+        print "%-40s %12.1f %12.2f %12.1f %12.2f %12.2f" % (filePath[-40:],
+            eagerTime * 1000, eagerBytes / 1.0e6, prepTime * 1000, prepBytes / 1.0e6, prepMappedBytes / 1.0e6)
+
+    print
+    for name in ("eager", "prepare"):
+        timeList, bytesList, mappedBytesList = resultDict[name]
+        print "%-8s median %0.1f msec; max %0.1f msec; total retained %0.1f MB (plus %0.1f MB mapped) for %d images" % \
+            (name, numpy.median(timeList) * 1000, max(timeList) * 1000,
+            sum(bytesList) / 1.0e6, sum(mappedBytesList) / 1.0e6, len(bytesList))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print __doc__
+        sys.exit(1)
+    runBenchmark(sys.argv[1:])
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""Measure the cost of ingesting and formatting log entries, by replaying a night's traffic.
+
+Usage: benchLogSource.py [replayFile]
+
+replayFile is a text file of hub replies, one per line, as logged by the hub:
+    cmdr cmdID actor msgCode keywords
+and optionally prefixed by a unix time (seconds) and a space. If omitted then a synthetic night
+of traffic is generated (NumSynthEntries replies spread evenly over NightDuration seconds).
+
+Reports, in entries/second:
+- old ingest: creating a LogEntry object for every reply (with an eagerly formatted TAI time string)
+  and appending it to a deque, as LogSource used to do
+- ingest: time to append all replies to a LogEntryStore
+- eager format: formatting a TAI time string for every reply as it arrives, as LogEntry used to do
+- lazy format: formatting the TAI time string for every reply with taiTimeStrFromUnixTime,
+  which caches the string for the most recent second
+- batch format: formatting the TAI time strings for all replies with taiTimeStrListFromUnixTimes,
+  which also computes the clock correction only once
+- getStr: formatting every entry in the store for display, one at a time
+- getStrList: formatting every entry in the store for display, using getStrList
+and the speedup of each new method over the old one.
+
+Location is everything:
+This script's directory is automatically added to sys.path,
+so having this script in the same directory as RO and TUI
+makes those packages available without setting PYTHONPATH.
+
+History:
+2026-10-18          Initial version.
+"""
+import collections
+import sys
+import time
+
+import RO.Astro.Tm
+import RO.Constants
+import TUI.Models.LogSource
+
+NumSynthEntries = 300000
+NightDuration = 10 * 3600.0
+SynthActors = ("tcc", "mcp", "guider", "boss", "apogee", "hub", "keys_tcc")
+
+def readReplay(filePath):
+    """Read a replay file; return a list of (unixTime, actor, msgStr)
+    """
+    replayList = []
+    startTime = time.time()
+    with open(filePath, "rU") as replayFile:
+        for lineNum, line in enumerate(replayFile):
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split(None, 1)
+            try:
+                unixTime = float(fields[0])
+                msgStr = fields[1]
+            except (ValueError, IndexError):
+                unixTime = startTime + lineNum * 0.1
+                msgStr = line
+            msgFields = msgStr.split(None, 3)
+            actor = msgFields[2] if len(msgFields) > 2 else "?"
+            replayList.append((unixTime, actor, msgStr))
+    return replayList
+
+def synthReplay():
+    """Generate a night's worth of synthetic replies; return a list of (unixTime, actor, msgStr)
+    """
+    startTime = time.time()
+    dTime = NightDuration / NumSynthEntries
+    replayList = []
+    for i in xrange(NumSynthEntries):
+        actor = SynthActors[i % len(SynthActors)]
+        msgStr = "apo.apo %d %s i axePos=%0.4f, %0.4f, %0.4f" % (i % 1000, actor, i * 0.001, i * 0.002, i * 0.003)
+        replayList.append((startTime + i * dTime, actor, msgStr))
+    return replayList
+
+def eagerTAITimeStr(unixTime):
+    """Format a TAI time string the way LogEntry used to: without caching
+    """
+    currPythonSeconds = RO.Astro.Tm.getCurrPySec(unixTime)
+    currTAITuple = time.gmtime(currPythonSeconds - RO.Astro.Tm.getUTCMinusTAI())
+    return time.strftime("%H:%M:%S", currTAITuple)
+
+class OldLogEntry(object):
+    """A log entry as LogSource used to store it: one object per entry, with the TAI time string formatted eagerly
+    """
+    def __init__(self, msgStr, severity, actor, cmdr, cmdID, unixTime, tags):
+        self.unixTime = unixTime
+        self.taiTimeStr = eagerTAITimeStr(unixTime)
+        self.msgStr = msgStr
+        self.actor = actor
+        self.severity = severity
+        self.cmdr = cmdr
+        self.cmdID = int(cmdID)
+        self.tags = tags
+        self.isKeys = self.actor.startswith("keys")
+
+def timeIt(descr, func, numEntries):
+    """Call func(), print the rate in entries/second and return the duration (sec)
+    """
+    startTime = time.time()
+    func()
+    duration = max(time.time() - startTime, 1.0e-9)
+    print "%-14s %8.3f sec %12.0f entries/sec" % (descr, duration, numEntries / duration)
+    return duration
+
+def runBenchmark(replayList):
+    numEntries = len(replayList)
+    print "Replaying %d entries" % (numEntries,)
+    store = TUI.Models.LogSource.LogEntryStore(maxEntries=numEntries)
+    oldEntryList = collections.deque()
+
+    def oldIngest():
+        actorTagPrefix = TUI.Models.LogSource.LogEntryStore.ActorTagPrefix
+        cmdrTagPrefix = TUI.Models.LogSource.LogEntryStore.CmdrTagPrefix
+        for unixTime, actor, msgStr in replayList:
+            oldEntryList.append(OldLogEntry(
+                msgStr = msgStr,
+                severity = RO.Constants.sevNormal,
+                actor = actor,
+                cmdr = "apo.apo",
+                cmdID = 0,
+                unixTime = unixTime,
+                tags = [cmdrTagPrefix + "apo.apo", actorTagPrefix + actor.lower()],
+            ))
+            if len(oldEntryList) > numEntries:
+                oldEntryList.popleft()
+
+    def ingest():
+        for unixTime, actor, msgStr in replayList:
+            store.append(
+                msgStr = msgStr,
+                severity = RO.Constants.sevNormal,
+                actor = actor,
+                cmdr = "apo.apo",
+                cmdID = 0,
+                unixTime = unixTime,
+            )
+
+    def eagerFormat():
+        for unixTime, actor, msgStr in replayList:
+            eagerTAITimeStr(unixTime)
+
+    def lazyFormat():
+        taiTimeStrFromUnixTime = TUI.Models.LogSource.taiTimeStrFromUnixTime
+        for unixTime, actor, msgStr in replayList:
+            taiTimeStrFromUnixTime(unixTime)
+
+    def batchFormat():
+        TUI.Models.LogSource.taiTimeStrListFromUnixTimes([replay[0] for replay in replayList])
+
+    def getStr():
+        for logEntry in store:
+            logEntry.getStr()
+
+    def getStrList():
+        TUI.Models.LogSource.getStrList(list(store))
+
+    oldIngestTime = timeIt("old ingest", oldIngest, numEntries)
+    ingestTime = timeIt("ingest", ingest, numEntries)
+    eagerFormatTime = timeIt("eager format", eagerFormat, numEntries)
+    lazyFormatTime = timeIt("lazy format", lazyFormat, numEntries)
+    batchFormatTime = timeIt("batch format", batchFormat, numEntries)
+    getStrTime = timeIt("getStr", getStr, numEntries)
+    getStrListTime = timeIt("getStrList", getStrList, numEntries)
+    print
+    print "ingest speedup:       %6.2f" % (oldIngestTime / ingestTime,)
+    print "lazy format speedup:  %6.2f" % (eagerFormatTime / lazyFormatTime,)
+    print "batch format speedup: %6.2f" % (eagerFormatTime / batchFormatTime,)
+    print "getStrList speedup:   %6.2f" % (getStrTime / getStrListTime,)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        replayList = readReplay(sys.argv[1])
+    else:
+        replayList = synthReplay()
+    runBenchmark(replayList)
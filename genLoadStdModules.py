@@ -18,33 +18,83 @@ History:
 2005-08-01 ROwen
 2005-08-08 ROwen    Modified to use TUI.WindowModuleUtil
 2005-09-22 ROwen    Modified to not use TUI.TUIPaths.
+2026-10-18          Only the TUIMenu window modules and EagerModNames are imported at startup;
+                    the others are registered with tlSet.addDeferredWindow, so they are loaded
+                    when their window is first needed.
+                    This script imports each deferred module to find the names of its windows.
 """
 import os
 import TUI
 import TUI.WindowModuleUtil
 
+# window modules in this subdirectory are always loaded at startup
+LoadFirst = "TUIMenu"
+
+# other window modules that are always loaded at startup, because their widgets
+# play sounds or report alerts from keyVar callbacks, which must work even if the window is hidden
+EagerModNames = (
+    "TUI.Inst.BOSS.BOSSWindow", # exposure sounds (ExposureStateWdg)
+    "TUI.Inst.Guide.GuideWindow", # guiding sounds (GuideStateWdg)
+    "TUI.Misc.Alerts.AlertsWindow", # alert sounds
+    "TUI.Misc.MessageWindow", # message received sound
+    "TUI.TCC.StatusWdg.StatusWindow", # axis state sounds (AxisStatus)
+)
+
+class WindowRecorder(object):
+    """Record the windows created by a window module's addWindow function, without creating them
+    """
+    def __init__(self):
+        self.windowList = [] # list of (window name, default visibility)
+
+    def createToplevel(self, name, defVisible=None, **kargs):
+        if defVisible is None:
+            defVisible = kargs.get("visible", True)
+        self.windowList.append((name, bool(defVisible)))
+
 # get location to look for standard windows
 tuiPath = os.path.dirname(TUI.__file__)
 
 modNames = list(TUI.WindowModuleUtil.findWindowsModules(
     path = tuiPath,
     isPackage = True,
-    loadFirst="TUIMenu",
+    loadFirst=LoadFirst,
 ))
+loadFirstPrefix = "TUI.%s." % (LoadFirst,)
+eagerModNames = [modName for modName in modNames if modName.startswith(loadFirstPrefix) or modName in EagerModNames]
+deferredWindowList = []
+for modName in modNames:
+    if modName in eagerModNames:
+        continue
+    module = __import__(modName, globals(), locals(), "addWindow")
+    windowRecorder = WindowRecorder()
+    module.addWindow(windowRecorder)
+    for name, defVisible in windowRecorder.windowList:
+        deferredWindowList.append((name, modName, defVisible))
+
 modFilePath = os.path.join(tuiPath, "LoadStdModules.py")
 modFile = file(modFilePath, "w")
 try:
     modFile.write("import TUI.Models.TUIModel\n")
-    for modName in modNames:
+    for modName in eagerModNames:
         modFile.write("import %s\n" % modName)
 
     modFile.write("""
+# windows whose modules are loaded when first needed: (window name, window module name, default visibility)
+DeferredWindowList = (
+""")
+    for deferredWindow in deferredWindowList:
+        modFile.write("    %r,\n" % (deferredWindow,))
+    modFile.write(""")
+
 def loadAll():
     tuiModel = TUI.Models.TUIModel.Model()
     tlSet = tuiModel.tlSet
 """)
-    for modName in modNames:
+    for modName in eagerModNames:
         modFile.write("    %s.addWindow(tlSet)\n" % modName)
-    
+    modFile.write("""    for name, modName, defVisible in DeferredWindowList:
+        tlSet.addDeferredWindow(name, modName, defVisible)
+""")
+
 finally:
     modFile.close()
\ No newline at end of file